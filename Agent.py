@@ -1,10 +1,12 @@
 import csv
+import multiprocessing
 import os
 import optparse
 import sys
 import yaml
 import math
 import time
+import numpy as np
 import gymnasium as gym
 import gym_pusht
 import matplotlib.pyplot as plt
@@ -13,6 +15,13 @@ from datetime import datetime
 from random import Random
 from Population import *
 from Evaluator import *
+from PrefixCache import PrefixCache
+from FitnessMemo import FitnessMemo
+from EvalStore import EvalStore, configKey
+from Surrogate import Surrogate
+from Racing import Racer
+from Scheduler import LengthScheduler
+from gym_pusht.envs.pusht import DEFAULT_GOAL_POSE
 
 
 # Agent Config class
@@ -31,6 +40,29 @@ class AgentConfig:
              'geneRangeCfg': (int,True),
              'numTryPerMut': (int,True),
              'blockActionSize': (int,True),
+             'numWorkers': (int,False),
+             'rawEnv': (bool,False),
+             'prefixCacheMB': (int,False),
+             'prefixCacheInterval': (int,False),
+             'fitnessMemoSize': (int,False),
+             'evalStore': (str,False),
+             'evalStoreSize': (int,False),
+             'surrogateBudget': (float,False),
+             'surrogateExplore': (float,False),
+             'racing': (bool,False),
+             'racingFidelity': (str,False),
+             'racingConfidence': (float,False),
+             'fidelity': (str,False),
+             'fastForward': (bool,False),
+             'goalPose': (list,False),
+             'poseArchive': (bool,False),
+             'poseTrace': (bool,False),
+             'earlyExit': (bool,False),
+             'trimGenes': (bool,False),
+             'startStates': (list,False),
+             'nStartStates': (int,False),
+             'startAggregate': (str,False),
+             'batchBackend': (str,False),
              'selfCost' : (list,True),
              'selfDamage': (list,True),
              'EnhanceDamage': (list,True)}
@@ -93,6 +125,39 @@ def printStats(pop, gen):
     print('Avg Reward', avgReward)
     print('Avg SeqSteps', avgSeqSteps)
     print('MutRate', mutRate)
+    cache=Evaluator.prefixCache
+    if cache is not None and cache.hits+cache.misses > 0: #only filled in serial mode
+        print('PrefixCache', cache.stats())
+    store=Evaluator.store
+    if store is not None and store.hits+store.misses > 0: #only filled in serial mode
+        print('EvalStore', store.stats())
+    # evaluations requested since the last generation, and how many of them duplicates
+    # within the generation and fitness memo hits saved
+    counts=Population.takeEvalCounts()
+    requested=counts["requested"]
+    lookups=requested-counts["duplicates"]
+    dedupRate=counts["duplicates"]/requested if requested > 0 else 0.0
+    memoHitRate=counts["memoHits"]/lookups if lookups > 0 else 0.0
+    print('Evaluations', counts["evaluated"], 'of', requested,
+          '(duplicates {}, memo hits {})'.format(counts["duplicates"], counts["memoHits"]))
+    surrogate={}
+    if Population.surrogate is not None:
+        stats=Population.surrogate.takeStats()
+        print('Surrogate', stats)
+        surrogate={"surrogate_skipped": stats["skipped"], "surrogate_mae": stats["mae"],
+                   "surrogate_rank_corr": stats["rank_corr"]}
+    schedule={}
+    if Population.scheduler is not None:
+        stats=Population.scheduler.takeStats()
+        print('Schedule', stats)
+        schedule={"makespan": stats["makespan"], "makespan_bound": stats["bound"],
+                  "mean_utilization": float(np.mean(stats["utilization"]))}
+    racing={}
+    if Population.racer is not None:
+        stats=Population.racer.takeStats()
+        print('Racing', stats)
+        racing={"racing_raced": stats["raced"], "racing_promoted": stats["promoted"],
+                "racing_corr": stats["corr"], "racing_margin": stats["margin"]}
     print('')
 
     return {
@@ -102,10 +167,40 @@ def printStats(pop, gen):
         "best_steps": float(nSeqSteps),
         "avg_steps": float(avgSeqSteps),
         "best_mutRate": float(mutRate),
+        "evals_requested": requested,
+        "evals_run": counts["evaluated"],
+        "dedup_rate": dedupRate,
+        "memo_hit_rate": memoHitRate,
+        **surrogate,
+        **racing,
+        **schedule,
     }
 
 
 
+#
+# Save every evaluated individual with the block poses its rollout ended in
+# (and passed through, with poseTrace), so that they can be rescored against
+# other goals with Evaluator.rescore. Genomes and traces are NaN-padded to
+# the longest possible sequence.
+#
+def savePoseArchive(path, archive, cfg):
+    n=len(archive)
+    genomes=np.full((n, cfg.nGenesCfg), np.nan)
+    objectives=np.array([objs for _, objs, _ in archive], dtype=np.float64)
+    finalPoses=np.array([record["finalPose"] for _, _, record in archive], dtype=np.float64)
+    arrays={}
+    if cfg.poseTrace:
+        # (n, steps, 3), or (n, steps, K, 3) with K start states
+        arrays["poses"]=np.full((n, cfg.nGenesCfg//2)+archive[0][2]["poses"].shape[1:], np.nan, dtype=np.float32)
+    for i,(state,_,record) in enumerate(archive):
+        genomes[i, :len(state)]=state
+        if cfg.poseTrace:
+            arrays["poses"][i, :len(record["poses"])]=record["poses"]
+    goalPose=np.array(DEFAULT_GOAL_POSE if cfg.goalPose is None else cfg.goalPose, dtype=np.float64)
+    np.savez_compressed(path, genomes=genomes, objectives=objectives, finalPoses=finalPoses, goalPose=goalPose,
+        **arrays)
+
 #
 # Helper function that allows us to init all cfg-related class
 #  variables on our Pool worker processes
@@ -115,12 +210,21 @@ def initClassVars(cfg):
     Evaluator.selfDamage=cfg.selfDamage
     Evaluator.EnhanceDamage=cfg.EnhanceDamage
     Evaluator.cfg = cfg # Make cfg available to the Evaluator class
-
-    AgentIndividual.ObjFunc=Evaluator.ObjFunc
+    Evaluator.startStates=Evaluator.makeStartStates(cfg)
+    Evaluator.prefixCache=None
+    if cfg.prefixCacheMB:
+        Evaluator.prefixCache=PrefixCache(cfg.prefixCacheMB*2**20, Evaluator.snapshotInterval())
+    Evaluator.store=None
+    if cfg.evalStore:
+        Evaluator.store=EvalStore(cfg.evalStore, cfg.evalStoreSize or 1000000, configKey(Evaluator.settings()))
+
+    AgentIndividual.ObjFunc=Evaluator.Evaluate
+    AgentIndividual.LowObjFunc=Evaluator.EvaluateLow
     AgentIndividual.nGenes=cfg.nGenesCfg
     AgentIndividual.geneRange=cfg.geneRangeCfg
     AgentIndividual.numTryPerMut=cfg.numTryPerMut
     AgentIndividual.blockActionSize=cfg.blockActionSize
+    AgentIndividual.trimGenes=bool(cfg.trimGenes)
     AgentIndividual.learningRate=1.0/math.sqrt(cfg.nGenesCfg)
 
     Population.individualType=AgentIndividual
@@ -142,47 +246,89 @@ def EV3_MO(cfg):
     Population.crossoverFraction=cfg.crossoverFraction
     initClassVars(cfg)
 
-    # create initial Population (random initialization)
-    population=Population(cfg.populationSize)
-    population.updateRanking()
-
-    # print initial pop stats
-    history = []
-    history.append(printStats(population, 0))
-    # population.generatePlots(title=f'Generation 0')
-
-    # evolution main loop
-    for i in range(cfg.generationCount):
-        # create initial offspring population by copying parent pop
-        offspring=population.copy()
-
-        # select mating pool
-
-        #offspring.conductTournament()
-        offspring.binaryTournament()
-
-        #perform crossover
-        offspring.crossover()
-
-        #random mutation
-        offspring.mutate()
-
-        #Update objectives
-        offspring.evaluateObjectives()
-
-        #survivor selection: elitist truncation using parents+offspring
-        population.combinePops(offspring)
-
-        #Objectives have changed, so remember to update the ranking before truncation occurs.
+    # start the evaluation worker pool (numWorkers: 0 = one per core, None/1 = serial)
+    pool=None
+    if cfg.numWorkers is not None and cfg.numWorkers != 1:
+        numWorkers=cfg.numWorkers if cfg.numWorkers > 0 else os.cpu_count()
+        pool=multiprocessing.Pool(numWorkers, initializer=initClassVars, initargs=(cfg,))
+    Population.pool=pool
+    Population.scheduler=LengthScheduler(numWorkers) if pool is not None else None
+    Population.archive=[] if cfg.poseArchive else None
+    Population.memo=FitnessMemo(cfg.fitnessMemoSize) if cfg.fitnessMemoSize else None
+    Population.store=Evaluator.store
+    Population.surrogate=None
+    if cfg.surrogateBudget is not None and cfg.surrogateBudget < 1.0:
+        Population.surrogate=Surrogate(cfg.nGenesCfg, cfg.geneRangeCfg, minSamples=cfg.populationSize)
+    Population.racer=None
+    if cfg.racing:
+        Population.racer=Racer(cfg.racingConfidence if cfg.racingConfidence is not None else 2.0)
+
+    # the workers are shut down even if a generation fails
+    try:
+        # create initial Population (random initialization)
+        population=Population(cfg.populationSize)
         population.updateRanking()
 
-        #population.truncateSelect(cfg.populationSize)
-        population.MOTruncation(cfg.populationSize)
-
-        #print population stats
-        history.append(printStats(population, i+1))
-        #print the objective space with its frontRank
-        #population.generatePlots(title=f'Generation {i+1}')
+        # print initial pop stats
+        history = []
+        history.append(printStats(population, 0))
+        # population.generatePlots(title=f'Generation 0')
+
+        # evolution main loop
+        for i in range(cfg.generationCount):
+            # create initial offspring population by copying parent pop
+            offspring=population.copy()
+
+            # select mating pool
+
+            #offspring.conductTournament()
+            offspring.binaryTournament()
+
+            #perform crossover
+            offspring.crossover()
+
+            #random mutation
+            offspring.mutate()
+
+            #surrogate pre-screening: only simulate the most promising offspring
+            if Population.surrogate is not None:
+                # with earlyExit the steps objective depends on the rollout, so only the reward is predicted
+                offspring.prescreen(population, cfg.surrogateBudget,
+                                    cfg.surrogateExplore if cfg.surrogateExplore is not None else 0.2,
+                                    rewardOnly=bool(cfg.earlyExit))
+
+            #racing: score at low fidelity first, promote only candidates that could survive
+            if Population.racer is not None:
+                offspring.race(population)
+
+            #Update objectives
+            offspring.evaluateObjectives()
+
+            #survivor selection: elitist truncation using parents+offspring
+            population.combinePops(offspring)
+
+            #Objectives have changed, so remember to update the ranking before truncation occurs.
+            population.updateRanking()
+
+            #population.truncateSelect(cfg.populationSize)
+            population.MOTruncation(cfg.populationSize)
+
+            #print population stats
+            history.append(printStats(population, i+1))
+            #print the objective space with its frontRank
+            #population.generatePlots(title=f'Generation {i+1}')
+    except BaseException:
+        # the workers may still be busy with (or interrupted in) a generation, so stop them
+        # instead of waiting for their jobs; close is a no-op then
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        # shut down the evaluation workers
+        if pool is not None:
+            pool.close()
+            pool.join()
+            Population.pool=None
 
     # Define weighting factors
     weight_reward = 1.0  # Example weighting for rewardEnd
@@ -204,6 +350,11 @@ def EV3_MO(cfg):
         writer.writerows(history)
     print(f"[Saved] CSV: {csv_path}")
 
+    if Population.archive is not None:
+        archive_path = os.path.join(out_dir, f"pose_archive_{run_id}.npz")
+        savePoseArchive(archive_path, Population.archive, cfg)
+        print(f"[Saved] Pose archive: {archive_path}")
+
     gens = [h["generation"] for h in history]
     max_rewards = [h["max_reward"] for h in history]
     avg_rewards = [h["avg_reward"] for h in history]
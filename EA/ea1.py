@@ -12,17 +12,27 @@ def fitness_function(individual, render="rgb_array"): # human rgb_array
     observation, info = env.reset(options={"reset_to_state": fixed_state})
     r = 0
     #print(individual)
-    for i in range(len(individual) // 2):
-        action = individual[2 * i : 2 * i + 2]
-        observation, reward, terminated, truncated, info = env.step(action)
-        #input()
-        #print(f"action:{action}")
-        #print(f"observation:{observation}")
-        #print(f"reward:{reward}")
-        image = env.render()
-        r = reward
-        if terminated or truncated:
-            observation, info = env.reset(options={"reset_to_state": fixed_state})   
+    actions = [individual[2 * i : 2 * i + 2] for i in range(len(individual) // 2)]
+    if render == "human":
+        for action in actions:
+            observation, reward, terminated, truncated, info = env.step(action)
+            #input()
+            #print(f"action:{action}")
+            #print(f"observation:{observation}")
+            #print(f"reward:{reward}")
+            image = env.render()
+            r = reward
+            if terminated or truncated:
+                observation, info = env.reset(options={"reset_to_state": fixed_state})
+    else:
+        # no frames needed: run the actions in bulk, restarting after success or truncation
+        i = 0
+        while i < len(actions):
+            r, terminated, truncated, info = env.unwrapped.step_sequence(
+                actions[i:], max_steps=env.spec.max_episode_steps)
+            i += info["n_steps"]
+            if terminated or truncated:
+                observation, info = env.reset(options={"reset_to_state": fixed_state})
 
     env.close()
 
@@ -18,14 +18,24 @@ def fitness_function(individual, render=True):
     r = 0.0
 
     # Each action consists of two consecutive values in the individual
-    for i in range(len(individual) // 2):
-        action = individual[2 * i : 2 * i + 2]
-        observation, reward, terminated, truncated, info = env.step(action)
-        r = reward  # keep last reward (or use any other aggregation you like)
-        env.render()
-        if terminated or truncated:
-            observation, info = env.reset(options={"reset_to_state": fixed_state})
-        time.sleep(0.2)
+    actions = [individual[2 * i : 2 * i + 2] for i in range(len(individual) // 2)]
+    if render:
+        for action in actions:
+            observation, reward, terminated, truncated, info = env.step(action)
+            r = reward  # keep last reward (or use any other aggregation you like)
+            env.render()
+            if terminated or truncated:
+                observation, info = env.reset(options={"reset_to_state": fixed_state})
+            time.sleep(0.2)
+    else:
+        # nothing to watch: run the actions in bulk, restarting after success or truncation
+        i = 0
+        while i < len(actions):
+            r, terminated, truncated, info = env.unwrapped.step_sequence(
+                actions[i:], max_steps=env.spec.max_episode_steps)
+            i += info["n_steps"]
+            if terminated or truncated:
+                observation, info = env.reset(options={"reset_to_state": fixed_state})
 
     env.close()
     return r
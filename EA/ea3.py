@@ -14,6 +14,13 @@ def fitness_function(individual, env, debug_render=False):
 
     r = 0.0   # 用來記錄最後一個 action 的 reward
 
+    # 不需要畫面時，整串 action 一次交給環境執行（成功或超過步數上限就停止）
+    if not debug_render:
+        actions = [individual[2 * i : 2 * i + 2] for i in range(len(individual) // 2)]
+        r, terminated, truncated, info = env.unwrapped.step_sequence(
+            actions, max_steps=env.spec.max_episode_steps)
+        return r
+
     # individual 是一串數字，每 2 個數字代表 1 個 action
     for i in range(len(individual) // 2):
 
@@ -0,0 +1,144 @@
+#
+# EvalStore.py
+#
+# Evaluation results kept on disk, so that runs (and their worker processes)
+# share them: a SQLite database mapping the digests of a genome and of the
+# evaluation settings to the pickled (objectives, record) of Evaluator.Evaluate.
+#
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from FitnessMemo import genomeKey
+
+# bump when a change of the evaluation code changes results
+STORE_VERSION=1
+
+def configKey(settings):
+    """
+    16-byte digest of a JSON-serializable dict of everything besides the
+    genome that results depend on
+    """
+    text=json.dumps({"version": STORE_VERSION, **settings}, sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+class EvalStore:
+    """
+    Persistent map from (genomeKey, configKey) to evaluation results, holding
+    about maxEntries results: every compactInterval insertions a process
+    deletes the least recently used results beyond that and returns their
+    pages to the file system.
+
+    The database runs in WAL mode, so that readers never block and writers
+    (any number of processes) wait for each other within `timeout` seconds.
+    Lookups only read: the use times of the results they find are kept here
+    and written along with the next put or compact of this process. Each
+    process opens its own connection on first use, as SQLite connections
+    must not cross a fork.
+    """
+
+    def __init__(self, path, maxEntries, config, compactInterval=1000, timeout=60.0):
+        self.path=path
+        self.maxEntries=maxEntries
+        self.config=config #configKey of the evaluation settings
+        self.compactInterval=compactInterval
+        self.timeout=timeout
+        self.conn=None
+        self.pid=None
+        self.inherited=[] #connections of the parent, kept open but never used
+        self.touched={} #genomeKey -> use time of the results found since the last write
+        self.hits=0
+        self.misses=0
+        self.inserts=0
+        self.evictions=0
+
+    def connect(self):
+        if self.pid == os.getpid():
+            return self.conn
+        if self.conn is not None:
+            self.inherited.append(self.conn)
+        directory=os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # autocommit: every statement is its own short transaction
+        conn=sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL') #only takes effect on a new database
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS results (genome BLOB, config BLOB, result BLOB, used INTEGER,'
+                     ' PRIMARY KEY (genome, config)) WITHOUT ROWID')
+        conn.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        self.conn=conn
+        self.pid=os.getpid()
+        self.touched={} #the parent writes its own
+        return conn
+
+    def get(self, state):
+        """
+        Return the stored result for the genome, or None
+        """
+        conn=self.connect()
+        key=genomeKey(state)
+        row=conn.execute('SELECT result FROM results WHERE genome=? AND config=?', (key, self.config)).fetchone()
+        if row is None:
+            self.misses+=1
+            return None
+        self.hits+=1
+        self.touched[key]=time.time_ns()
+        return pickle.loads(row[0])
+
+    def writeTouched(self, conn):
+        """
+        Write the use times of the results found since the last write, in
+        the transaction open on conn
+        """
+        conn.executemany('UPDATE results SET used=? WHERE genome=? AND config=?',
+                         [(used, key, self.config) for key,used in self.touched.items()])
+        self.touched={}
+
+    def put(self, state, result):
+        conn=self.connect()
+        with conn: #one transaction, so one wait for the write lock
+            conn.execute('BEGIN IMMEDIATE')
+            self.writeTouched(conn)
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                         (genomeKey(state), self.config, pickle.dumps(result, pickle.HIGHEST_PROTOCOL), time.time_ns()))
+        self.inserts+=1
+        if self.inserts % self.compactInterval == 0:
+            self.compact()
+
+    def __len__(self):
+        return self.connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def __contains__(self, state):
+        # a peek: neither counted nor marked as used
+        row=self.connect().execute('SELECT 1 FROM results WHERE genome=? AND config=?',
+                                   (genomeKey(state), self.config)).fetchone()
+        return row is not None
+
+    def compact(self):
+        """
+        Delete the least recently used results beyond maxEntries (of all
+        configurations) and release the freed pages
+        """
+        conn=self.connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self.writeTouched(conn)
+            # a single statement, so that processes compacting at the same time keep the same results
+            deleted=conn.execute('DELETE FROM results WHERE (genome, config) IN (SELECT genome, config FROM results'
+                                 ' ORDER BY used DESC LIMIT -1 OFFSET ?)', (self.maxEntries,)).rowcount
+        if deleted > 0:
+            self.evictions+=deleted
+            conn.execute('PRAGMA incremental_vacuum').fetchall()
+
+    def stats(self):
+        lookups=self.hits+self.misses
+        return {
+            "hit_rate": self.hits/lookups if lookups else 0.0,
+            "inserts": self.inserts,
+            "evictions": self.evictions,
+        }
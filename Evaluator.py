@@ -1,41 +1,387 @@
 import math
+import os
 import time
+import numpy as np
 import gymnasium as gym
 import gym_pusht
+from gym_pusht.envs import PushTBatchEnv, PushTEnv
+from gym_pusht.envs.pusht import FIDELITY_PROFILES
+from gym_pusht.envs.coverage import TeeCoverage
+from PrefixCache import PrefixCache, captureState, restoreState
+
+class EnvPool:
+	"""
+	Per-process pool of PushT environments.
+
+	Environments are built on first use and then reused by every ObjFunc call
+	in the same process (each Pool worker ends up with its own set), so the
+	registry lookup and wrapper construction of gym.make are paid only once.
+	With raw=True the bare PushTEnv is used, bypassing the TimeLimit /
+	OrderEnforcing / PassiveEnvChecker wrappers; callers then have to apply
+	the step limit themselves (see maxEpisodeSteps).
+
+	Pooled environments compute the coverage lazily (coverage_interval=None):
+	termination is still exact, but callers have to refresh_reward() where
+	they need an up-to-date reward. `fidelity` selects the physics fidelity
+	profile and `fastForward` skips the physics engine while the agent is away
+	from the block (see PushTEnv), both trading bit-exactness for speed.
+	Pooled environments are headless by default (render_mode=None), so that
+	workers never import pygame. `goalPose` places the goal T (the default
+	goal of PushTEnv when None).
+	"""
+	envId = "gym_pusht/PushT-v0"
+	maxEpisodeSteps = gym.spec(envId).max_episode_steps
+	envs = {}
+	batchEnvs = {}
+	pid = None
+
+	@classmethod
+	def get(cls, render_mode=None, raw=False, fidelity="reference", fastForward=False, goalPose=None):
+		# a forked worker must not share the environments of its parent
+		if cls.pid != os.getpid():
+			cls.envs = {}
+			cls.batchEnvs = {}
+			cls.pid = os.getpid()
+
+		key = (render_mode, raw, fidelity, fastForward, None if goalPose is None else tuple(goalPose))
+		env = cls.envs.get(key)
+		if env is None:
+			if raw:
+				env = PushTEnv(render_mode=render_mode, coverage_interval=None, fidelity=fidelity,
+					fast_forward=fastForward, goal_pose=goalPose)
+			else:
+				env = gym.make(cls.envId, render_mode=render_mode, coverage_interval=None, fidelity=fidelity,
+					fast_forward=fastForward, goal_pose=goalPose)
+			cls.envs[key] = env
+		return env
+
+	@classmethod
+	def getBatch(cls, numEnvs, fidelity="reference", backend="pymunk", goalPose=None):
+		"""
+		Pooled PushTBatchEnv of numEnvs worlds (see Evaluator.simulateStarts),
+		computing the coverage lazily like the pooled PushTEnv
+		"""
+		if cls.pid != os.getpid():
+			cls.envs = {}
+			cls.batchEnvs = {}
+			cls.pid = os.getpid()
+
+		key = (numEnvs, fidelity, backend, None if goalPose is None else tuple(goalPose))
+		env = cls.batchEnvs.get(key)
+		if env is None:
+			env = PushTBatchEnv(numEnvs, fidelity, backend=backend, goal_pose=goalPose, coverage_interval=None)
+			cls.batchEnvs[key] = env
+		return env
+
+	@classmethod
+	def close(cls):
+		for env in cls.envs.values():
+			env.close()
+		cls.envs = {}
 
 class Evaluator:
 	selfCost = None #cls.selfCost[state[i]]
 	selfDamage = None #cls.selfDamage[state[i]]
 	EnhanceDamage = None #cls.EnhanceDamage[state[i-1]][state[i]]
 	cfg = None # Add cfg as a class variable
+	prefixCache = None # optional PrefixCache, one per process
+	store = None # optional EvalStore shared by processes and runs
+	fixedState = [20.0, 250, 100.0, 200.0, 0.0]  # agent_x, agent_y, block_x, block_y, angle
+	startStates = None # optional (K, 5) array of start states, see simulateStarts
 
 	@classmethod
 	def ObjFunc(cls, state, render= False):
-		# Evaluate the sequence of actions in the PushT environment
+		return cls.Evaluate(state, render)[0]
+
+	@classmethod
+	def EvaluateLow(cls, state):
+		"""
+		Objectives at the low fidelity of racing (cfg.racingFidelity, fast
+		by default), see Population.race; always simulated, and never
+		cached, stored or memoized
+		"""
+		return cls.simulate(state, fidelity=cls.cfg.racingFidelity or "fast")[0]
+
+	@classmethod
+	def Evaluate(cls, state, render= False):
+		"""
+		Evaluate the sequence of actions in the PushT environment; returns
+		(objectives, record). The record keeps where the sequence left the
+		block, which is all the reward depends on besides the goal (see
+		rescore): "finalPose", the (x, y, angle) of the block when rewardEnd
+		was computed, and with cfg.poseTrace "poses", the block pose after
+		every step taken, as a float32 array (nSteps, 3). "nSteps" is the
+		number of actions executed and "unusedGenes" the number of trailing
+		genes that never were.
+
+		With cfg.earlyExit the rollout ends at the first success or
+		truncation instead of restarting from fixed_state, so rewardEnd is
+		the reward reached there, and the first objective is the fraction of
+		the nGenesCfg / 2 possible actions executed until then instead of
+		the length of the genome.
+
+		With a store, results are looked up there first, and stored once
+		computed (render=True always simulates).
+		"""
+		if render == False and cls.store is not None:
+			result = cls.store.get(state)
+			if result is not None:
+				return result
+			result = cls.simulate(state)
+			cls.store.put(state, result)
+			return result
+		return cls.simulate(state, render)
+
+	@classmethod
+	def simulate(cls, state, render= False, fidelity=None):
+		"""
+		Evaluate without looking at the store; `fidelity` overrides
+		cfg.fidelity, bypassing the prefix cache
+		"""
+		if render == False and cls.startStates is not None:
+			return cls.simulateStarts(state, fidelity)
 		if render == True:
-			env = gym.make("gym_pusht/PushT-v0", render_mode="human")
+			env = gym.make("gym_pusht/PushT-v0", render_mode="human", goal_pose=cls.cfg.goalPose)
 		else:
-			env = gym.make("gym_pusht/PushT-v0")
+			# reuse this process' environment instead of building a new one per individual
+			env = EnvPool.get(raw=bool(cls.cfg.rawEnv), fidelity=fidelity or cls.cfg.fidelity or "reference",
+				fastForward=bool(cls.cfg.fastForward), goalPose=cls.cfg.goalPose)
 
-		fixed_state = [20.0, 250, 100.0, 200.0, 0.0]  # agent_x, agent_y, block_x, block_y, angle
+		fixed_state = cls.fixedState
 		env.reset(options={"reset_to_state": fixed_state})
 
-		rewardEnd = 0.0
 		# Each action consists of two consecutive values in the individual
-		for i in range(len(state) // 2):
-			action = state[2 * i : 2 * i + 2]
-			observation, reward, terminated, truncated, info = env.step(action)
-			rewardEnd = reward  # keep last reward
-			if(render == True):
+		nActions = len(state) // 2
+		actions = [tuple(state[2 * i : 2 * i + 2]) for i in range(nActions)]
+		rewardEnd = 0.0
+		nSteps = 0
+		record = {"finalPose": None, "poses": None}
+
+		if render == True:
+			for action in actions:
+				observation, reward, terminated, truncated, info = env.step(action)
+				rewardEnd = reward  # keep last reward
+				nSteps += 1
+				record["finalPose"] = cls.blockPose(env)
 				env.render()
-			if terminated or truncated:
-				observation, info = env.reset(options={"reset_to_state": fixed_state})
-		env.close()
+				if terminated or truncated:
+					if cls.cfg.earlyExit:
+						break
+					observation, info = env.reset(options={"reset_to_state": fixed_state})
+			env.close()
+		else:
+			# snapshots of another fidelity must not mix with those of cfg.fidelity
+			cache = cls.prefixCache if fidelity is None else None
+			rewardEnd, nSteps, record["finalPose"], record["poses"] = cls.rollout(env, actions, fixed_state, cache)
+		record["nSteps"] = nSteps
+		record["unusedGenes"] = len(state) - 2 * nSteps
 
 		# Normalized number of steps
-		nSeqSteps = float(len(state)) / float(cls.cfg.nGenesCfg)
+		if cls.cfg.earlyExit:
+			nSeqSteps = 2.0 * nSteps / float(cls.cfg.nGenesCfg)
+		else:
+			nSeqSteps = float(len(state)) / float(cls.cfg.nGenesCfg)
 		#nSeqSteps = len(state) // 2
 
 		objectives = [nSeqSteps, rewardEnd]
 
-		return objectives
\ No newline at end of file
+		return objectives, record
+
+	@classmethod
+	def simulateStarts(cls, state, fidelity=None):
+		"""
+		Evaluate the sequence from every start state of startStates at once,
+		on a PushTBatchEnv (cfg.batchBackend, pymunk by default). Each world
+		stops at its first success or truncation, so its reward is the one
+		reached there. rewardEnd aggregates the rewards of all worlds with
+		cfg.startAggregate (mean by default, or min), and with cfg.earlyExit
+		the first objective is the mean fraction of the possible actions the
+		worlds executed. The record holds the poses of all worlds, "finalPose"
+		(K, 3) and with cfg.poseTrace "poses" (nSteps, K, 3), NaN after a
+		world stopped; "rewards" are the rewards of the worlds and "nSteps"
+		the actions the longest-running one executed.
+		"""
+		cfg = cls.cfg
+		starts = cls.startStates
+		env = EnvPool.getBatch(len(starts), fidelity=fidelity or cfg.fidelity or "reference",
+			backend=cfg.batchBackend or "pymunk", goalPose=cfg.goalPose)
+		env.reset(starts)
+
+		nActions = min(len(state) // 2, EnvPool.maxEpisodeSteps)
+		rewards = np.zeros(len(starts))
+		nSteps = np.zeros(len(starts), dtype=int)
+		finalPoses = env.block_poses()
+		poses = [np.empty((0, len(starts), 3), dtype=np.float32)] if cfg.poseTrace else None
+		active = np.ones(len(starts), dtype=bool)
+		for i in range(nActions):
+			_, reward, terminated, _, _ = env.step(np.broadcast_to(state[2 * i : 2 * i + 2], (len(starts), 2)))
+			nSteps[active] += 1
+			if poses is not None:
+				blockPoses = env.block_poses()
+				poses.append(np.where(active[:, None], blockPoses, np.nan)[None].astype(np.float32))
+			# the rewards of succeeding worlds are fresh (see PushTBatchEnv.coverage_interval)
+			stopped = active & terminated
+			if stopped.any():
+				rewards[stopped] = reward[stopped]
+				finalPoses[stopped] = env.block_poses()[stopped]
+				active &= ~terminated
+				if not active.any():
+					break
+		if active.any():
+			rewards[active] = env.refresh_reward()[active]
+			finalPoses[active] = env.block_poses()[active]
+
+		nStepsMax = int(nSteps.max())
+		record = {
+			"finalPose": finalPoses,
+			"poses": np.concatenate(poses) if poses is not None else None,
+			"rewards": rewards,
+			"nSteps": nStepsMax,
+			"unusedGenes": len(state) - 2 * nStepsMax,
+		}
+		rewardEnd = float(rewards.min() if cfg.startAggregate == "min" else rewards.mean())
+		if cfg.earlyExit:
+			nSeqSteps = 2.0 * float(nSteps.mean()) / float(cfg.nGenesCfg)
+		else:
+			nSeqSteps = float(len(state)) / float(cfg.nGenesCfg)
+		return [nSeqSteps, rewardEnd], record
+
+	@classmethod
+	def makeStartStates(cls, cfg):
+		"""
+		The start states of cfg.startStates, or fixedState and
+		cfg.nStartStates - 1 random ones drawn like PushTBatchEnv.reset draws
+		them with cfg.randomSeed, or None for fixedState alone. Every process
+		and generation of a run evaluates against the same set, so that all
+		individuals compete on the same starts.
+		"""
+		if cfg.startAggregate not in (None, "mean", "min"):
+			raise Exception('startAggregate must be mean or min')
+		if cfg.startStates:
+			return np.array(cfg.startStates, dtype=np.float64).reshape(-1, 5)
+		if not cfg.nStartStates or cfg.nStartStates <= 1:
+			return None
+		rng = np.random.default_rng(cfg.randomSeed)
+		n = cfg.nStartStates - 1
+		random = np.column_stack([rng.integers(50, 450, (n, 2)), rng.integers(100, 400, (n, 2)),
+			rng.uniform(-np.pi, np.pi, n)])
+		return np.vstack([cls.fixedState, random]).astype(np.float64)
+
+	@classmethod
+	def snapshotInterval(cls):
+		"""
+		Actions between the depths where a rollout restores its simulation
+		state (see rollout), the interval of the prefix cache
+		"""
+		return cls.cfg.prefixCacheInterval or cls.cfg.blockActionSize
+
+	@classmethod
+	def settings(cls):
+		"""
+		Everything besides the genome that results depend on, the
+		configuration part of the EvalStore keys. Whether the prefix cache
+		is on is not part of it (see rollout).
+		"""
+		cfg = cls.cfg
+		fidelity = cfg.fidelity or "reference"
+		return {
+			"evaluator": cfg.evaluator,
+			"nGenes": cfg.nGenesCfg,
+			"fixedState": cls.fixedState,
+			"goalPose": cfg.goalPose,
+			"maxEpisodeSteps": EnvPool.maxEpisodeSteps,
+			"rawEnv": bool(cfg.rawEnv),
+			"fidelity": fidelity,
+			"profile": FIDELITY_PROFILES[fidelity],
+			"fastForward": bool(cfg.fastForward),
+			"snapshotInterval": cls.snapshotInterval(),
+			"earlyExit": bool(cfg.earlyExit),
+			"poseTrace": bool(cfg.poseTrace),
+			"startStates": None if cls.startStates is None else cls.startStates.tolist(),
+			"startAggregate": cfg.startAggregate,
+			"batchBackend": cfg.batchBackend,
+		}
+
+	@staticmethod
+	def blockPose(env):
+		block = env.unwrapped.block
+		return (block.position.x, block.position.y, block.angle)
+
+	@classmethod
+	def rollout(cls, env, actions, fixed_state, cache=None):
+		"""
+		Run actions from fixed_state with PushTEnv.step_sequence, restarting from
+		fixed_state after success or truncation (stopping there with
+		cfg.earlyExit), resuming from and filling the prefix cache if one is
+		given; returns the last reward, the number of actions executed, the
+		block pose the reward was computed for and, with cfg.poseTrace, the
+		block poses after every step (None otherwise).
+
+		Restoring a snapshot resets the broadphase of the physics engine, so
+		that the continuation can differ by rounding from an uninterrupted
+		rollout. Rollouts therefore restore their state at every snapshot
+		depth (every snapshotInterval actions), with or without a cache, and
+		return the same results either way.
+		"""
+		raw = env.unwrapped
+		interval = cls.snapshotInterval() if cache is None else cache.interval
+		trace = bool(cls.cfg.poseTrace)
+		nActions = len(actions)
+		rewardEnd = 0.0
+		finalPose = cls.blockPose(env)
+		poses = [np.empty((0, 3), dtype=np.float32)] if trace else None
+		done = False # the rollout stopped early
+
+		# resume from the longest prefix that has already been simulated
+		i = 0
+		if cache is not None:
+			i, node = cache.lookup(actions)
+			if i > 0:
+				simState, rewardEnd, finalPose, cachedPoses, done = node.snapshot
+				restoreState(env, simState)
+				if trace:
+					poses = [cachedPoses]
+		cached = i
+
+		while i < nActions and not done:
+			# stop at the next snapshot depth, step_sequence computes the coverage there
+			end = min(nActions, (i // interval + 1) * interval)
+			rewardEnd, terminated, truncated, info = raw.step_sequence(actions[i:end], max_steps=EnvPool.maxEpisodeSteps,
+				return_poses=trace)
+			i += info["n_steps"]
+			finalPose = cls.blockPose(env)
+			if trace:
+				poses.append(info["poses"][:, 2:].astype(np.float32))
+			if terminated or truncated:
+				if cls.cfg.earlyExit:
+					done = True
+				else:
+					env.reset(options={"reset_to_state": fixed_state})
+			if cache is not None and cache.wantsSnapshot(i, nActions):
+				simState = captureState(env)
+				if trace:
+					poses = [np.concatenate(poses)]
+				# sequences through a snapshot that ended the rollout stop there as well
+				snapshot = (simState, rewardEnd, finalPose, poses[0] if trace else None, done)
+				node = cache.insert(node, actions[cached : i], snapshot)
+				cached = i
+				if i < nActions and not done:
+					# continue from the restored snapshot, exactly like a later cache hit would
+					restoreState(env, simState)
+			elif i % interval == 0 and i < nActions and not done:
+				# the same restore as above, so that results do not depend on the cache
+				restoreState(env, captureState(env))
+		return rewardEnd, i, finalPose, np.concatenate(poses) if trace else None
+
+	@staticmethod
+	def rescore(finalPoses, goalPoses, successThreshold=0.95):
+		"""
+		Rewards (N, G) of final block poses (N, 3) against goal poses (G, 3),
+		without simulating again. A rollout towards another goal would only
+		take another course (and return another rewardEnd) if it reached the
+		goal it was evaluated for or the new one before its last step, as
+		success restarts it from fixed_state.
+		"""
+		# coverage_goals scores against any goal, the one of the engine only fixes a frame
+		coverage = TeeCoverage((0, 0, 0)).coverage_goals(finalPoses, goalPoses)
+		return np.clip(coverage / successThreshold, 0.0, 1.0)
@@ -0,0 +1,59 @@
+#
+# FitnessMemo.py
+#
+# Bounded map from genomes to their evaluation results, so that genomes that
+# were evaluated before (selected clones that no mutation changed, sequences
+# found again) are not simulated again.
+#
+
+import hashlib
+from array import array
+from collections import OrderedDict
+
+def genomeKey(state):
+    """
+    16-byte digest of the genes as float64 bytes: equal genomes have equal
+    keys, and distinct ones practically never collide
+    """
+    return hashlib.blake2b(array('d', state).tobytes(), digest_size=16).digest()
+
+class FitnessMemo:
+    """
+    LRU map from genomeKey to the (objectives, record) of an evaluation,
+    holding at most maxEntries results. Evaluations are deterministic for a
+    given configuration (see PrefixCache.lookup), so a remembered result is
+    exactly what evaluating the genome again would return.
+    """
+
+    def __init__(self, maxEntries):
+        self.maxEntries=maxEntries
+        self.results=OrderedDict() #least recently used first
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+
+    def __len__(self):
+        return len(self.results)
+
+    def __contains__(self, key):
+        # a peek: neither counted nor marked as used
+        return key in self.results
+
+    def get(self, key):
+        """
+        Return the remembered result for key, or None
+        """
+        result=self.results.get(key)
+        if result is None:
+            self.misses+=1
+        else:
+            self.hits+=1
+            self.results.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.results[key]=result
+        self.results.move_to_end(key)
+        while len(self.results) > self.maxEntries:
+            self.results.popitem(last=False)
+            self.evictions+=1
@@ -11,12 +11,18 @@ class Individual:
     learningRate=None
     uniprng=None
     normprng=None
-    ObjFunc=None
+    ObjFunc=None #state -> (objectives, record)
+    LowObjFunc=None #state -> low-fidelity objectives, for racing
 
     def __init__(self):
-        self.objectives=self.__class__.ObjFunc(self.state)
+        # objectives are filled in later, as one batch for the whole population
+        # (see Population.evaluateObjectives)
+        self.objectives=None
+        self.record=None #what the evaluation recorded besides the objectives
+        self.predicted=None #reward a surrogate predicted before evaluation (see Population.prescreen)
+        self.lowObjectives=None #objectives at low fidelity before evaluation (see Population.race)
         self.mutRate=self.uniprng.uniform(0.9,0.1) #use "normalized" sigma
-        self.numObj=len(self.objectives)
+        self.numObj=None
         self.frontRank=None
         self.crowdDist=None
 
@@ -27,9 +33,14 @@ class Individual:
         if self.mutRate > self.maxMutRate:
             self.mutRate=self.maxMutRate
 
+    def setObjectives(self, objectives, record=None):
+        self.objectives=objectives
+        self.numObj=len(objectives)
+        self.record=record
+
     def evaluateObjectives(self):
         if self.objectives == None:
-            self.objectives=self.__class__.ObjFunc(self.state)
+            self.setObjectives(*self.__class__.ObjFunc(self.state))
 
     def dominates(self,other):
         dominatesCount=0
@@ -99,6 +110,7 @@ class AgentIndividual(Individual):
     geneRange=None
     numTryPerMut = None
     blockActionSize = None
+    trimGenes = False
 
     def __init__(self):
         self.state = []
@@ -107,6 +119,13 @@ class AgentIndividual(Individual):
             self.state.append(self.uniprng.uniform(0.0, float(self.geneRange)))
         super().__init__()
 
+    def setObjectives(self, objectives, record=None):
+        super().setObjectives(objectives, record)
+        # drop the genes after the step that ended the rollout (see Evaluator.Evaluate):
+        # the objectives do not depend on them
+        if self.trimGenes and record is not None and record.get("unusedGenes", 0) > 0:
+            del self.state[len(self.state) - record["unusedGenes"]:]
+
     def crossover(self, other):
         #perform crossover "in-place"
         for i in range(self.nGenes):
@@ -125,6 +144,7 @@ class AgentIndividual(Individual):
 
         # Use the adapted mutation rate for existing gene mutations
         mutation_of_existing_genes_rate = self.mutRate
+        changed = False
 
         if self.uniprng.random() < mutation_of_existing_genes_rate:
           # Mutating the existing genes
@@ -154,6 +174,7 @@ class AgentIndividual(Individual):
 
                       # Ensure the new value stays within the geneRange
                       self.state[i] = max(0.0, min(float(self.geneRange), new_gene_value))
+                      changed = changed or self.state[i] != current_gene_value
 
         else:
           # Otherwise only additional genes are added
@@ -181,9 +202,12 @@ class AgentIndividual(Individual):
               a = self.uniprng.uniform(0.0, float(self.geneRange))
               b = self.uniprng.uniform(0.0, float(self.geneRange))
               self.state.extend([a, b])
+              changed = True
 
-        # Let the outer EA re-evaluate this individual later
-        self.objectives = None
+        # Let the outer EA re-evaluate this individual later, unless no gene changed
+        # (its objectives still hold then)
+        if changed:
+            self.objectives = None
 
     def __str__(self):
         return (
@@ -5,8 +5,10 @@
 
 import copy
 import math
+import numpy as np
 from operator import attrgetter
 from Individual import *
+from FitnessMemo import genomeKey
 import matplotlib.pyplot as plt
 
 class Population:
@@ -16,6 +18,14 @@ class Population:
     uniprng=None
     crossoverFraction=None
     individualType=None
+    pool=None #optional multiprocessing.Pool used by evaluateObjectives
+    archive=None #optional list of (state, objectives, record) of every evaluated genome
+    memo=None #optional FitnessMemo consulted by evaluateObjectives
+    store=None #optional EvalStore of the evaluations (Evaluator.store), consulted by race
+    surrogate=None #optional Surrogate trained by evaluateObjectives, used by prescreen
+    racer=None #optional Racer calibrated by evaluateObjectives, used by race
+    scheduler=None #optional LengthScheduler dispatching the jobs of the pool
+    evalCounts={"requested": 0, "duplicates": 0, "memoHits": 0, "evaluated": 0} #see takeEvalCounts
 
     def __init__(self, populationSize):
         """
@@ -25,6 +35,9 @@ class Population:
         for i in range(populationSize):
             self.population.append(self.__class__.individualType())
 
+        # evaluate the initial population as one (possibly parallel) batch
+        self.evaluateObjectives()
+
     def __len__(self):
         return len(self.population)
 
@@ -38,8 +51,165 @@ class Population:
         return copy.deepcopy(self)
 
     def evaluateObjectives(self):
-        for individual in self.population:
-            individual.evaluateObjectives()
+        """
+        Evaluate all individuals whose objectives are unknown, either serially
+        or on the worker pool (if one has been set up). Identical genomes are
+        evaluated once, and not at all if the memo remembers them.
+        """
+        pending=[ind for ind in self.population if ind.objectives is None]
+        if len(pending) == 0: return
+
+        groups={} #genomeKey -> individuals with that genome
+        for individual in pending:
+            groups.setdefault(genomeKey(individual.state), []).append(individual)
+        memo=self.__class__.memo
+        results={}
+        if memo is not None:
+            for key in groups:
+                result=memo.get(key)
+                if result is not None: results[key]=result
+        todo=[key for key in groups if key not in results]
+
+        objFunc=self.__class__.individualType.ObjFunc
+        states=[groups[key][0].state for key in todo]
+        evaluated=self.mapStates(objFunc, states)
+        for key,result in zip(todo,evaluated):
+            results[key]=result
+            if memo is not None: memo.put(key, result)
+
+        for key,individuals in groups.items():
+            objectives,record=results[key]
+            for individual in individuals:
+                individual.setObjectives(list(objectives), record)
+
+        surrogate=self.__class__.surrogate
+        if surrogate is not None:
+            for key in todo:
+                individual=groups[key][0]
+                surrogate.add(individual.state, individual.objectives[1], individual.predicted)
+        racer=self.__class__.racer
+        if racer is not None:
+            for key in todo:
+                individual=groups[key][0]
+                if individual.lowObjectives is not None:
+                    racer.add(individual.lowObjectives[1], individual.objectives[1])
+
+        counts=self.__class__.evalCounts
+        counts["requested"]+=len(pending)
+        counts["duplicates"]+=len(pending)-len(groups)
+        counts["memoHits"]+=len(groups)-len(todo)
+        counts["evaluated"]+=len(todo)
+
+        if self.__class__.archive is not None:
+            for key in todo:
+                individual=groups[key][0]
+                self.__class__.archive.append((list(individual.state), individual.objectives, individual.record))
+
+    @classmethod
+    def mapStates(cls, func, states):
+        """
+        [func(state) for state in states], on the worker pool if there is one
+        (through the scheduler if there is one)
+        """
+        if cls.pool is None:
+            return [func(state) for state in states]
+        # the genomes and func (pickled by reference) are shipped to the workers, results are written back here
+        if cls.scheduler is not None:
+            return cls.scheduler.map(cls.pool, func, states)
+        return cls.pool.map(func, states)
+
+    @classmethod
+    def takeEvalCounts(cls):
+        """
+        Return the evaluation counts since the last call and reset them:
+        individuals to evaluate, duplicates of another one, memo hits and
+        genomes actually evaluated
+        """
+        counts=dict(cls.evalCounts)
+        for name in cls.evalCounts: cls.evalCounts[name]=0
+        return counts
+
+    def prescreen(self, parents, budget, explore, rewardOnly=False):
+        """
+        Drop the pending individuals the surrogate rates worst, keeping a
+        `budget` fraction of them for evaluation: mostly those whose predicted
+        objectives the fewest parents dominate (then the highest predicted
+        reward), and an `explore` share of the budget drawn at random from the
+        others. With rewardOnly they are ranked by predicted reward alone, for
+        when the steps objective is only known after the rollout (earlyExit).
+        Individuals with known objectives all stay. Does nothing while the
+        surrogate is untrained.
+        """
+        surrogate=self.__class__.surrogate
+        pending=[ind for ind in self.population if ind.objectives is None]
+        if len(pending) == 0: return
+        predictions=surrogate.predict([ind.state for ind in pending])
+        for individual,predicted in zip(pending, predictions if predictions is not None else [None]*len(pending)):
+            individual.predicted=None if predicted is None else float(predicted)
+        if predictions is None: return
+
+        nKeep=min(len(pending), max(1, int(math.ceil(budget*len(pending)))))
+        nExplore=int(round(explore*nKeep))
+        if rewardOnly:
+            dominated=np.zeros(len(pending), dtype=int)
+        else:
+            # objectives = [nSeqSteps, rewardEnd], the first one known from the genome length
+            steps=np.array([float(len(ind.state))/float(self.individualType.nGenes) for ind in pending])
+            parentObjs=np.array([ind.objectives for ind in parents])
+            dominated=((parentObjs[:, None, 0] <= steps) & (parentObjs[:, None, 1] >= predictions)
+                       & ((parentObjs[:, None, 0] < steps) | (parentObjs[:, None, 1] > predictions))).sum(axis=0)
+        order=sorted(range(len(pending)), key=lambda i: (dominated[i], -predictions[i]))
+        keep=order[:nKeep-nExplore]
+        rest=order[nKeep-nExplore:]
+        keep+=self.uniprng.sample(rest, nExplore)
+
+        kept=set(id(pending[i]) for i in keep)
+        self.population=[ind for ind in self.population if ind.objectives is not None or id(ind) in kept]
+        surrogate.screened+=len(pending)
+        surrogate.skipped+=len(pending)-nKeep
+
+    def race(self, parents):
+        """
+        Simulate the pending individuals at low fidelity (LowObjFunc) and
+        drop those that would rank behind every front of the parents even
+        with the racer's optimistic full-fidelity estimate of their reward;
+        the others are promoted to evaluateObjectives. Genomes the memo or
+        the store know are left to evaluateObjectives as well.
+        """
+        racer=self.__class__.racer
+        memo=self.__class__.memo
+        store=self.__class__.store
+        pending=[ind for ind in self.population if ind.objectives is None]
+        if memo is not None:
+            pending=[ind for ind in pending if genomeKey(ind.state) not in memo]
+        if store is not None:
+            pending=[ind for ind in pending if ind.state not in store]
+        for individual in pending: individual.lowObjectives=None
+        if len(pending) == 0: return
+
+        lowFunc=self.individualType.LowObjFunc
+        states=[ind.state for ind in pending]
+        low=self.mapStates(lowFunc, states)
+        for individual,objectives in zip(pending, low):
+            individual.lowObjectives=objectives
+        racer.raced+=len(pending)
+        rewards=racer.optimistic([objectives[1] for objectives in low])
+        if rewards is None:
+            racer.promoted+=len(pending)
+            return
+
+        # objectives = [nSeqSteps (minimized), rewardEnd (maximized)]
+        steps=np.array([objectives[0] for objectives in low])
+        parentObjs=np.array([ind.objectives for ind in parents])
+        parentRanks=np.array([ind.frontRank for ind in parents])
+        dominates=((parentObjs[:, None, 0] <= steps) & (parentObjs[:, None, 1] >= rewards)
+                   & ((parentObjs[:, None, 0] < steps) | (parentObjs[:, None, 1] > rewards)))
+        # a candidate ranks right behind the worst front among the parents dominating it
+        ranks=np.where(dominates, parentRanks[:, None]+1, 0).max(axis=0)
+        promoted=set(id(ind) for ind,rank in zip(pending, ranks) if rank <= parentRanks.max())
+        dropped=set(id(ind) for ind in pending)-promoted
+        self.population=[ind for ind in self.population if id(ind) not in dropped]
+        racer.promoted+=len(promoted)
 
     def mutate(self):
         for individual in self.population:
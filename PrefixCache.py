@@ -0,0 +1,141 @@
+#
+# PrefixCache.py
+#
+# Trie of action-sequence prefixes holding PushT physics snapshots, so a
+# rollout can resume from its longest cached prefix instead of fixed_state.
+#
+
+from collections import OrderedDict
+from gymnasium.wrappers import TimeLimit
+
+# rough per-object footprint on 64-bit CPython, used for the memory budget
+NODE_BYTES=300      # node object + key tuple + share of the parent's children dict
+SNAPSHOT_BYTES=700  # get_sim_state array (~30-60 doubles) + tuple + reward
+
+def captureState(env):
+    """
+    Full simulation state of a PushT env, contacts included (PushTEnv.get_sim_state)
+    """
+    return env.unwrapped.get_sim_state()
+
+def restoreState(env, simState):
+    env.unwrapped.set_sim_state(simState)
+    # a TimeLimit wrapper counts steps itself
+    wrapper=env
+    while wrapper is not env.unwrapped:
+        if isinstance(wrapper, TimeLimit):
+            wrapper._elapsed_steps=env.unwrapped._n_steps
+        wrapper=wrapper.env
+
+class PrefixNode:
+    __slots__=('parent','key','children','snapshot')
+
+    def __init__(self, parent=None, key=None):
+        self.parent=parent
+        self.key=key
+        self.children=None
+        self.snapshot=None #(simState, reward, finalPose, poses, done)
+
+class PrefixCache:
+    """
+    Trie keyed on actions; nodes at chosen depths (every `interval` actions and
+    at the end of each evaluated sequence) hold a snapshot of the simulation
+    after that prefix. Snapshots are evicted in LRU order once the estimated
+    footprint exceeds maxBytes. Arrays in snapshots beyond the simulation
+    state (the pose traces of Evaluator.rollout) count with their own size.
+    """
+
+    def __init__(self, maxBytes, interval):
+        self.maxBytes=maxBytes
+        self.interval=interval
+        self.root=PrefixNode()
+        self.lru=OrderedDict() #snapshot nodes -> extra bytes, least recently used first
+        self.extraBytes=0
+        self.nNodes=0
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self.stepsSaved=0
+        self.stepsSimulated=0
+
+    def nbytes(self):
+        return self.nNodes*NODE_BYTES + len(self.lru)*SNAPSHOT_BYTES + self.extraBytes
+
+    def lookup(self, actions):
+        """
+        Return (depth, node) of the deepest snapshot along actions
+        (depth 0 and the root if there is none)
+        """
+        node=self.root
+        best,bestDepth=self.root,0
+        for depth,action in enumerate(actions, 1):
+            if node.children is None: break
+            node=node.children.get(action)
+            if node is None: break
+            # Restoring resets the broadphase, so a continuation can differ by
+            # rounding from the rollout that took the snapshot. Rollouts restore
+            # their state at these depths with or without a cache (see
+            # Evaluator.rollout), so evaluations do not depend on what happens
+            # to be cached, or on whether there is a cache.
+            if node.snapshot is not None and self.wantsSnapshot(depth, len(actions)):
+                best,bestDepth=node,depth
+
+        if bestDepth > 0:
+            self.hits+=1
+            self.lru.move_to_end(best)
+        else:
+            self.misses+=1
+        self.stepsSaved+=bestDepth
+        self.stepsSimulated+=len(actions)-bestDepth
+        return bestDepth,best
+
+    def wantsSnapshot(self, depth, length):
+        return depth == length or depth % self.interval == 0
+
+    def insert(self, node, actions, snapshot):
+        """
+        Store snapshot at the end of actions, which continue the prefix of node;
+        returns the new node (the cursor for further inserts)
+        """
+        for action in actions:
+            if node.children is None: node.children={}
+            child=node.children.get(action)
+            if child is None:
+                child=PrefixNode(node, action)
+                node.children[action]=child
+                self.nNodes+=1
+            node=child
+
+        node.snapshot=snapshot
+        extra=sum(item.nbytes for item in snapshot[1:] if hasattr(item, 'nbytes'))
+        self.extraBytes+=extra-self.lru.get(node, 0)
+        self.lru[node]=extra
+        self.lru.move_to_end(node)
+
+        while self.nbytes() > self.maxBytes and len(self.lru) > 1:
+            self.evict()
+        return node
+
+    def evict(self):
+        node,extra=self.lru.popitem(last=False)
+        self.extraBytes-=extra
+        node.snapshot=None
+        self.evictions+=1
+
+        # prune the branch up to the first node that is still needed
+        while node is not self.root and node.snapshot is None and not node.children:
+            parent=node.parent
+            del parent.children[node.key]
+            self.nNodes-=1
+            node=parent
+
+    def stats(self):
+        lookups=self.hits+self.misses
+        return {
+            "hit_rate": self.hits/lookups if lookups else 0.0,
+            "steps_saved": self.stepsSaved,
+            "steps_simulated": self.stepsSimulated,
+            "snapshots": len(self.lru),
+            "evictions": self.evictions,
+            "mbytes": self.nbytes()/2**20,
+        }
@@ -0,0 +1,76 @@
+#
+# Racing.py
+#
+# Calibration of cheap low-fidelity rewards against full-fidelity ones, so
+# that offspring can be raced (Population.race): all of them are simulated
+# at low fidelity, and only those that could survive at full fidelity.
+#
+
+import math
+import numpy as np
+
+class Racer:
+    """
+    Least-squares line predicting the full-fidelity reward from the
+    low-fidelity one, fitted to the (low, full) pairs of promoted candidates
+    with weights decaying by `forgetting` per pair. A candidate's reward is
+    estimated optimistically as the line plus `confidence` residual standard
+    deviations. The residual spread is std(full) * sqrt(1 - corr^2), so the
+    margin shrinks as the two levels agree and widens when they do not.
+    Until minPairs pairs are known every candidate is promoted.
+    """
+
+    def __init__(self, confidence=2.0, forgetting=0.98, minPairs=10):
+        self.confidence=confidence
+        self.forgetting=forgetting
+        self.minPairs=minPairs
+        self.nPairs=0
+        self.sums=np.zeros(6) #weight, low, full, low^2, low*full, full^2
+        self.resetStats()
+
+    def add(self, low, full):
+        self.sums*=self.forgetting
+        self.sums+=(1.0, low, full, low*low, low*full, full*full)
+        self.nPairs+=1
+
+    def fit(self):
+        """
+        (intercept, slope, residual std, correlation) of the pairs so far
+        """
+        w,sx,sy,sxx,sxy,syy=self.sums
+        varX=max(sxx/w-(sx/w)**2, 0.0)
+        varY=max(syy/w-(sy/w)**2, 0.0)
+        cov=sxy/w-(sx/w)*(sy/w)
+        if varX <= 1e-12:
+            return sy/w, 0.0, math.sqrt(varY), float('nan')
+        slope=cov/varX
+        corr=cov/math.sqrt(varX*varY) if varY > 1e-12 else 1.0
+        residual=math.sqrt(max(varY-slope*cov, 0.0))
+        return sy/w-slope*sx/w, slope, residual, corr
+
+    def optimistic(self, lowRewards):
+        """
+        Optimistic full-fidelity estimates of low-fidelity rewards (an array),
+        or None while there are fewer than minPairs pairs
+        """
+        if self.nPairs < self.minPairs: return None
+        intercept,slope,residual,corr=self.fit()
+        self.margin=self.confidence*residual
+        self.corr=corr
+        return intercept+slope*np.asarray(lowRewards)+self.margin
+
+    def resetStats(self):
+        self.raced=0
+        self.promoted=0
+        self.margin=float('nan')
+        self.corr=float('nan')
+
+    def takeStats(self):
+        """
+        Return the stats since the last call and reset them: candidates
+        raced and promoted, and the correlation and margin of the last
+        promotion decision
+        """
+        stats={"raced": self.raced, "promoted": self.promoted, "corr": self.corr, "margin": self.margin}
+        self.resetStats()
+        return stats
@@ -0,0 +1,91 @@
+#
+# Scheduler.py
+#
+# Longest-first dispatch of evaluations to the worker pool. Rollout time
+# grows with the genome length, so evaluations are handed out one at a time
+# in order of decreasing estimated cost, and idle workers take the next one.
+#
+
+import os
+import time
+import numpy as np
+
+def timedCall(job):
+    """
+    Run func(state) in a worker; returns (index, result, worker pid, seconds)
+    """
+    func,index,state=job
+    start=time.perf_counter()
+    result=func(state)
+    return index, result, os.getpid(), time.perf_counter()-start
+
+class LengthScheduler:
+    """
+    Estimates the cost of an evaluation as a + b * len(genome), a line fitted
+    to the measured times of earlier evaluations (weights decaying by
+    `forgetting` per evaluation), and maps a function over genomes on a pool
+    longest-first with imap_unordered, one genome per task. Every map
+    records the makespan, the ideal lower bound max(total work / nWorkers,
+    longest evaluation) and the share of the makespan each worker was busy.
+    """
+
+    def __init__(self, nWorkers, forgetting=0.99):
+        self.nWorkers=nWorkers
+        self.forgetting=forgetting
+        self.sums=np.zeros(5) #weight, length, seconds, length^2, length*seconds
+        self.resetStats()
+
+    def observe(self, length, seconds):
+        self.sums*=self.forgetting
+        self.sums+=(1.0, length, seconds, length*length, length*seconds)
+
+    def estimate(self, lengths):
+        """
+        Estimated seconds per genome length (lengths alone before any timing)
+        """
+        lengths=np.asarray(lengths, dtype=np.float64)
+        w,sx,sy,sxx,sxy=self.sums
+        if w == 0: return lengths
+        varX=sxx/w-(sx/w)**2
+        slope=(sxy/w-(sx/w)*(sy/w))/varX if varX > 1e-12 else 0.0
+        if slope <= 0: #no usable trend yet, cost per gene on average
+            return lengths*sy/max(sx, 1e-12)
+        return sy/w+slope*(lengths-sx/w)
+
+    def map(self, pool, func, states):
+        """
+        pool.map(func, states), dispatched longest-first
+        """
+        order=np.argsort(-self.estimate([len(state) for state in states]), kind='stable')
+        jobs=[(func, int(i), states[i]) for i in order]
+        results=[None]*len(states)
+        work=0.0
+        longest=0.0
+        start=time.perf_counter()
+        for index,result,pid,seconds in pool.imap_unordered(timedCall, jobs):
+            results[index]=result
+            self.busy[pid]=self.busy.get(pid, 0.0)+seconds
+            work+=seconds
+            longest=max(longest, seconds)
+            self.observe(len(states[index]), seconds)
+        self.makespan+=time.perf_counter()-start
+        self.bound+=max(work/self.nWorkers, longest)
+        return results
+
+    def resetStats(self):
+        self.makespan=0.0
+        self.bound=0.0
+        self.busy={} #worker pid -> seconds spent evaluating
+
+    def takeStats(self):
+        """
+        Return the stats of the maps since the last call and reset them:
+        summed makespan and lower bound in seconds, and the utilization of
+        the workers (busy time over makespan), busiest first
+        """
+        # workers that got no job were idle all along
+        busy=sorted(self.busy.values(), reverse=True)+[0.0]*max(self.nWorkers-len(self.busy), 0)
+        utilization=[round(seconds/self.makespan, 3) if self.makespan > 0 else 0.0 for seconds in busy]
+        stats={"makespan": self.makespan, "bound": self.bound, "utilization": utilization}
+        self.resetStats()
+        return stats
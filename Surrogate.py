@@ -0,0 +1,90 @@
+#
+# Surrogate.py
+#
+# Cheap reward model trained online on evaluated genomes, used to decide
+# which offspring are worth a physics rollout (Population.prescreen).
+#
+
+import numpy as np
+
+class Surrogate:
+    """
+    Ridge regression of rewardEnd on genome features: the genes scaled to
+    [0, 1] and their squares, zero-padded to nGenes, the fraction of genes
+    present and a bias. It keeps only the sufficient statistics X'X and X'y,
+    decayed by `forgetting` per added sample, so that it follows the region
+    the population is moving through. It predicts nothing (None) before it
+    has seen minSamples evaluations.
+    """
+
+    def __init__(self, nGenes, geneRange, ridge=0.1, forgetting=0.995, minSamples=50):
+        self.nGenes=nGenes
+        self.geneRange=float(geneRange)
+        self.ridge=ridge
+        self.forgetting=forgetting
+        self.minSamples=minSamples
+        nFeatures=2*nGenes+2
+        self.xtx=np.zeros((nFeatures, nFeatures))
+        self.xty=np.zeros(nFeatures)
+        self.nSamples=0
+        self.weights=None #solved lazily after new samples
+        self.resetStats()
+
+    def features(self, states):
+        x=np.zeros((len(states), 2*self.nGenes+2))
+        for row,state in zip(x,states):
+            genes=np.asarray(state[:self.nGenes], dtype=np.float64)/self.geneRange
+            row[:len(genes)]=genes
+            row[self.nGenes:self.nGenes+len(genes)]=genes*genes
+            row[-2]=len(genes)/self.nGenes
+            row[-1]=1.0
+        return x
+
+    def add(self, state, reward, predicted=None):
+        """
+        Train on an evaluated genome; `predicted` is what predict said about
+        it before, if anything, and counts toward the accuracy stats
+        """
+        x=self.features([state])[0]
+        self.xtx*=self.forgetting
+        self.xty*=self.forgetting
+        self.xtx+=np.outer(x, x)
+        self.xty+=reward*x
+        self.nSamples+=1
+        self.weights=None
+        if predicted is not None:
+            self.pairs.append((predicted, reward))
+
+    def predict(self, states):
+        """
+        Predicted rewards of the genomes, or None while untrained
+        """
+        if self.nSamples < self.minSamples: return None
+        if self.weights is None:
+            regularizer=self.ridge*np.eye(len(self.xty))
+            regularizer[-1, -1]=0.0 #leave the bias alone
+            self.weights=np.linalg.solve(self.xtx+regularizer, self.xty)
+        return self.features(states)@self.weights
+
+    def resetStats(self):
+        self.pairs=[] #(predicted, actual) of the evaluated predictions
+        self.screened=0
+        self.skipped=0
+
+    def takeStats(self):
+        """
+        Return the stats since the last call and reset them: offspring
+        screened and skipped (evaluations saved), and for the screened ones
+        that were evaluated the mean absolute error and the rank
+        correlation of predicted and actual reward (NaN below 2 pairs)
+        """
+        mae=corr=float('nan')
+        if len(self.pairs) > 0:
+            predicted,actual=np.array(self.pairs).T
+            mae=float(np.abs(predicted-actual).mean())
+            if len(self.pairs) > 1 and predicted.std() > 0 and actual.std() > 0:
+                ranks=lambda v: np.argsort(np.argsort(v))
+                corr=float(np.corrcoef(ranks(predicted), ranks(actual))[0, 1])
+        stats={"screened": self.screened, "skipped": self.skipped, "mae": mae, "rank_corr": corr}
+        self.resetStats()
+        return stats
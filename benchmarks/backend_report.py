@@ -0,0 +1,83 @@
+"""Divergence of the numpy physics backend from pymunk, and what it saves.
+
+Run from the repository root:
+
+    python benchmarks/backend_report.py [--worlds 1000] [--steps 100] [--fidelity reference] [--seed 0]
+
+All runs step a `PushTBatchEnv` of the same random start states under the same random action sequences:
+`pymunk` with a space per world is the reference, `pymunk x32` shares a space between 32 worlds, which only
+changes the order of simultaneous contacts and so shows how far rounding alone takes trajectories apart, and
+`numpy` is the numpy backend. `block` and `agent` are position errors in pixels, `angle` the block angle error
+in radians, each the largest along a world's trajectory, and `reward` the error of the final reward. `success`
+counts the worlds where a run and the reference disagree on ever reaching the goal.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gym_pusht.envs import PushTBatchEnv  # noqa: E402
+from gym_pusht.envs.batch import WORLDS_PER_SPACE  # noqa: E402
+
+
+def rollout(env, states, actions):
+    obs, _ = env.reset(states)
+    trajectory, success = [], np.zeros(len(states), dtype=bool)
+    start = time.perf_counter()
+    for step_actions in actions.transpose(1, 0, 2):
+        obs, reward, terminated, _, _ = env.step(step_actions)
+        trajectory.append(obs)
+        success |= terminated
+    return time.perf_counter() - start, reward, success, np.stack(trajectory, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--worlds", type=int, default=1000, help="number of worlds")
+    parser.add_argument("--steps", type=int, default=100, help="actions per world")
+    parser.add_argument("--fidelity", default="reference", help="physics fidelity profile")
+    parser.add_argument("--seed", type=int, default=0, help="seed of start states and actions")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = args.worlds
+    states = np.column_stack(
+        [rng.integers(50, 450, (n, 2)), rng.integers(100, 400, (n, 2)), rng.uniform(-np.pi, np.pi, n)]
+    ).astype(np.float64)
+    # random walks of the action target starting at the block, so that the agents push the blocks around
+    actions = np.clip(states[:, None, 2:4] + np.cumsum(rng.normal(0, 40, (n, args.steps, 2)), axis=1), 0, 512)
+
+    runs = {
+        "pymunk": PushTBatchEnv(n, args.fidelity),
+        f"pymunk x{WORLDS_PER_SPACE}": PushTBatchEnv(n, args.fidelity, worlds_per_space=WORLDS_PER_SPACE),
+        "numpy": PushTBatchEnv(n, args.fidelity, backend="numpy"),
+    }
+    results = {name: rollout(env, states, actions) for name, env in runs.items()}
+
+    reference_time, reference_reward, reference_success, reference_poses = results["pymunk"]
+    header = f"{'':>10} {'us / step':>9} {'speedup':>8}"
+    print(
+        header
+        + "".join(f" {name:>15}" for name in ("block", "agent", "angle", "reward"))
+        + f" {'success':>8}"
+    )
+    print(f"{'':>10} {'':>9} {'':>8}" + f" {'mean':>7} {'max':>7}" * 4)
+    for name, (elapsed, reward, success, poses) in results.items():
+        error = np.abs(reference_poses - poses)
+        agent = np.hypot(error[..., 0], error[..., 1]).max(axis=1)
+        block = np.hypot(error[..., 2], error[..., 3]).max(axis=1)
+        angle = np.minimum(error[..., 4], 2 * np.pi - error[..., 4]).max(axis=1)
+        reward_error = np.abs(reference_reward - reward)
+        row = f"{name:>10} {1e6 * elapsed / (n * args.steps):>9.1f} {reference_time / elapsed:>8.1f}"
+        for errors in (block, agent, angle, reward_error):
+            row += f" {errors.mean():>7.3f} {errors.max():>7.3f}"
+        print(row + f" {np.sum(success != reference_success):>8}")
+
+
+if __name__ == "__main__":
+    main()
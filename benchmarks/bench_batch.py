@@ -0,0 +1,66 @@
+"""Cost of stepping N PushT worlds: separate `PushTEnv`s against `PushTBatchEnv` with 1 and 32 worlds per space.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch.py [--worlds 256] [--steps 100] [--fidelity reference]
+
+All runs take the same random action sequences from the same random start states. `exact` counts the worlds
+whose observations match the separate environments bit for bit after every step, `max dev` is the largest
+deviation of an observation from them.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gym_pusht.envs import PushTBatchEnv, PushTEnv  # noqa: E402
+from gym_pusht.envs.batch import WORLDS_PER_SPACE  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--worlds", type=int, default=256, help="number of worlds")
+    parser.add_argument("--steps", type=int, default=100, help="actions per world")
+    parser.add_argument("--fidelity", default="reference", help="physics fidelity profile")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.worlds
+    states = np.column_stack(
+        [rng.integers(50, 450, (n, 2)), rng.integers(100, 400, (n, 2)), rng.uniform(-np.pi, np.pi, n)]
+    ).astype(np.float64)
+    # random walks of the action target starting at the block, so that the agents push the blocks around
+    actions = np.clip(states[:, None, 2:4] + np.cumsum(rng.normal(0, 40, (n, args.steps, 2)), axis=1), 0, 512)
+
+    env = PushTEnv(fidelity=args.fidelity)
+    reference = np.empty((args.steps, n, 5))
+    start = time.perf_counter()
+    for i in range(n):
+        env.reset(options={"reset_to_state": states[i]})
+        for t in range(args.steps):
+            reference[t, i] = env.step(actions[i, t].tolist())[0]
+    separate_time = time.perf_counter() - start
+
+    print(f"{'':>12} {'us / world step':>16} {'speedup':>8} {'exact':>7} {'max dev':>8}")
+    print(f"{'separate':>12} {1e6 * separate_time / (n * args.steps):>16.1f} {1.0:>8.1f} {n:>7} {0.0:>8.3f}")
+    for worlds_per_space in (1, WORLDS_PER_SPACE):
+        batch = PushTBatchEnv(n, fidelity=args.fidelity, worlds_per_space=worlds_per_space)
+        observations = np.empty((args.steps, n, 5))
+        start = time.perf_counter()
+        batch.reset(states)
+        for t in range(args.steps):
+            observations[t] = batch.step(actions[:, t])[0]
+        elapsed = time.perf_counter() - start
+        deviation = np.abs(observations - reference).max(axis=(0, 2))
+        name = f"batch {worlds_per_space}"
+        row = f"{name:>12} {1e6 * elapsed / (n * args.steps):>16.1f} {separate_time / elapsed:>8.1f}"
+        print(row + f" {(deviation == 0).sum():>7} {deviation.max():>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
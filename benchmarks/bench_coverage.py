@@ -0,0 +1,67 @@
+"""Cost of one coverage evaluation: shapely (the old `_get_coverage`) against the closed-form engine.
+
+Run from the repository root:
+
+    python benchmarks/bench_coverage.py [--poses 2000]
+
+`scalar` is what `PushTEnv._get_coverage` now calls once per step, `batch` scores all poses in one
+`coverage_batch` call. The largest deviation from shapely is printed as well.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gym_pusht.envs.coverage import TeeCoverage  # noqa: E402
+from gym_pusht.envs.pusht import PushTEnv, pymunk_to_shapely  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--poses", type=int, default=2000, help="block poses to score")
+    args = parser.parse_args()
+
+    env = PushTEnv()
+    env.reset(seed=0)
+    goal_body = env.get_goal_pose_body(env.goal_pose)
+    engine = TeeCoverage(env.goal_pose)
+    rng = np.random.default_rng(0)
+    n = args.poses
+    poses = np.column_stack(
+        [rng.uniform(150, 360, n), rng.uniform(150, 360, n), rng.uniform(-np.pi, np.pi, n)]
+    )
+    poses = [(float(x), float(y), float(angle)) for x, y, angle in poses]
+
+    start = time.perf_counter()
+    reference = []
+    for x, y, angle in poses:
+        # set the angle first: it rotates the block about its center of gravity
+        env.block.angle = angle
+        env.block.position = (x, y)
+        goal_geom = pymunk_to_shapely(goal_body, env.block.shapes)
+        block_geom = pymunk_to_shapely(env.block, env.block.shapes)
+        reference.append(goal_geom.intersection(block_geom).area / goal_geom.area)
+    shapely_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar = [engine.coverage(pose) for pose in poses]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.coverage_batch(np.array(poses))
+    batch_time = time.perf_counter() - start
+
+    print(f"{'':>8} {'us / pose':>10} {'speedup':>8} {'max |err|':>10}")
+    print(f"{'shapely':>8} {1e6 * shapely_time / n:>10.1f} {1.0:>8.1f} {0.0:>10.1e}")
+    for name, elapsed, values in [("scalar", scalar_time, scalar), ("batch", batch_time, batch)]:
+        error = np.max(np.abs(np.array(values) - reference))
+        print(f"{name:>8} {1e6 * elapsed / n:>10.1f} {shapely_time / elapsed:>8.1f} {error:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
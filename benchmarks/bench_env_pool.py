@@ -0,0 +1,83 @@
+"""Per-evaluation overhead of Evaluator.ObjFunc with and without the environment pool.
+
+Run from the repository root:
+
+    python benchmarks/bench_env_pool.py [--evals 200] [--actions 0 5 50]
+
+`make+close` reproduces the old ObjFunc (one gym.make/env.close per individual),
+`pool` reuses the per-process wrapped env and `pool (raw)` the bare PushTEnv.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import gymnasium as gym
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import gym_pusht  # noqa: E402, F401
+from Evaluator import Evaluator  # noqa: E402
+
+FIXED_STATE = [20.0, 250, 100.0, 200.0, 0.0]
+
+
+def make_and_close(state):
+    # the pre-pool ObjFunc body
+    env = gym.make("gym_pusht/PushT-v0")
+    env.reset(options={"reset_to_state": FIXED_STATE})
+    for i in range(len(state) // 2):
+        _, _, terminated, truncated, _ = env.step(state[2 * i : 2 * i + 2])
+        if terminated or truncated:
+            env.reset(options={"reset_to_state": FIXED_STATE})
+    env.close()
+
+
+def pooled(raw):
+    def run(state):
+        Evaluator.cfg.rawEnv = raw
+        Evaluator.ObjFunc(state)
+
+    return run
+
+
+def time_per_eval(fn, genomes):
+    fn(genomes[0])  # warm-up (also populates the pool)
+    start = time.perf_counter()
+    for genome in genomes:
+        fn(genome)
+    return (time.perf_counter() - start) / len(genomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--evals", type=int, default=200, help="evaluations per measurement")
+    parser.add_argument("--actions", type=int, nargs="+", default=[0, 5, 50], help="actions per genome")
+    args = parser.parse_args()
+
+    Evaluator.cfg = SimpleNamespace(
+        nGenesCfg=100,
+        blockActionSize=5,
+        prefixCacheInterval=None,
+        rawEnv=False,
+        fidelity=None,
+        fastForward=False,
+        goalPose=None,
+        poseTrace=False,
+        earlyExit=False,
+    )
+    rng = random.Random(0)
+    variants = [("make+close", make_and_close), ("pool", pooled(False)), ("pool (raw)", pooled(True))]
+
+    print(f"{'actions':>8} " + " ".join(f"{name:>14}" for name, _ in variants) + "   (ms / evaluation)")
+    for n_actions in args.actions:
+        genomes = [[rng.uniform(0, 512) for _ in range(2 * n_actions)] for _ in range(args.evals)]
+        times = [time_per_eval(fn, genomes) for _, fn in variants]
+        print(f"{n_actions:>8} " + " ".join(f"{1e3 * t:>14.3f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
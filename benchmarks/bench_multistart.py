@@ -0,0 +1,92 @@
+"""Cost of evaluating a genome from K start states, one by one and in one batched call.
+
+Run from the repository root:
+
+    python benchmarks/bench_multistart.py [--genomes 20] [--actions 50] [--starts 1 4 16 64]
+
+`serial` runs K `Evaluator` rollouts from single start states, `batch pymunk` and `batch numpy` evaluate all
+K start states at once with `Evaluator.simulateStarts` on the respective `PushTBatchEnv` backend. The last
+columns divide the batched times by the serial ones, a fraction below 1 / K of the serial cost per start.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Evaluator import Evaluator  # noqa: E402
+
+
+def time_per_genome(genomes, starts, backend):
+    cfg = Evaluator.cfg
+    cfg.batchBackend = backend
+    Evaluator.startStates = None
+    if backend is None:
+        cfg.nStartStates = 1
+        start = time.perf_counter()
+        for genome in genomes:
+            for state in starts:
+                Evaluator.fixedState = list(state)
+                Evaluator.simulate(genome)
+    else:
+        Evaluator.startStates = starts
+        Evaluator.simulate(genomes[0])  # warm-up (also builds the pooled batch env)
+        start = time.perf_counter()
+        for genome in genomes:
+            Evaluator.simulate(genome)
+    return (time.perf_counter() - start) / len(genomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--genomes", type=int, default=20, help="genomes per measurement")
+    parser.add_argument("--actions", type=int, default=50, help="actions per genome")
+    parser.add_argument(
+        "--starts", type=int, nargs="+", default=[1, 4, 16, 64], help="numbers of start states"
+    )
+    args = parser.parse_args()
+
+    Evaluator.cfg = SimpleNamespace(
+        nGenesCfg=2 * args.actions,
+        blockActionSize=5,
+        prefixCacheInterval=None,
+        randomSeed=0,
+        rawEnv=True,
+        fidelity=None,
+        fastForward=False,
+        goalPose=None,
+        poseTrace=False,
+        earlyExit=True,
+        startStates=None,
+        nStartStates=None,
+        startAggregate=None,
+        batchBackend=None,
+    )
+    rng = random.Random(0)
+    genomes = [[rng.uniform(0, 512) for _ in range(2 * args.actions)] for _ in range(args.genomes)]
+    fixed_state = Evaluator.fixedState
+
+    variants = [("serial", None), ("batch pymunk", "pymunk"), ("batch numpy", "numpy")]
+    print(
+        f"{'starts':>7} " + " ".join(f"{name:>13}" for name, _ in variants) + f" {'pymunk':>8} {'numpy':>8}"
+    )
+    print(
+        f"{'':>7} " + " ".join(f"{'ms / genome':>13}" for _ in variants) + f" {'/ serial':>8} {'/ serial':>8}"
+    )
+    for k in args.starts:
+        Evaluator.cfg.nStartStates = k
+        starts = Evaluator.makeStartStates(Evaluator.cfg)
+        if starts is None:
+            starts = [fixed_state]
+        times = [time_per_genome(genomes, starts, backend) for _, backend in variants]
+        Evaluator.fixedState = fixed_state
+        row = f"{k:>7} " + " ".join(f"{1e3 * t:>13.2f}" for t in times)
+        print(row + f" {times[1] / times[0]:>8.2f} {times[2] / times[0]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
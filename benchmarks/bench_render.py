@@ -0,0 +1,66 @@
+"""Cost of one rendered image: the pygame surface resized to the image size against the cv2 rasterizer.
+
+Run from the repository root:
+
+    python benchmarks/bench_render.py [--frames 500] [--size 96]
+
+Both renderers draw the same random block and agent poses. `diff` is the mean absolute pixel difference to
+the pygame image, out of 255.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gym_pusht.envs.pusht import RENDERERS, PushTEnv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=500, help="images to render")
+    parser.add_argument("--size", type=int, default=96, help="width and height of the images")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.frames
+    # agent x, y, block x, y, angle
+    poses = np.column_stack([rng.uniform(50, 460, (n, 4)), rng.uniform(-np.pi, np.pi, n)])
+
+    images, times = {}, {}
+    for renderer in RENDERERS:
+        env = PushTEnv(
+            obs_type="pixels", renderer=renderer, observation_width=args.size, observation_height=args.size
+        )
+        env.reset(seed=0)
+        images[renderer], elapsed = [], 0.0
+        for agent_x, agent_y, block_x, block_y, angle in poses:
+            env.agent.position = (agent_x, agent_y)
+            env.block.angle = angle
+            env.block.position = (block_x, block_y)
+            for shape in env._shapes:
+                shape.cache_bb()  # pygame draws the shapes' cached world vertices
+            start = time.perf_counter()
+            images[renderer].append(env.get_obs())
+            elapsed += time.perf_counter() - start
+        times[renderer] = elapsed
+        env.close()
+
+    print(f"{'':>8} {'us / image':>11} {'speedup':>8} {'diff':>6}")
+    for renderer in RENDERERS:
+        diff = np.mean(
+            [
+                np.abs(a.astype(int) - b).mean()
+                for a, b in zip(images[renderer], images["pygame"], strict=True)
+            ]
+        )
+        speedup = times["pygame"] / times[renderer]
+        print(f"{renderer:>8} {1e6 * times[renderer] / n:>11.1f} {speedup:>8.1f} {diff:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
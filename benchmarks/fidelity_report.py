@@ -0,0 +1,84 @@
+"""Divergence of the cheaper physics fidelity profiles from `reference`, and what they save.
+
+Run from the repository root:
+
+    python benchmarks/fidelity_report.py [--sequences 50] [--steps 100] [--seed 0]
+
+Every profile runs the same random action sequences from the same random start states. Poses are compared
+after every step both runs took (a run stops early on success), rewards after the last one: `block` and
+`agent` are position errors in pixels, `angle` the block angle error in radians and `reward` the error of the
+final reward, each the largest along a sequence. `success` counts the sequences where the profile and
+`reference` disagree on reaching the goal.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gym_pusht.envs.pusht import FIDELITY_PROFILES, PushTEnv  # noqa: E402
+
+
+def rollout(env, seed, actions):
+    env.reset(seed=seed)
+    start = time.perf_counter()
+    reward, terminated, _, info = env.step_sequence(actions, return_poses=True)
+    return time.perf_counter() - start, reward, terminated, info["poses"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sequences", type=int, default=50, help="random action sequences")
+    parser.add_argument("--steps", type=int, default=100, help="actions per sequence")
+    parser.add_argument("--seed", type=int, default=0, help="seed of start states and actions")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # random walks of the action target, so that the agent keeps pushing the block around
+    starts = rng.uniform(100, 412, (args.sequences, 1, 2))
+    sequences = np.clip(
+        starts + np.cumsum(rng.normal(0, 40, (args.sequences, args.steps, 2)), axis=1), 0, 512
+    )
+    seeds = [args.seed + i for i in range(args.sequences)]
+
+    results = {}
+    for fidelity in FIDELITY_PROFILES:
+        env = PushTEnv(fidelity=fidelity)
+        results[fidelity] = [
+            rollout(env, seed, actions) for seed, actions in zip(seeds, sequences, strict=True)
+        ]
+        env.close()
+
+    reference = results["reference"]
+    reference_time = sum(r[0] for r in reference)
+    header = f"{'':>10} {'ms / act':>9} {'speedup':>8}"
+    print(
+        header
+        + "".join(f" {name:>15}" for name in ("block", "agent", "angle", "reward"))
+        + f" {'success':>8}"
+    )
+    print(f"{'':>10} {'':>9} {'':>8}" + f" {'mean':>7} {'max':>7}" * 4)
+    for fidelity, runs in results.items():
+        elapsed = sum(r[0] for r in runs)
+        n_actions = sum(len(r[3]) for r in runs)
+        block, agent, angle, reward = [], [], [], []
+        for (_, ref_reward, _, ref_poses), (_, run_reward, _, poses) in zip(reference, runs, strict=True):
+            n = min(len(ref_poses), len(poses))
+            error = np.abs(ref_poses[:n] - poses[:n])
+            agent.append(np.hypot(error[:, 0], error[:, 1]).max(initial=0))
+            block.append(np.hypot(error[:, 2], error[:, 3]).max(initial=0))
+            angle.append(np.minimum(error[:, 4], 2 * np.pi - error[:, 4]).max(initial=0))
+            reward.append(abs(ref_reward - run_reward))
+        success = sum(ref[2] != run[2] for ref, run in zip(reference, runs, strict=True))
+        row = f"{fidelity:>10} {1e3 * elapsed / n_actions:>9.3f} {reference_time / elapsed:>8.1f}"
+        for errors in (block, agent, angle, reward):
+            row += f" {np.mean(errors):>7.3f} {np.max(errors):>7.3f}"
+        print(row + f" {success:>8}")
+
+
+if __name__ == "__main__":
+    main()
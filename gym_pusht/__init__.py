@@ -3,6 +3,7 @@ from gymnasium.envs.registration import register
 register(
     id="gym_pusht/PushT-v0",
     entry_point="gym_pusht.envs:PushTEnv",
+    vector_entry_point="gym_pusht.envs.vector:make_vector_env",
     max_episode_steps=300,
     kwargs={"obs_type": "state"},
 )
@@ -1,3 +1,4 @@
+from gym_pusht.envs.batch import PushTBatchEnv
 from gym_pusht.envs.pusht import PushTEnv
 
-__all__ = ["PushTEnv"]
+__all__ = ["PushTEnv", "PushTBatchEnv"]
@@ -0,0 +1,254 @@
+"""Many PushT worlds stepped together, optionally in shared pymunk spaces.
+
+`PushTBatchEnv` simulates N independent PushT worlds. It runs the PD control of all agents as NumPy array
+operations and scores all blocks in one coverage call. A space can hold up to `WORLDS_PER_SPACE` worlds,
+which are then advanced by a single `Space.step` call per substep. The shapes of the k-th world of a space
+have collision category and mask bit k, so that they only collide with each other and with the walls. The
+walls collide with everything and are shared by the worlds of a space.
+
+With `backend="numpy"` there are no pymunk spaces: `NumpyPhysics` steps all worlds in NumPy array operations.
+"""
+
+import numpy as np
+import pymunk
+from gymnasium.utils import seeding
+from pymunk._chipmunk_cffi import lib as cp
+
+from .coverage import TeeCoverage
+from .numpy_physics import NumpyPhysics
+from .pusht import (
+    _WALLS,
+    BACKENDS,
+    DEFAULT_GOAL_POSE,
+    FIDELITY_PROFILES,
+    PushTEnv,
+    _matched_pd_map,
+)
+
+WORLDS_PER_SPACE = 32  # one bit of the 32-bit collision categories per world
+
+
+class PushTBatchEnv:
+    """N PushT worlds with state observations, reset and stepped as a batch.
+
+    With `worlds_per_space=1` (the default) each world follows exactly the trajectory a `PushTEnv` built with the
+    same `fidelity` takes from the same state under the same actions: the PD control runs the same floating point
+    operations. With more worlds per space, worlds still neither collide nor share bodies, but the broadphase of
+    the shared space may hand the solver the simultaneous contacts of a world in another order than a space of its
+    own would. This changes results by rounding, which contact-rich pushing can amplify. It saves most of the
+    per-world cost of `Space.step`; `benchmarks/bench_batch.py` measures both.
+
+    `backend="numpy"` simulates all worlds with `NumpyPhysics` instead, which scales to thousands of worlds but
+    follows pymunk only approximately (see the `backend` argument of `PushTEnv`).
+
+    `reset(states)` takes the start states as an array (N, 5) of [agent_x, agent_y, block_x, block_y, block_angle],
+    like the `reset_to_state` option of `PushTEnv`, and draws random ones without it. `step(actions)` takes the
+    actions as an array (N, 2). Both return observations as an array (N, 5) like the `state` observations of
+    `PushTEnv`, and `step` returns rewards, `terminated` and `truncated` as arrays (N,) as well. Worlds are never
+    reset by `step`: terminated worlds keep moving under the actions they are given, and step limits are left to
+    the caller. The coverage of all blocks is computed in one `TeeCoverage.coverage_batch` call per step, against
+    the goal T at `goal_pose` (x, y, theta), by default the goal of `PushTEnv`.
+
+    `coverage_interval` works like the argument of `PushTEnv`: with `None`, `step` only scores the blocks that
+    could have reached the success threshold, so that `terminated` stays exact, and the rewards of the other
+    worlds are stale until `refresh_reward()`.
+    """
+
+    def __init__(
+        self,
+        num_envs,
+        fidelity="reference",
+        worlds_per_space=1,
+        backend="pymunk",
+        goal_pose=None,
+        coverage_interval=1,
+    ):
+        if not 1 <= worlds_per_space <= WORLDS_PER_SPACE:
+            raise ValueError(f"worlds_per_space must be between 1 and {WORLDS_PER_SPACE}")
+        self.worlds_per_space = worlds_per_space
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}. Must be one of {BACKENDS}")
+        if backend == "numpy" and worlds_per_space != 1:
+            raise ValueError("worlds_per_space only applies to the pymunk backend")
+        self.backend = backend
+        if fidelity not in FIDELITY_PROFILES:
+            raise ValueError(f"Unknown fidelity {fidelity}. Must be one of {list(FIDELITY_PROFILES)}")
+        self.num_envs = num_envs
+        self.k_p, self.k_v = 100, 20
+        self.control_hz = PushTEnv.metadata["render_fps"]
+        self.fidelity = fidelity
+        profile = FIDELITY_PROFILES[fidelity]
+        self.substeps = profile["substeps"]
+        self.dt = 1 / (self.control_hz * self.substeps)
+        self.solver_iterations = profile["iterations"]
+        self.pd_update = profile["pd_update"]
+        if self.pd_update == "matched":
+            self._pd_map = _matched_pd_map(self.k_p, self.k_v, self.control_hz, self.substeps)
+        self.success_threshold = 0.95
+        self.coverage_interval = coverage_interval
+        self.goal_pose = np.array(DEFAULT_GOAL_POSE if goal_pose is None else goal_pose, dtype=np.float64)
+        self._tee_coverage = TeeCoverage(self.goal_pose)
+        self.np_random, _ = seeding.np_random()
+        self._physics = None
+        if backend == "numpy":
+            self._physics = NumpyPhysics(num_envs, fidelity, self.k_p, self.k_v, self.control_hz)
+        else:
+            self._setup()
+
+    def _setup(self):
+        self.spaces = []
+        self._space_worlds = []  # the indices of the worlds of every space
+        self.agents, self.blocks = [], []
+        self._block_shapes = []
+        for first in range(0, self.num_envs, self.worlds_per_space):
+            space = pymunk.Space()
+            space.gravity = 0, 0
+            space.damping = 0.0
+            space.iterations = self.solver_iterations
+            space.add(*[PushTEnv.add_segment(space, a, b, 2) for a, b in _WALLS])
+            self._n_static_shapes = cp.cpSpaceGetShapeIDCounter(space._space)
+            for k in range(min(self.worlds_per_space, self.num_envs - first)):
+                world_filter = pymunk.ShapeFilter(categories=1 << k, mask=1 << k)
+                agent = PushTEnv.add_circle(space, (256, 400), 15)
+                block, block_shapes = PushTEnv.add_tee(space, (256, 300), 0)
+                for shape in (*agent.shapes, *block_shapes):
+                    shape.filter = world_filter
+                self.agents.append(agent)
+                self.blocks.append(block)
+                self._block_shapes.append(block_shapes)
+            self.spaces.append(space)
+            self._space_worlds.append(range(first, len(self.agents)))
+        self._agent_bodies = [agent._body for agent in self.agents]
+        self._block_bodies = [block._body for block in self.blocks]
+
+    def _reset_spaces(self):
+        # like `PushTEnv._reset_space`: re-adding the dynamic shapes under their original ids rebuilds the
+        # broadphase and solver order of freshly built spaces
+        for space, worlds in zip(self.spaces, self._space_worlds, strict=True):
+            for i in worlds:
+                space.remove(self.agents[i], *self.agents[i].shapes, self.blocks[i], *self._block_shapes[i])
+            cp.cpSpaceSetShapeIDCounter(space._space, self._n_static_shapes)
+            cp.cpSpaceSetCurrentTimeStep(space._space, 0.0)
+            for i in worlds:
+                for body in (self.agents[i], self.blocks[i]):
+                    body.velocity = 0, 0
+                    body.angular_velocity = 0
+                    # a zero-length position update clears the solver's bias velocities
+                    cp.cpBodyUpdatePosition(body._body, 0.0)
+                self.agents[i].position = 256, 400
+                self.blocks[i].angle = 0
+                self.blocks[i].position = 256, 300
+                space.add(self.agents[i], *self.agents[i].shapes)
+                space.add(self.blocks[i], *self._block_shapes[i])
+
+    def reset(self, states=None, seed=None):
+        """Reset all worlds to `states` (N, 5), or to random states drawn like `PushTEnv.reset` draws them."""
+        if seed is not None:
+            self.np_random, _ = seeding.np_random(seed)
+        if states is None:
+            n = self.num_envs
+            states = np.column_stack(
+                [
+                    self.np_random.integers(50, 450, (n, 2)),
+                    self.np_random.integers(100, 400, (n, 2)),
+                    self.np_random.uniform(-np.pi, np.pi, n),
+                ]
+            )
+        states = np.asarray(states, dtype=np.float64).reshape(self.num_envs, 5)
+        self._n_steps = 0
+        self.coverage = np.zeros(self.num_envs)  # until the first step
+        if self._physics is not None:
+            self._physics.reset(states)
+            return self.get_obs(), {"is_success": np.zeros(self.num_envs, dtype=bool)}
+
+        self._reset_spaces()
+        for agent, block, state in zip(self.agents, self.blocks, states, strict=True):
+            # the assignment order of `PushTEnv._set_state`
+            agent.position = list(state[:2])
+            block.position = list(state[2:4])
+            block.angle = state[4]
+        # Run physics to take effect
+        for space in self.spaces:
+            space.step(self.dt)
+        return self.get_obs(), {"is_success": np.zeros(self.num_envs, dtype=bool)}
+
+    def _agent_vectors(self, getter):
+        # chipmunk's accessors: the pymunk properties build a Vec2d per access
+        vectors = [getter(body) for body in self._agent_bodies]
+        return np.array([(v.x, v.y) for v in vectors])
+
+    def _set_agent_velocities(self, velocities):
+        for body, velocity in zip(self._agent_bodies, velocities.tolist(), strict=True):
+            cp.cpBodySetVelocity(body, velocity)
+
+    def _step_spaces(self):
+        for space in self.spaces:
+            space.step(self.dt)
+
+    def _step_pymunk(self, actions):
+        for _ in range(self.substeps):
+            # the operations of `PushTEnv._step_physics`, on all agents at once
+            position = self._agent_vectors(cp.cpBodyGetPosition)
+            velocity = self._agent_vectors(cp.cpBodyGetVelocity)
+            if self.pd_update == "matched":
+                (ee, ev), (ve, vv) = self._pd_map
+                error = position - actions
+                self._set_agent_velocities(((ee - 1) * error + ev * velocity) / self.dt)
+                self._step_spaces()
+                self._set_agent_velocities(ve * error + vv * velocity)
+                continue
+
+            acceleration = self.k_p * (actions - position) + self.k_v * (0 - velocity)
+            self._set_agent_velocities(velocity + acceleration * self.dt)
+            self._step_spaces()
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, 2)
+        self._n_steps += 1
+        if self._physics is not None:
+            self._physics.step(actions)
+        else:
+            self._step_pymunk(actions)
+
+        if self.coverage_interval is not None and self._n_steps % self.coverage_interval == 0:
+            self.coverage = self.coverage_batch()
+        else:
+            poses = self.block_poses()
+            possible = self._tee_coverage.success_possible_batch(poses, self.success_threshold)
+            # the blocks that are not scored cannot be above the threshold, whatever their stale coverage says
+            self.coverage = np.minimum(self.coverage, self.success_threshold)
+            if possible.any():
+                self.coverage[possible] = self._tee_coverage.coverage_batch(poses[possible])
+        reward = np.clip(self.coverage / self.success_threshold, 0.0, 1.0)
+        terminated = self.coverage > self.success_threshold
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        info = {"is_success": terminated, "coverage": self.coverage}
+        return self.get_obs(), reward, terminated, truncated, info
+
+    def refresh_reward(self):
+        """Compute the coverage of all blocks now and return the rewards (N,)."""
+        self.coverage = self.coverage_batch()
+        return np.clip(self.coverage / self.success_threshold, 0.0, 1.0)
+
+    def block_poses(self):
+        """The (x, y, angle) of every block, as an array (N, 3)."""
+        if self._physics is not None:
+            return np.column_stack([self._physics.block_position(), self._physics.block_angle])
+        positions = [cp.cpBodyGetPosition(body) for body in self._block_bodies]
+        angles = [cp.cpBodyGetAngle(body) for body in self._block_bodies]
+        return np.array([(p.x, p.y, a) for p, a in zip(positions, angles, strict=True)])
+
+    def coverage_batch(self):
+        """The coverage of the goal by every block, as an array (N,)."""
+        return self._tee_coverage.coverage_batch(self.block_poses())
+
+    def get_obs(self):
+        obs = np.empty((self.num_envs, 5))
+        obs[:, :2] = (
+            self._agent_vectors(cp.cpBodyGetPosition)
+            if self._physics is None
+            else self._physics.agent_position
+        )
+        obs[:, 2:] = self.block_poses()
+        obs[:, 4] %= 2 * np.pi
+        return obs
@@ -0,0 +1,243 @@
+"""Closed-form coverage of the goal T by the block T.
+
+Both Ts are the union of two interior-disjoint rectangles, so the area of their intersection is the sum of
+the four rectangle-rectangle intersections, each an intersection of two convex polygons. `TeeCoverage`
+precomputes the goal geometry once and offers a scalar path (Sutherland-Hodgman clipping and the shoelace
+formula, used per environment step) and a NumPy path that scores arrays of block poses in one call.
+
+Poses are `(x, y, angle)` of the body origin, as returned by `body.position` and `body.angle`.
+"""
+
+import math
+
+import numpy as np
+
+# points closer than this to an edge, in pixels, count as lying on it (see `_clip_segments`)
+_ON_EDGE_DISTANCE = 1e-7
+
+
+def tee_rectangles(scale=30, length=4):
+    """Local vertices of the two rectangles of the T, in the order used by `PushTEnv.add_tee`."""
+    return [
+        [
+            (-length * scale / 2, scale),
+            (length * scale / 2, scale),
+            (length * scale / 2, 0),
+            (-length * scale / 2, 0),
+        ],
+        [
+            (-scale / 2, scale),
+            (-scale / 2, length * scale),
+            (scale / 2, length * scale),
+            (scale / 2, scale),
+        ],
+    ]
+
+
+def _signed_area(polygon):
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1], strict=True):
+        area += x0 * y1 - x1 * y0
+    return area / 2
+
+
+def _transform(vertices, pose):
+    x, y, angle = (float(v) for v in pose)
+    c, s = math.cos(angle), math.sin(angle)
+    return [(x + c * vx - s * vy, y + s * vx + c * vy) for vx, vy in vertices]
+
+
+def convex_intersection_area(subject, clip, orientation):
+    """Area of the intersection of two convex polygons given as lists of (x, y).
+
+    `orientation` is the sign of the signed area of `clip` (+1 counter-clockwise, -1 clockwise).
+    """
+    polygon = subject
+    for (ax, ay), (bx, by) in zip(clip, clip[1:] + clip[:1], strict=True):
+        if not polygon:
+            return 0.0
+        ex, ey = bx - ax, by - ay
+        clipped = []
+        px, py = polygon[-1]
+        p_dist = orientation * (ex * (py - ay) - ey * (px - ax))
+        for qx, qy in polygon:
+            q_dist = orientation * (ex * (qy - ay) - ey * (qx - ax))
+            if q_dist >= 0:
+                if p_dist < 0:
+                    t = p_dist / (p_dist - q_dist)
+                    clipped.append((px + t * (qx - px), py + t * (qy - py)))
+                clipped.append((qx, qy))
+            elif p_dist >= 0:
+                t = p_dist / (p_dist - q_dist)
+                clipped.append((px + t * (qx - px), py + t * (qy - py)))
+            px, py, p_dist = qx, qy, q_dist
+        polygon = clipped
+    return abs(_signed_area(polygon)) if len(polygon) > 2 else 0.0
+
+
+def _clip_segments(starts, ends, plane_starts, plane_ends, orientation, closed):
+    """Parameter interval [lo, hi] of the segments starts -> ends (..., E, 2) inside the convex polygon whose
+    edges are plane_starts -> plane_ends (..., K, 2). Empty where hi <= lo.
+
+    With `closed`, points on the boundary count as inside, except for segments running along an edge in the
+    opposite direction (the polygons merely touch there); otherwise the boundary counts as outside. Points within
+    `_ON_EDGE_DISTANCE` of an edge are on it: edges that coincide up to rounding, such as those of a block at the
+    goal, or the inner edges of the two Ts touching, must be classified alike from both sides.
+    """
+    edge = plane_ends - plane_starts
+    tolerance = _ON_EDGE_DISTANCE * np.hypot(edge[..., None, :, 0], edge[..., None, :, 1])
+
+    def distance(points):
+        d = orientation * (
+            edge[..., None, :, 0] * (points[..., :, None, 1] - plane_starts[..., None, :, 1])
+            - edge[..., None, :, 1] * (points[..., :, None, 0] - plane_starts[..., None, :, 0])
+        )
+        return np.where(np.abs(d) <= tolerance, 0.0, d)
+
+    d_start, d_end = distance(starts), distance(ends)  # (..., E, K)
+    if closed:
+        in_start, in_end = d_start >= 0, d_end >= 0
+    else:
+        in_start, in_end = d_start > 0, d_end > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = d_start / (d_start - d_end)
+    lo = np.where(in_start, 0.0, np.where(in_end, t, np.inf))
+    hi = np.where(in_end, 1.0, np.where(in_start, t, -np.inf))
+    if closed:
+        segment = ends - starts
+        alignment = segment[..., :, None, :] * edge[..., None, :, :]
+        antiparallel = alignment[..., 0] + alignment[..., 1] < 0
+        lo = np.where((d_start == 0) & (d_end == 0) & antiparallel, np.inf, lo)
+    return lo.max(axis=-1), hi.min(axis=-1)
+
+
+def _boundary_integral(starts, ends, lo, hi):
+    """Integral of x dy - y dx along each clipped segment (summed over a closed boundary: twice its area)."""
+    inside = hi > lo
+    lo, hi = np.where(inside, lo, 0.0), np.where(inside, hi, 0.0)
+    direction = ends - starts
+    a = starts + lo[..., None] * direction
+    b = starts + hi[..., None] * direction
+    return np.where(inside, a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0], 0.0)
+
+
+class TeeCoverage:
+    """Coverage of a fixed goal T by block Ts at arbitrary poses.
+
+    ```python
+    >>> engine = TeeCoverage(goal_pose=(256, 256, np.pi / 4))
+    >>> round(engine.coverage((256, 256, np.pi / 4)), 9)
+    1.0
+    >>> engine.coverage_batch(np.array([[256, 256, np.pi / 4], [100, 100, 0]]))
+    array([1., 0.])
+    >>> engine.coverage_goals([[100, 100, 0]], [[256, 256, np.pi / 4], [100, 100, 0]]).round(9)
+    array([[0., 1.]])
+    ```
+    """
+
+    def __init__(self, goal_pose, scale=30, length=4):
+        self.local_rects = tee_rectangles(scale, length)
+        # rigid motions preserve orientation, so the sign of the local rectangles holds for every pose
+        self.orientation = math.copysign(1.0, _signed_area(self.local_rects[0]))
+        self.area = sum(abs(_signed_area(rect)) for rect in self.local_rects)
+        self.set_goal(goal_pose)
+
+        # area centroid and diameter of the T, used by `success_possible`
+        centroid = np.zeros(2)
+        for rect in self.local_rects:
+            centroid += abs(_signed_area(rect)) * np.mean(rect, axis=0)
+        self.centroid = centroid / self.area
+        vertices = np.concatenate(self.local_rects)
+        self.diameter = float(np.max(np.linalg.norm(vertices[:, None] - vertices[None], axis=-1)))
+
+    def set_goal(self, goal_pose):
+        self.goal_pose = tuple(float(v) for v in goal_pose)
+        self.goal_rects = [_transform(rect, self.goal_pose) for rect in self.local_rects]
+        # placed like the block rectangles of `coverage_batch`, so that a block exactly at the goal shares its
+        # edges bit for bit
+        self._goal_array = self.block_rects_batch([self.goal_pose])[0]  # (2, 4, 2)
+
+    def intersection_area(self, pose):
+        """Area of the intersection of the block T at `pose` with the goal T."""
+        area = 0.0
+        for rect in self.local_rects:
+            block_rect = _transform(rect, pose)
+            for goal_rect in self.goal_rects:
+                area += convex_intersection_area(block_rect, goal_rect, self.orientation)
+        return area
+
+    def coverage(self, pose):
+        return self.intersection_area(pose) / self.area
+
+    def success_possible(self, pose, threshold):
+        """False if the block at `pose` certainly covers at most `threshold` of the goal.
+
+        If the coverage exceeds `threshold`, the area centroids of block and goal both lie within
+        (1 - threshold) * diameter of the centroid of their intersection.
+        """
+        block_centroid = _transform([self.centroid], pose)[0]
+        goal_centroid = _transform([self.centroid], self.goal_pose)[0]
+        distance = math.hypot(block_centroid[0] - goal_centroid[0], block_centroid[1] - goal_centroid[1])
+        return distance < 2 * (1 - threshold) * self.diameter
+
+    def success_possible_batch(self, poses, threshold):
+        """`success_possible` for an array of block poses (N, 3), as an array (N,)."""
+        poses = np.asarray(poses, dtype=np.float64)
+        c, s = np.cos(poses[:, 2]), np.sin(poses[:, 2])
+        cx, cy = self.centroid
+        goal_centroid = _transform([self.centroid], self.goal_pose)[0]
+        dx = poses[:, 0] + c * cx - s * cy - goal_centroid[0]
+        dy = poses[:, 1] + s * cx + c * cy - goal_centroid[1]
+        return np.hypot(dx, dy) < 2 * (1 - threshold) * self.diameter
+
+    def block_rects_batch(self, poses):
+        """World vertices (N, 2, 4, 2) of the block rectangles at poses (N, 3)."""
+        poses = np.asarray(poses, dtype=np.float64)
+        c, s = np.cos(poses[:, 2]), np.sin(poses[:, 2])
+        local = np.array(self.local_rects)  # (2, 4, 2)
+        x = poses[:, None, None, 0] + c[:, None, None] * local[..., 0] - s[:, None, None] * local[..., 1]
+        y = poses[:, None, None, 1] + s[:, None, None] * local[..., 0] + c[:, None, None] * local[..., 1]
+        return np.stack([x, y], axis=-1)
+
+    def coverage_batch(self, poses):
+        """Coverage for an array of block poses (N, 3), as an array (N,).
+
+        The boundary of the intersection of two convex polygons consists of the parts of the edges of each
+        polygon that lie inside the other one, so its area follows from clipping every edge against the other
+        polygon (Green's theorem). Unlike polygon clipping this keeps fixed array shapes, so all poses are
+        scored at once.
+        """
+        # work relative to the goal position to keep the cross products small
+        offset = np.array(self.goal_pose[:2])
+        block = self.block_rects_batch(poses)[:, :, None] - offset  # (N, 2, 1, 4, 2)
+        block_ends = np.roll(block, -1, axis=-2)
+        goal = self._goal_array[None, None] - offset  # (1, 1, 2, 4, 2)
+        goal_ends = np.roll(goal, -1, axis=-2)
+
+        # for every (block rectangle, goal rectangle) pair: block edges inside the goal rectangle and goal
+        # edges inside the block rectangle. Edges shared by both polygons are only counted on the goal side.
+        lo, hi = _clip_segments(block, block_ends, goal, goal_ends, self.orientation, closed=False)
+        total = _boundary_integral(block, block_ends, lo, hi).sum(axis=(1, 2, 3))
+        lo, hi = _clip_segments(goal, goal_ends, block, block_ends, self.orientation, closed=True)
+        total += _boundary_integral(goal, goal_ends, lo, hi).sum(axis=(1, 2, 3))
+        return np.maximum(self.orientation * total / 2, 0.0) / self.area
+
+    def coverage_goals(self, poses, goal_poses):
+        """Coverage of each of the goal poses (G, 3) by each of the block poses (N, 3), as an array (N, G).
+
+        Coverage only depends on the pose of the block relative to the goal, so the poses are moved along with
+        each goal onto the goal of this engine and scored with `coverage_batch`, one call per goal.
+        """
+        poses = np.asarray(poses, dtype=np.float64).reshape(-1, 3)
+        goal_poses = np.asarray(goal_poses, dtype=np.float64).reshape(-1, 3)
+        x, y, angle = self.goal_pose
+        coverage = np.empty((len(poses), len(goal_poses)))
+        for k, (gx, gy, goal_angle) in enumerate(goal_poses):
+            # the pose in the frame of the goal, then placed in the frame of this engine's goal
+            c, s = math.cos(angle - goal_angle), math.sin(angle - goal_angle)
+            dx, dy = poses[:, 0] - gx, poses[:, 1] - gy
+            moved = np.column_stack(
+                [x + c * dx - s * dy, y + s * dx + c * dy, poses[:, 2] + (angle - goal_angle)]
+            )
+            coverage[:, k] = self.coverage_batch(moved)
+        return coverage
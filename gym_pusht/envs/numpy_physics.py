@@ -0,0 +1,301 @@
+"""PushT physics for many worlds at once, in NumPy array operations.
+
+`NumpyPhysics` reimplements the part of chipmunk PushT relies on, with every quantity an array over worlds.
+The agent is a kinematic circle and the block a T of two rectangles. The walls are four rounded segments,
+which the block never gets past, so they are treated as half-planes. All shapes have zero friction and
+elasticity, and the space has no gravity and zero damping, so the block loses its velocity at the start of
+every substep and only moves through contact impulses.
+
+Each substep follows `cpSpaceStep`:
+
+1. integrate positions with the velocities and bias velocities of the last substep;
+2. find the contacts;
+3. reset the block velocity (zero damping);
+4. warm start with the impulses the same contacts accumulated in the last substep;
+5. run the sequential impulse solver: per contact, a bias impulse that resolves penetration beyond the
+   collision slop, then a non-negative normal impulse that stops the approach.
+
+Contacts are found in closed form: circle against rectangle for the agent, and penetrating rectangle corners
+for the walls. Contacts are matched across substeps by their slot (the pair of shapes, and the corner for walls)
+rather than by chipmunk's contact hashes, and solved in a fixed order. Trajectories therefore follow pymunk
+closely but not exactly; `benchmarks/backend_report.py` measures how closely.
+"""
+
+import numpy as np
+import pymunk
+
+from .coverage import tee_rectangles
+from .pusht import _WALLS, FIDELITY_PROFILES, _matched_pd_map
+
+# contact slots of a world: the agent against each rectangle, then each corner of the rectangles
+_AGENT_SLOTS = 2
+_SLOTS = _AGENT_SLOTS + 8
+# outward normals of the faces of an axis-aligned rectangle: -x, -y, +x, +y
+_FACE_NORMALS = np.array([[-1.0, 0.0], [0.0, -1.0], [1.0, 0.0], [0.0, 1.0]])
+# the columns of `NumpyPhysics.get_state`: attribute and width (0 for arrays (N,)), then the last time step
+_STATE_FIELDS = (
+    ("agent_position", 2),
+    ("agent_velocity", 2),
+    ("block_cog", 2),
+    ("block_angle", 0),
+    ("block_velocity", 2),
+    ("block_angular_velocity", 0),
+    ("_bias_velocity", 2),
+    ("_bias_angular_velocity", 0),
+    ("_impulses", _SLOTS),
+    ("_walls", _SLOTS),
+)
+
+
+def _wall_planes():
+    """Inward normals and offsets of the wall surfaces: a point p is inside where p . normal >= offset."""
+    center = np.mean([end for wall in _WALLS for end in wall], axis=0)
+    normals, offsets = [], []
+    for a, b in _WALLS:
+        a, b = np.array(a, dtype=np.float64), np.array(b, dtype=np.float64)
+        normal = np.array([a[1] - b[1], b[0] - a[0]]) / np.hypot(*(b - a))
+        if np.dot(center - a, normal) < 0:
+            normal = -normal
+        normals.append(normal)
+        offsets.append(np.dot(a, normal) + 2)  # the radius of the wall segments
+    return np.array(normals), np.array(offsets)
+
+
+class NumpyPhysics:
+    """The physics of `num_worlds` PushT worlds, with the substeps, solver iterations and PD control of
+    `PushTEnv._step_physics` under the fidelity profile `fidelity`.
+
+    Positions are those of the centers of gravity: `agent_position` (N, 2) and `block_cog` (N, 2), with
+    `block_angle` (N,). `block_position()` returns the block origins, i.e. `body.position` in pymunk.
+    """
+
+    agent_radius = 15
+    state_size = sum(max(width, 1) for _, width in _STATE_FIELDS) + 1
+
+    def __init__(self, num_worlds, fidelity="reference", k_p=100, k_v=20, control_hz=10):
+        self.num_worlds = num_worlds
+        profile = FIDELITY_PROFILES[fidelity]
+        self.substeps = profile["substeps"]
+        self.dt = 1 / (control_hz * self.substeps)
+        self.iterations = profile["iterations"]
+        self.pd_update = profile["pd_update"]
+        self.k_p, self.k_v = k_p, k_v
+        if self.pd_update == "matched":
+            self._pd_map = _matched_pd_map(k_p, k_v, control_hz, self.substeps)
+
+        # the contact parameters of a default pymunk space
+        space = pymunk.Space()
+        self.collision_bias = space.collision_bias
+        self.collision_slop = space.collision_slop
+
+        # the block of `PushTEnv.add_tee`: mass 1, and twice the moment of the first rectangle
+        rectangles = [np.array(vertices, dtype=np.float64) for vertices in tee_rectangles()]
+        self.block_mass = 1.0
+        self.block_moment = 2 * pymunk.moment_for_poly(1, tee_rectangles()[0])
+        self.block_cog_local = np.mean([rectangle.mean(axis=0) for rectangle in rectangles], axis=0)
+        # the geometry relative to the center of gravity
+        rectangles = [rectangle - self.block_cog_local for rectangle in rectangles]
+        self._rect_bounds = [(rectangle.min(axis=0), rectangle.max(axis=0)) for rectangle in rectangles]
+        self._corners_local = np.concatenate(rectangles)  # (8, 2)
+        self._reach = np.hypot(self._corners_local[:, 0], self._corners_local[:, 1]).max()
+        self._wall_normals, self._wall_offsets = _wall_planes()
+
+        n = num_worlds
+        self.agent_position = np.zeros((n, 2))
+        self.agent_velocity = np.zeros((n, 2))
+        self.block_cog = np.zeros((n, 2))
+        self.block_angle = np.zeros(n)
+        self.block_velocity = np.zeros((n, 2))
+        self.block_angular_velocity = np.zeros(n)
+        self._bias_velocity = np.zeros((n, 2))
+        self._bias_angular_velocity = np.zeros(n)
+        self._impulses = np.zeros((n, _SLOTS))
+        self._walls = np.full((n, _SLOTS), -1)
+        self._previous_dt = 0.0
+
+    def reset(self, states):
+        """Set the states (N, 5) like `PushTEnv._set_state`, including its physics step."""
+        states = np.asarray(states, dtype=np.float64).reshape(self.num_worlds, 5)
+        self.agent_position[:] = states[:, :2]
+        self.agent_velocity[:] = 0
+        # `block.position` is set while the angle is still 0, then `block.angle` rotates about the center of
+        # gravity
+        self.block_cog[:] = states[:, 2:4] + self.block_cog_local
+        self.block_angle[:] = states[:, 4]
+        for array in (self.block_velocity, self.block_angular_velocity):
+            array[...] = 0
+        for array in (self._bias_velocity, self._bias_angular_velocity):
+            array[...] = 0
+        self._impulses[:] = 0
+        self._previous_dt = 0.0
+        self._substep(self.dt)
+
+    def block_position(self):
+        c, s = np.cos(self.block_angle), np.sin(self.block_angle)
+        cx, cy = self.block_cog_local
+        return self.block_cog - np.column_stack([c * cx - s * cy, s * cx + c * cy])
+
+    def get_state(self):
+        """The full state of every world as an array (N, `state_size`), contacts and bias velocities included."""
+        columns = [getattr(self, name) for name, _ in _STATE_FIELDS]
+        return np.column_stack([*columns, np.full(self.num_worlds, self._previous_dt)])
+
+    def set_state(self, states):
+        """Restore states (N, `state_size`) returned by `get_state`."""
+        states = np.asarray(states, dtype=np.float64).reshape(self.num_worlds, self.state_size)
+        i = 0
+        for name, width in _STATE_FIELDS:
+            dtype = getattr(self, name).dtype
+            setattr(self, name, states[:, i].copy() if width == 0 else states[:, i : i + width].astype(dtype))
+            i += max(width, 1)
+        self._previous_dt = states[0, i]
+
+    def step(self, actions):
+        """Run one control step of all worlds towards the targets `actions` (N, 2)."""
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_worlds, 2)
+        for _ in range(self.substeps):
+            if self.pd_update == "matched":
+                (ee, ev), (ve, vv) = self._pd_map
+                error = self.agent_position - actions
+                velocity = self.agent_velocity
+                self.agent_velocity = ((ee - 1) * error + ev * velocity) / self.dt
+                self._substep(self.dt)
+                self.agent_velocity = ve * error + vv * velocity
+                continue
+
+            acceleration = self.k_p * (actions - self.agent_position) + self.k_v * (0 - self.agent_velocity)
+            self.agent_velocity = self.agent_velocity + acceleration * self.dt
+            self._substep(self.dt)
+
+    def _contacts(self):
+        """The contacts of all worlds, as arrays (N, `_SLOTS`): x and y of the normal, which points into the
+        block, x and y of the contact point on the block relative to its center of gravity, the distance (negative
+        when penetrating), and which walls the corners touch (-1 for agent slots).
+
+        Only the worlds where the agent or a wall comes within reach of the block are looked at closely.
+        """
+        n = self.num_worlds
+        normal_x, normal_y = np.zeros((n, _SLOTS)), np.zeros((n, _SLOTS))
+        r_x, r_y = np.zeros((n, _SLOTS)), np.zeros((n, _SLOTS))
+        distance = np.full((n, _SLOTS), np.inf)
+        walls = np.full((n, _SLOTS), -1)
+
+        # the agent against each rectangle, in the frame of the block centered on its center of gravity
+        gap = self.agent_position - self.block_cog
+        near = np.nonzero(np.hypot(gap[:, 0], gap[:, 1]) < self.agent_radius + self._reach)[0]
+        if len(near):
+            c, s = np.cos(self.block_angle[near]), np.sin(self.block_angle[near])
+            dx, dy = gap[near, 0], gap[near, 1]
+            local_x, local_y = c * dx + s * dy, -s * dx + c * dy
+            for slot, (lo, hi) in enumerate(self._rect_bounds):
+                closest_x, closest_y = np.clip(local_x, lo[0], hi[0]), np.clip(local_y, lo[1], hi[1])
+                offset_x, offset_y = closest_x - local_x, closest_y - local_y
+                length = np.hypot(offset_x, offset_y)
+                outside = length > 0
+                safe = np.where(outside, length, 1)
+                nx, ny = offset_x / safe, offset_y / safe
+                if not outside.all():
+                    # the center is inside: push it out through the nearest face
+                    faces = np.stack(
+                        [local_x - lo[0], local_y - lo[1], hi[0] - local_x, hi[1] - local_y], axis=1
+                    )
+                    face = np.argmin(faces, axis=1)
+                    depth = np.take_along_axis(faces, face[:, None], axis=1)[:, 0]
+                    outward_x, outward_y = _FACE_NORMALS[face].T
+                    nx, ny = np.where(outside, nx, -outward_x), np.where(outside, ny, -outward_y)
+                    closest_x = np.where(outside, closest_x, local_x + outward_x * depth)
+                    closest_y = np.where(outside, closest_y, local_y + outward_y * depth)
+                    length = np.where(outside, length, -depth)
+                normal_x[near, slot], normal_y[near, slot] = c * nx - s * ny, s * nx + c * ny
+                r_x[near, slot], r_y[near, slot] = (
+                    c * closest_x - s * closest_y,
+                    s * closest_x + c * closest_y,
+                )
+                distance[near, slot] = length - self.agent_radius
+
+        # the corners of the rectangles against the wall they penetrate the most
+        clearance = self.block_cog @ self._wall_normals.T - self._wall_offsets
+        near = np.nonzero(clearance.min(axis=1) < self._reach)[0]
+        if len(near):
+            c, s = np.cos(self.block_angle[near])[:, None], np.sin(self.block_angle[near])[:, None]
+            cx, cy = self._corners_local.T
+            corner_x, corner_y = c * cx - s * cy, s * cx + c * cy
+            depths = (
+                clearance[near, None, :]
+                + corner_x[..., None] * self._wall_normals[:, 0]
+                + corner_y[..., None] * self._wall_normals[:, 1]
+            )  # (worlds, corners, walls)
+            wall = np.argmin(depths, axis=2)
+            corners = np.ix_(near, range(_AGENT_SLOTS, _SLOTS))
+            distance[corners] = np.take_along_axis(depths, wall[..., None], axis=2)[..., 0]
+            normal_x[corners], normal_y[corners] = self._wall_normals[wall, 0], self._wall_normals[wall, 1]
+            r_x[corners], r_y[corners] = corner_x, corner_y
+            walls[corners] = wall
+        return normal_x, normal_y, r_x, r_y, distance, walls
+
+    def _substep(self, dt):
+        # integrate positions; the agent is kinematic and never gets a bias velocity
+        self.agent_position = self.agent_position + self.agent_velocity * dt
+        self.block_cog = self.block_cog + (self.block_velocity + self._bias_velocity) * dt
+        self.block_angle = self.block_angle + (self.block_angular_velocity + self._bias_angular_velocity) * dt
+
+        normal_x, normal_y, r_x, r_y, distance, walls = self._contacts()
+        active = distance < 0
+        bias_coef = 1 - self.collision_bias**dt
+        dt_coef = 0.0 if self._previous_dt == 0 else dt / self._previous_dt
+        self._previous_dt = dt
+        # warm start contacts that already touched the same shape in the last substep
+        impulses = np.where(active & (walls == self._walls), self._impulses * dt_coef, 0)
+        self._walls = walls
+
+        # zero damping: the block keeps no velocity from the last substep
+        velocity = np.zeros((self.num_worlds, 3))  # vx, vy, w
+        bias_velocity = np.zeros((self.num_worlds, 3))
+        # only solve the worlds with contacts, with slots in rows for contiguous access
+        worlds = np.nonzero(active.any(axis=1))[0]
+        slots = np.nonzero(active[worlds].any(axis=0))[0]
+        if len(worlds):
+            select = np.ix_(slots, worlds)
+            nx, ny = normal_x.T[select], normal_y.T[select]
+            rn = (r_x * normal_y - r_y * normal_x).T[select]
+            m_inv, i_inv = 1 / self.block_mass, 1 / self.block_moment
+            # inactive contacts get no mass, so that they never take an impulse
+            mass = np.where(active.T[select], 1 / (m_inv + i_inv * rn * rn), 0)
+            bias = -bias_coef * np.minimum(0, distance.T[select] + self.collision_slop) / dt
+            # the normal velocity of the other body: the agent for the agent slots, a static wall for the corners
+            other = np.zeros_like(nx)
+            agent_rows = slots < _AGENT_SLOTS
+            agent_velocity = self.agent_velocity[worlds]
+            other[agent_rows] = nx[agent_rows] * agent_velocity[:, 0] + ny[agent_rows] * agent_velocity[:, 1]
+            # the change of (vx, vy, w) per unit impulse
+            dvx, dvy, dw = nx * m_inv, ny * m_inv, rn * i_inv
+
+            impulse = impulses.T[select]
+            vx, vy, w = (dvx * impulse).sum(axis=0), (dvy * impulse).sum(axis=0), (dw * impulse).sum(axis=0)
+            bias_impulse = np.zeros_like(impulse)
+            bias_vx, bias_vy, bias_w = np.zeros_like(vx), np.zeros_like(vx), np.zeros_like(vx)
+            for _ in range(self.iterations):
+                for k in range(len(slots)):
+                    # the bias impulse, then the normal impulse, as in `cpArbiterApplyImpulse`
+                    vbn = nx[k] * bias_vx + ny[k] * bias_vy + rn[k] * bias_w
+                    accumulated = np.maximum(bias_impulse[k] + (bias[k] - vbn) * mass[k], 0)
+                    delta = accumulated - bias_impulse[k]
+                    bias_impulse[k] = accumulated
+                    bias_vx += dvx[k] * delta
+                    bias_vy += dvy[k] * delta
+                    bias_w += dw[k] * delta
+
+                    vrn = nx[k] * vx + ny[k] * vy + rn[k] * w - other[k]
+                    accumulated = np.maximum(impulse[k] - vrn * mass[k], 0)
+                    delta = accumulated - impulse[k]
+                    impulse[k] = accumulated
+                    vx += dvx[k] * delta
+                    vy += dvy[k] * delta
+                    w += dw[k] * delta
+            impulses.T[select] = impulse
+            velocity[worlds] = np.column_stack([vx, vy, w])
+            bias_velocity[worlds] = np.column_stack([bias_vx, bias_vy, bias_w])
+
+        self._impulses = impulses
+        self.block_velocity, self.block_angular_velocity = velocity[:, :2], velocity[:, 2]
+        self._bias_velocity, self._bias_angular_velocity = bias_velocity[:, :2], bias_velocity[:, 2]
@@ -1,30 +1,150 @@
 import collections
+import copy
+import functools
+import math
 import os
 import warnings
 
-import cv2
 import gymnasium as gym
 import numpy as np
-
-with warnings.catch_warnings():
-    # Filter out DeprecationWarnings raised from pkg_resources
-    warnings.filterwarnings("ignore", "pkg_resources is deprecated as an API", category=DeprecationWarning)
-    import pygame
-
 import pymunk
-import pymunk.pygame_util
-import shapely.geometry as sg
 from gymnasium import spaces
+from pymunk._chipmunk_cffi import ffi
+from pymunk._chipmunk_cffi import lib as cp
 from pymunk.vec2d import Vec2d
 
-from .pymunk_override import DrawOptions
+from .coverage import TeeCoverage, tee_rectangles
+
+# pygame, cv2 and shapely are only imported where they are used, so that headless environments never load them
 
+RENDERERS = ["cv2", "pygame"]
+BACKENDS = ["pymunk", "numpy"]
+DEFAULT_GOAL_POSE = (256, 256, np.pi / 4)  # x, y, theta of the goal T
 RENDER_MODES = ["rgb_array"]
 if os.environ.get("MUJOCO_GL") != "egl":
     RENDER_MODES.append("human")
 
+# Offsets, in doubles, of the cpBody fields kept in simulation states. pymunk only exposes the position of
+# the body origin (from which the center of gravity `p` is recomputed with rounding) and not the solver's
+# bias velocities. Only `get_sim_state` and `set_sim_state` use them, and only if `_body_layout_supported()`.
+_BODY_P, _BODY_A, _BODY_V, _BODY_W, _BODY_V_BIAS, _BODY_W_BIAS = 8, 14, 10, 15, 24, 26
+_BODY_T = 21  # translation of the body transform, i.e. `body.position`
+_BODY_FIELDS = 9  # p (2), angle, v (2), w, v_bias (2), w_bias
+_ARBITER_FIELDS = 5  # shapes (2), age in physics steps, state, contact count
+_CONTACT_FIELDS = 4  # hash (2 x 32 bits), accumulated normal and tangent impulses
+
+# distance, in pixels, by which the agent has to stay clear of the block's bounding boxes to skip physics
+_FAST_FORWARD_MARGIN = 1.0
+
+# end points of the wall segments, in the order they are added to the space
+_WALLS = [((5, 506), (5, 5)), ((5, 5), (506, 5)), ((506, 5), (506, 506)), ((5, 506), (506, 506))]
+
+# Physics fidelity profiles: physics substeps per control step (dt = 1 / (control_hz * substeps)), pymunk
+# solver iterations and the PD update of the agent velocity. "explicit" is the Euler update of the original
+# environment. "matched" moves the agent over each substep exactly as that many substeps of `reference` would:
+# the agent is a kinematic body, so its trajectory does not depend on contacts and only the block dynamics are
+# coarsened.
+FIDELITY_PROFILES = {
+    "reference": {"substeps": 10, "iterations": 10, "pd_update": "explicit"},
+    "fast": {"substeps": 5, "iterations": 5, "pd_update": "matched"},
+    "coarse": {"substeps": 2, "iterations": 4, "pd_update": "matched"},
+}
+
+
+def _matched_pd_map(k_p, k_v, control_hz, substeps):
+    """Linear map of (position - action, velocity) of the agent over one substep, per axis.
+
+    It is the product of the maps of the `reference` substeps the substep spans: the explicit PD update
+    v' = v + h * (-k_p * e - k_v * v) followed by the position update e' = e + h * v'.
+    """
+    reference_substeps = FIDELITY_PROFILES["reference"]["substeps"]
+    if reference_substeps % substeps:
+        raise ValueError(f"The matched PD update needs a divisor of {reference_substeps} substeps")
+    h = 1 / (control_hz * reference_substeps)
+    step = np.array([[1 - h * h * k_p, h * (1 - h * k_v)], [-h * k_p, 1 - h * k_v]])
+    return np.linalg.matrix_power(step, reference_substeps // substeps).tolist()
+
+
+@functools.cache
+def _body_layout_supported():
+    """Whether the cpBody fields of the installed pymunk sit at the offsets above."""
+    body = pymunk.Body(2, 3)
+    body.position = 5, 6
+    body.angle = 7
+    body.velocity = 8, 9
+    body.angular_velocity = 10
+    raw = ffi.cast("double *", body._body)
+    offsets = (2, 4, _BODY_P, _BODY_P + 1, _BODY_A, _BODY_V, _BODY_V + 1, _BODY_W, _BODY_T, _BODY_T + 1)
+    if [raw[i] for i in offsets] != [2, 3, 5, 6, 7, 8, 9, 10, 5, 6]:
+        return False
+
+    # The solver leaves bias velocities that push overlapping shapes apart, and the position update at the start
+    # of the next step consumes them. Step a box that overlaps a wall twice, and check that the second position
+    # update moves it by (v + v_bias) * dt and turns it by (w + w_bias) * dt, clearing them.
+    space = pymunk.Space()
+    box = pymunk.Body(1, 10)
+    box.position = 0, 1.5
+    box.angular_velocity = 1
+    space.add(
+        pymunk.Segment(space.static_body, (-100, 0), (100, 0), 1), box, pymunk.Poly.create_box(box, (2, 2))
+    )
+    seen = []
+
+    def update_position(body, dt):
+        raw = ffi.cast("double *", body._body)
+        fields = [
+            raw[i] for i in (_BODY_V, _BODY_V + 1, _BODY_W, _BODY_V_BIAS, _BODY_V_BIAS + 1, _BODY_W_BIAS)
+        ]
+        start = (*body.position, body.angle)
+        pymunk.Body.update_position(body, dt)
+        seen.append(
+            (dt, fields, start, (*body.position, body.angle), raw[_BODY_V_BIAS + 1], raw[_BODY_W_BIAS])
+        )
+
+    box.position_func = update_position
+    space.step(0.01)
+    space.step(0.01)
+    (dt, (vx, vy, w, bias_x, bias_y, bias_w), start, end, *cleared) = seen[1]
+    moved = (end[0] - start[0], end[1] - start[1], end[2] - start[2])
+    expected = ((vx + bias_x) * dt, (vy + bias_y) * dt, (w + bias_w) * dt)
+    return (
+        bias_y > 0
+        and cleared == [0, 0]
+        and all(math.isclose(m, e, rel_tol=1e-9, abs_tol=1e-12) for m, e in zip(moved, expected, strict=True))
+    )
+
+
+def _transform_keypoints(local_vertices, angle, position):
+    """World keypoints as a flat list [x0, y0, x1, y1, ...] from local vertices given as a list of (x, y).
+
+    Uses the same operations as `Vec2d.rotated` followed by a translation, so the results are bit-identical;
+    plain floats beat NumPy on eight vertices.
+    """
+    cos, sin = math.cos(angle), math.sin(angle)
+    px, py = position
+    return [v for x, y in local_vertices for v in (x * cos - y * sin + px, x * sin + y * cos + py)]
+
+
+def _import_pygame():
+    with warnings.catch_warnings():
+        # Filter out DeprecationWarnings raised from pkg_resources
+        warnings.filterwarnings(
+            "ignore", "pkg_resources is deprecated as an API", category=DeprecationWarning
+        )
+        import pygame
+    return pygame
+
+
+def _shape_color(shape):
+    """The pygame color of `shape`, resolved from its `color_name` when it is first drawn."""
+    if not hasattr(shape, "color"):
+        shape.color = _import_pygame().Color(shape.color_name)
+    return shape.color
+
 
 def pymunk_to_shapely(body, shapes):
+    import shapely.geometry as sg
+
     geoms = []
     for shape in shapes:
         if isinstance(shape, pymunk.shapes.Poly):
@@ -93,6 +213,12 @@ class PushTEnv(gym.Env):
     * `obs_type`: (str) The observation type. Can be either `state`, `keypoints`, `pixels` or `pixels_agent_pos`.
       Default is `state`.
 
+    * `render_mode`: (str) The rendering mode. Can be either `human`, `rgb_array` or `None`. With `None` the
+      environment is headless: `render()` returns nothing, pixel observations are drawn with the `cv2`
+      rasterizer, and pygame, cv2 and shapely are only imported when something is drawn, so that `state`
+      environments never import them. Shapes carry a `color_name` that is only turned into a pygame color when
+      they are first drawn. Default is `rgb_array`.
+
     * `block_cog`: (tuple) The center of gravity of the block if different from the center of mass. Default is `None`.
 
     * `damping`: (float) The damping factor of the environment if different from 0. Default is `None`.
@@ -105,6 +231,81 @@ class PushTEnv(gym.Env):
 
     * `visualization_height`: (int) The height of the visualized image. Default is `680`.
 
+    * `coverage_interval`: (int) Compute the coverage (and hence the reward) every `coverage_interval` steps.
+      `None` computes it only on demand via `refresh_reward()`. Steps in between return the last computed reward
+      with `info["coverage_fresh"] = False`. Termination stays exact: the coverage is always computed when the
+      block is close enough to the goal for success to be possible. Default is `1` (every step).
+
+    * `fast_reset`: (bool) Reuse the physics space, bodies and shapes across resets, only restoring their state,
+      instead of rebuilding them. Trajectories are identical either way. Default is `True`.
+
+    * `fidelity`: (str) The physics fidelity profile, one of `FIDELITY_PROFILES`: `reference` (the original
+      simulation), `fast` or `coarse`. Cheaper profiles take fewer and longer physics substeps per action with
+      fewer solver iterations; `benchmarks/fidelity_report.py` measures how far they diverge from `reference`.
+      Default is `reference`.
+
+    * `fast_forward`: (bool) While the block is at rest and the agent cannot reach it, move the agent without
+      running the physics engine, and count the skipped substeps in `info["skipped_substeps"]` (since the last
+      reset). The agent moves exactly as with the engine, but skipped substeps do not update the broadphase, so
+      the solver may later process simultaneous contacts in a different order, which changes results by rounding
+      (see "Simulation States"). Default is `False`.
+
+    * `contact_stats`: (bool) Count the contact points of the block with the agent and the walls at the end of
+      every step in `info["n_contacts"]`. Without it the physics engine never calls back into Python and the info
+      has no `n_contacts`. Default is `False`.
+
+    * `info_level`: (str) What `reset` and `step` put in the info dict: `full` (everything described here),
+      `minimal` (only the scalars `is_success`, `coverage`, `coverage_fresh` and `skipped_substeps`) or `none`
+      (an empty dict). Default is `full`.
+
+    * `reuse_obs`: (bool) Write `state`, `environment_state_agent_pos` and `pixels` observations into arrays
+      allocated once, which every `reset` and `step` returns again; copy them to keep them. Default is `False`.
+
+    * `renderer`: (str) How `rgb_array` images are drawn: `cv2` rasterizes the scene directly at the image
+      resolution, `pygame` draws it on a 512x512 pygame surface that is then resized (the original look, about
+      an order of magnitude slower for observations). Both draw the same scene with anti-aliased edges, so
+      images differ only slightly along edges. The `human` window is always drawn with pygame. Default is `pygame`.
+
+    * `backend`: (str) The physics engine, one of `BACKENDS`: `pymunk`, or `numpy` (`NumpyPhysics`, which
+      simulates many worlds at once in NumPy array operations and pays off in `PushTBatchEnv`; a single
+      environment runs slower on it than on pymunk). The `numpy` backend follows pymunk closely but not exactly,
+      as the two solve simultaneous contacts in different orders; `benchmarks/backend_report.py` measures the
+      divergence. It supports neither `block_cog`, `damping`, `fast_forward` nor `contact_stats`. Default is
+      `pymunk`.
+
+    * `goal_pose`: (tuple) The pose (x, y, theta) of the goal T, in pixels and radians. `set_goal(goal_pose)`
+      moves it later on. Default is `(256, 256, pi / 4)`.
+
+    ## Simulation States
+
+    `get_sim_state()` returns the full simulation state as a flat float64 array: positions, angles and velocities
+    (including the solver's bias velocities) of agent and block, the contacts chipmunk keeps for warm starting
+    with their accumulated impulses, the last action and the step counters. It is cheap to copy, pickle or hash
+    (`state.tobytes()`). `set_sim_state(state)` restores it into any environment built with the same arguments,
+    and `fork()` returns an independent copy of the environment. Wrappers keep their own state: after restoring
+    into a `TimeLimit`-wrapped environment, set its `_elapsed_steps` to the restored `_n_steps`.
+
+    > [!NOTE]
+    > The broadphase keeps per-pair collision hints that cannot be read or written, so `set_sim_state` starts
+    > from fresh ones. Restoring a state is deterministic (every restore of the same state, in any environment,
+    > continues identically), but after contacts the continuation can differ by rounding, which the dynamics
+    > may amplify, from the run that produced the state without being interrupted.
+
+    With the `numpy` backend the state holds the arrays of `NumpyPhysics.get_state()` instead of the bodies and
+    contacts of chipmunk, followed by the same fields, and a restored state continues exactly like the run that
+    produced it.
+
+    ```python
+    >>> env = PushTEnv()
+    >>> _ = env.reset(seed=0)
+    >>> state = env.get_sim_state()
+    >>> obs, *_ = env.step([100, 100])
+    >>> env.set_sim_state(state)
+    >>> replayed, *_ = env.step([100, 100])
+    >>> bool((obs == replayed).all())
+    True
+    ```
+
     ## Reset Arguments
 
     Passing the option `options["reset_to_state"]` will reset the environment to a specific state.
@@ -144,6 +345,16 @@ class PushTEnv(gym.Env):
         observation_height=96,
         visualization_width=680,
         visualization_height=680,
+        coverage_interval=1,
+        fast_reset=True,
+        fidelity="reference",
+        fast_forward=False,
+        contact_stats=False,
+        info_level="full",
+        reuse_obs=False,
+        renderer="pygame",
+        backend="pymunk",
+        goal_pose=None,
     ):
         super().__init__()
         # Observations
@@ -155,6 +366,11 @@ class PushTEnv(gym.Env):
         self.observation_height = observation_height
         self.visualization_width = visualization_width
         self.visualization_height = visualization_height
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer {renderer}. Must be one of {RENDERERS}")
+        self.renderer = renderer
+        # one rasterizer per image size, holding the static part of the scene (see `_rasterizer`)
+        self._rasterizers = {}
 
         # Initialize spaces
         self._initialize_observation_space()
@@ -163,9 +379,48 @@ class PushTEnv(gym.Env):
         # Physics
         self.k_p, self.k_v = 100, 20  # PD control.z
         self.control_hz = self.metadata["render_fps"]
-        self.dt = 0.01
+        if fidelity not in FIDELITY_PROFILES:
+            raise ValueError(f"Unknown fidelity {fidelity}. Must be one of {list(FIDELITY_PROFILES)}")
+        self.fidelity = fidelity
+        profile = FIDELITY_PROFILES[fidelity]
+        self.substeps = profile["substeps"]
+        self.dt = 1 / (self.control_hz * self.substeps)
+        self.solver_iterations = profile["iterations"]
+        self.pd_update = profile["pd_update"]
+        if self.pd_update == "matched":
+            self._pd_map = _matched_pd_map(self.k_p, self.k_v, self.control_hz, self.substeps)
         self.block_cog = block_cog
         self.damping = damping
+        self.fast_reset = fast_reset
+        self.fast_forward = fast_forward
+        self.contact_stats = contact_stats
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}. Must be one of {BACKENDS}")
+        self.backend = backend
+        self._physics = None
+        if backend == "numpy":
+            options = {
+                "block_cog": block_cog is not None,
+                "damping": damping is not None,
+                "fast_forward": fast_forward,
+                "contact_stats": contact_stats,
+            }
+            unsupported = [name for name, used in options.items() if used]
+            if unsupported:
+                raise ValueError(f"The numpy backend does not support {', '.join(unsupported)}")
+            from .numpy_physics import NumpyPhysics
+
+            self._physics = NumpyPhysics(1, fidelity, self.k_p, self.k_v, self.control_hz)
+        if info_level not in ("none", "minimal", "full"):
+            raise ValueError(f"Unknown info_level {info_level}. Must be one of [none, minimal, full]")
+        self.info_level = info_level
+        self.reuse_obs = reuse_obs
+        self._obs_buffers = {
+            "state": np.empty(5),
+            "environment_state_agent_pos": {"environment_state": np.empty(16), "agent_pos": np.empty(2)},
+        }
+        self.n_skipped_substeps = 0
+        self.space = None
 
         # If human-rendering is used, `self.window` will be a reference
         # to the window that we draw to. `self.clock` will be a clock that is used
@@ -179,6 +434,9 @@ class PushTEnv(gym.Env):
         self._last_action = None
 
         self.success_threshold = 0.95  # 95% coverage
+        self.coverage_interval = coverage_interval
+        self.goal_pose = np.array(DEFAULT_GOAL_POSE if goal_pose is None else goal_pose, dtype=np.float64)
+        self._tee_coverage = None
 
     def _initialize_observation_space(self):
         if self.obs_type == "state":
@@ -230,20 +488,40 @@ class PushTEnv(gym.Env):
             )
 
     def _get_coverage(self):
-        goal_body = self.get_goal_pose_body(self.goal_pose)
-        goal_geom = pymunk_to_shapely(goal_body, self.block.shapes)
-        block_geom = pymunk_to_shapely(self.block, self.block.shapes)
-        intersection_area = goal_geom.intersection(block_geom).area
-        goal_area = goal_geom.area
-        return intersection_area / goal_area
+        return self._tee_coverage.coverage((*self.block.position, self.block.angle))
 
-    def step(self, action):
+    def _success_possible(self):
+        pose = (*self.block.position, self.block.angle)
+        return self._tee_coverage.success_possible(pose, self.success_threshold)
+
+    def refresh_reward(self):
+        """Compute the coverage of the current state now and return the corresponding reward."""
+        self._coverage = self._get_coverage()
+        self._coverage_fresh = True
+        return np.clip(self._coverage / self.success_threshold, 0.0, 1.0)
+
+    def _step_physics(self, action):
         self.n_contact_points = 0
-        n_steps = int(1 / (self.dt * self.control_hz))
         self._last_action = action
-        for _ in range(n_steps):
+        self._n_steps += 1
+        if self._physics is not None:
+            self._physics.step(action)
+            self._sync_bodies()
+            return
+        first_substep = self._fast_forward(action) if self.fast_forward else 0
+        for _ in range(first_substep, self.substeps):
             # Step PD control
             # self.agent.velocity = self.k_p * (act - self.agent.position)    # P control works too.
+            if self.pd_update == "matched":
+                (ee, ev), (ve, vv) = self._pd_map
+                error = self.agent.position - action
+                velocity = self.agent.velocity
+                # move to where the reference substeps end, then take on their final velocity
+                self.agent.velocity = ((ee - 1) * error + ev * velocity) / self.dt
+                self.space.step(self.dt)
+                self.agent.velocity = ve * error + vv * velocity
+                continue
+
             acceleration = self.k_p * (action - self.agent.position) + self.k_v * (
                 Vec2d(0, 0) - self.agent.velocity
             )
@@ -252,22 +530,141 @@ class PushTEnv(gym.Env):
             # Step physics
             self.space.step(self.dt)
 
+        if self.contact_stats:
+            self.n_contact_points = self._count_contact_points()
+
+    def _fast_forward(self, action):
+        """Advance the agent without the physics engine while it cannot touch the block, which is at rest.
+
+        The agent is kinematic, so the engine only adds the velocity to its position; it runs the same updates
+        as `_step_physics` in plain floats, with the same results. Returns the number of substeps taken, after
+        which real physics has to take over.
+        """
+        velocity = cp.cpBodyGetVelocity(self._block_body)
+        if velocity.x or velocity.y or cp.cpBodyGetAngularVelocity(self._block_body):
+            return 0
+        # Cached contacts (also of the block with the walls) only age in physics steps. Without contacts, the
+        # solver left no bias velocities either: it only sets them to push touching shapes apart.
+        if self.space._get_arbiters() or self._resumed_contacts is not None:
+            return 0
+
+        # the block does not move, so its bounding boxes hold for the whole control step
+        reach = self._agent_radius + _FAST_FORWARD_MARGIN
+        boxes = [shape.cache_bb() for shape in self._block_shapes]
+        ax, ay = float(action[0]), float(action[1])
+        px, py = self.agent.position
+        vx, vy = self.agent.velocity
+        dt = self.dt
+        substep = 0
+        while substep < self.substeps:
+            if self.pd_update == "matched":
+                (ee, ev), (ve, vv) = self._pd_map
+                ex, ey = px - ax, py - ay
+                nx, ny = px + ((ee - 1) * ex + ev * vx) / dt * dt, py + ((ee - 1) * ey + ev * vy) / dt * dt
+                nvx, nvy = ve * ex + vv * vx, ve * ey + vv * vy
+            else:
+                nvx = vx + (self.k_p * (ax - px) + self.k_v * (0 - vx)) * dt
+                nvy = vy + (self.k_p * (ay - py) + self.k_v * (0 - vy)) * dt
+                nx, ny = px + nvx * dt, py + nvy * dt
+            # the agent sweeps the segment between both positions
+            left, right = min(px, nx) - reach, max(px, nx) + reach
+            bottom, top = min(py, ny) - reach, max(py, ny) + reach
+            if any(
+                left <= box.right and box.left <= right and bottom <= box.top and box.bottom <= top
+                for box in boxes
+            ):
+                break
+            px, py, vx, vy = nx, ny, nvx, nvy
+            substep += 1
+
+        if substep:
+            self.agent.position = px, py
+            self.agent.velocity = vx, vy
+            self.n_skipped_substeps += substep
+        return substep
+
+    def step(self, action):
+        self._step_physics(action)
+
         # Compute reward
-        coverage = self._get_coverage()
+        self._coverage_fresh = False
+        if (
+            self.coverage_interval is not None and self._n_steps % self.coverage_interval == 0
+        ) or self._success_possible():
+            self.refresh_reward()
+        coverage = self._coverage
         reward = np.clip(coverage / self.success_threshold, 0.0, 1.0)
         terminated = is_success = coverage > self.success_threshold
 
         observation = self.get_obs()
         info = self._get_info()
-        info["is_success"] = is_success
-        info["coverage"] = coverage
+        if self.info_level != "none":
+            info["is_success"] = is_success
+            info["coverage"] = coverage
+            info["coverage_fresh"] = self._coverage_fresh
+            info["skipped_substeps"] = self.n_skipped_substeps
 
         truncated = False
         return observation, reward, terminated, truncated, info
 
+    def step_sequence(self, actions, max_steps=None, return_poses=False):
+        """Run the control steps of a whole array of actions (N, 2) without building observations.
+
+        Stops after the step that reaches the success threshold, or once `max_steps` steps have been taken since
+        the last reset (the `max_episode_steps` of a `TimeLimit` wrapper, which this method bypasses). The
+        coverage is computed only where termination needs it and after the last step taken.
+
+        Returns `(reward, terminated, truncated, info)` of the last step taken. `info` holds `n_steps` (the number
+        of steps taken), `coverage` and `is_success`, and with `return_poses` also `poses`: the state observation
+        after each step taken, as an array (n_steps, 5).
+        """
+        actions = np.asarray(actions, dtype=np.float64).reshape(-1, 2)
+        n_actions = len(actions)
+        if max_steps is not None:
+            n_actions = min(n_actions, max(max_steps - self._n_steps, 0))
+        poses = np.empty((n_actions, 5)) if return_poses else None
+
+        terminated = False
+        n_taken = 0
+        # python floats keep the PD control arithmetic identical to `step` with list actions
+        for action in actions[:n_actions].tolist():
+            self._step_physics(action)
+            self._coverage_fresh = False
+            if return_poses:
+                poses[n_taken] = (*self.agent.position, *self.block.position, self.block.angle % (2 * np.pi))
+            n_taken += 1
+            if self._success_possible():
+                self.refresh_reward()
+                if self._coverage > self.success_threshold:
+                    terminated = True
+                    break
+        if not self._coverage_fresh:
+            self.refresh_reward()
+
+        coverage = self._coverage
+        reward = np.clip(coverage / self.success_threshold, 0.0, 1.0)
+        truncated = max_steps is not None and self._n_steps >= max_steps
+        info = {
+            "n_steps": n_taken,
+            "coverage": coverage,
+            "is_success": terminated,
+            "skipped_substeps": self.n_skipped_substeps,
+        }
+        if return_poses:
+            info["poses"] = poses[:n_taken]
+        return reward, terminated, truncated, info
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        self._setup()
+        if self.fast_reset and self.space is not None:
+            self._reset_space()
+        else:
+            self._setup()
+        self._last_action = None
+        self._n_steps = 0
+        self.n_skipped_substeps = 0
+        self._coverage = 0.0  # until the first coverage computation
+        self._coverage_fresh = False
 
         if options is not None and options.get("reset_to_state") is not None:
             state = np.array(options.get("reset_to_state"))
@@ -286,7 +683,8 @@ class PushTEnv(gym.Env):
 
         observation = self.get_obs()
         info = self._get_info()
-        info["is_success"] = False
+        if self.info_level != "none":
+            info["is_success"] = False
 
         if self.render_mode == "human":
             self.render()
@@ -294,6 +692,14 @@ class PushTEnv(gym.Env):
         return observation, info
 
     def _draw(self):
+        pygame = _import_pygame()
+        import pymunk.pygame_util
+
+        from .pymunk_override import DrawOptions
+
+        for shape in self._shapes:
+            _shape_color(shape)
+
         # Create a screen
         screen = pygame.Surface((512, 512))
         screen.fill((255, 255, 255))
@@ -311,11 +717,53 @@ class PushTEnv(gym.Env):
         self.space.debug_draw(draw_options)
         return screen
 
+    def _rasterizer(self, width, height):
+        rasterizer = self._rasterizers.get((width, height))
+        if rasterizer is None:
+            from .rasterizer import Rasterizer
+
+            walls = [(shape.a, shape.b, shape.radius, _shape_color(shape)) for shape in self._shapes[:4]]
+            goal_body = self.get_goal_pose_body(self.goal_pose)
+            goal_polygons = [
+                [goal_body.local_to_world(v) for v in shape.get_vertices()] for shape in self._block_shapes
+            ]
+            rasterizer = Rasterizer(
+                width,
+                height,
+                walls,
+                goal_polygons,
+                goal_color=_import_pygame().Color("LightGreen"),
+                agent_color=_shape_color(next(iter(self.agent.shapes))),
+                block_color=_shape_color(self._block_shapes[0]),
+            )
+            self._rasterizers[width, height] = rasterizer
+        return rasterizer
+
+    def _rasterize(self, width, height):
+        block = cp.cpBodyGetPosition(self._block_body)
+        keypoints = _transform_keypoints(
+            self._block_local_vertices, cp.cpBodyGetAngle(self._block_body), (block.x, block.y)
+        )
+        agent = cp.cpBodyGetPosition(self._agent_body)
+        position = (agent.x, agent.y)
+        return self._rasterizer(width, height).draw(position, self._agent_radius, keypoints)
+
     def _get_img(self, screen, width, height, render_action=False):
+        import cv2
+
+        pygame = _import_pygame()
         img = np.transpose(np.array(pygame.surfarray.pixels3d(screen)), axes=(1, 0, 2))
         img = cv2.resize(img, (width, height))
+        if render_action:
+            self._draw_action(img)
+        return img
+
+    def _draw_action(self, img):
+        import cv2
+
+        height, width = img.shape[:2]
         render_size = min(width, height)
-        if render_action and self._last_action is not None:
+        if self._last_action is not None:
             action = np.array(self._last_action)
             coord = (action / 512 * [height, width]).astype(np.int32)
             marker_size = int(8 / 96 * render_size)
@@ -331,6 +779,9 @@ class PushTEnv(gym.Env):
         return img
 
     def render(self):
+        if self.render_mode is None:
+            gym.logger.warn("Calling render without a render_mode: set one when creating the environment.")
+            return None
         return self._render(visualize=True)
 
     def _render(self, visualize=False):
@@ -339,11 +790,21 @@ class PushTEnv(gym.Env):
             if visualize
             else (self.observation_width, self.observation_height)
         )
+        # headless environments still draw pixel observations, with the rasterizer
+        if self.render_mode is None or (self.render_mode == "rgb_array" and self.renderer == "cv2"):
+            img = self._rasterize(width, height)
+            if visualize or not self.reuse_obs:
+                img = img.copy()
+            if visualize:
+                self._draw_action(img)
+            return img
+
         screen = self._draw()  # draw the environment on a screen
 
         if self.render_mode == "rgb_array":
             return self._get_img(screen, width=width, height=height, render_action=visualize)
         elif self.render_mode == "human":
+            pygame = _import_pygame()
             if self.window is None:
                 pygame.init()
                 pygame.display.init()
@@ -362,6 +823,7 @@ class PushTEnv(gym.Env):
 
     def close(self):
         if self.window is not None:
+            pygame = _import_pygame()
             pygame.display.quit()
             pygame.quit()
 
@@ -369,6 +831,9 @@ class PushTEnv(gym.Env):
         teleop_agent = collections.namedtuple("TeleopAgent", ["act"])
 
         def act(obs):
+            pygame = _import_pygame()
+            import pymunk.pygame_util
+
             act = None
             mouse_position = pymunk.pygame_util.from_pygame(Vec2d(*pygame.mouse.get_pos()), self.screen)
             if self.teleop or (mouse_position - self.agent.position).length < 30:
@@ -379,17 +844,26 @@ class PushTEnv(gym.Env):
         return teleop_agent(act)
 
     def get_obs(self):
+        # chipmunk's accessors: the pymunk properties build a Vec2d per access
+        agent = cp.cpBodyGetPosition(self._agent_body)
+        block = cp.cpBodyGetPosition(self._block_body)
         if self.obs_type == "state":
-            agent_position = np.array(self.agent.position)
-            block_position = np.array(self.block.position)
-            block_angle = self.block.angle % (2 * np.pi)
-            return np.concatenate([agent_position, block_position, [block_angle]], dtype=np.float64)
+            state = self._obs_buffers["state"] if self.reuse_obs else np.empty(5)
+            state[0], state[1] = agent.x, agent.y
+            state[2], state[3] = block.x, block.y
+            state[4] = cp.cpBodyGetAngle(self._block_body) % (2 * np.pi)
+            return state
 
         if self.obs_type == "environment_state_agent_pos":
-            return {
-                "environment_state": self.get_keypoints(self._block_shapes).flatten(),
-                "agent_pos": np.array(self.agent.position),
-            }
+            if self.reuse_obs:
+                obs = self._obs_buffers["environment_state_agent_pos"]
+            else:
+                obs = {"environment_state": np.empty(16), "agent_pos": np.empty(2)}
+            angle = cp.cpBodyGetAngle(self._block_body)
+            keypoints = _transform_keypoints(self._block_local_vertices, angle, (block.x, block.y))
+            obs["environment_state"][:] = keypoints
+            obs["agent_pos"][0], obs["agent_pos"][1] = agent.x, agent.y
+            return obs
 
         pixels = self._render()
         if self.obs_type == "pixels":
@@ -412,48 +886,278 @@ class PushTEnv(gym.Env):
         return body
 
     def _get_info(self):
-        n_steps = int(1 / self.dt * self.control_hz)
-        n_contact_points_per_step = int(np.ceil(self.n_contact_points / n_steps))
+        if self.info_level != "full":
+            return {}
         info = {
             "pos_agent": np.array(self.agent.position),
             "vel_agent": np.array(self.agent.velocity),
             "block_pose": np.array(list(self.block.position) + [self.block.angle]),
             "goal_pose": self.goal_pose,
-            "n_contacts": n_contact_points_per_step,
         }
+        if self.contact_stats:
+            info["n_contacts"] = self.n_contact_points
         return info
 
-    def _handle_collision(self, arbiter, space, data):
-        self.n_contact_points += len(arbiter.contact_point_set.points)
+    def _count_contact_points(self):
+        # every contact involves the block: the agent is kinematic and the walls are static
+        counts = []
+        self.block.each_arbiter(lambda arbiter: counts.append(len(arbiter.contact_point_set.points)))
+        return sum(counts)
+
+    def _get_collision_handler(self):
+        # only created to resume restored contacts, so that plain stepping never calls back into Python
+        if self.collision_handeler is None:
+            self.collision_handeler = self.space.add_collision_handler(0, 0)
+            self._default_pre_solve = self.collision_handeler._handler.preSolveFunc
+        return self.collision_handeler
 
     def _setup(self):
         self.space = pymunk.Space()
         self.space.gravity = 0, 0
         self.space.damping = self.damping if self.damping is not None else 0.0
+        self.space.iterations = self.solver_iterations
         self.teleop = False
 
         # Add walls
-        walls = [
-            self.add_segment(self.space, (5, 506), (5, 5), 2),
-            self.add_segment(self.space, (5, 5), (506, 5), 2),
-            self.add_segment(self.space, (506, 5), (506, 506), 2),
-            self.add_segment(self.space, (5, 506), (506, 506), 2),
-        ]
+        walls = [self.add_segment(self.space, a, b, 2) for a, b in _WALLS]
         self.space.add(*walls)
+        self._n_static_shapes = cp.cpSpaceGetShapeIDCounter(self.space._space)
 
         # Add agent, block, and goal zone
         self.agent = self.add_circle(self.space, (256, 400), 15)
+        self._agent_radius = 15
         self.block, self._block_shapes = self.add_tee(self.space, (256, 300), 0)
-        self.goal_pose = np.array([256, 256, np.pi / 4])  # x, y, theta (in radians)
+        self._agent_body, self._block_body = self.agent._body, self.block._body
+        # keypoints in the block frame, in the order of `get_keypoints`
+        self._block_local_vertices = [tuple(v) for shape in self._block_shapes for v in shape.get_vertices()]
+        # arbiters in simulation states refer to shapes by their position in this list
+        self._shapes = [*walls, *self.agent.shapes, *self._block_shapes]
+        self._shape_index = {
+            int(ffi.cast("uintptr_t", shape._shape)): i for i, shape in enumerate(self._shapes)
+        }
         if self.block_cog is not None:
             self.block.center_of_gravity = self.block_cog
+        if self._tee_coverage is None:
+            # the block geometry is fixed, so the goal T is only placed again by `set_goal`
+            self._tee_coverage = TeeCoverage(self.goal_pose)
+
+        # Collision handling (see `_get_collision_handler`)
+        self.collision_handeler = None
+        self._resumed_contacts = None
+        self._restore_timestamp = None
+        self.n_contact_points = 0
 
-        # Add collision handling
-        self.collision_handeler = self.space.add_collision_handler(0, 0)
-        self.collision_handeler.post_solve = self._handle_collision
+    def set_goal(self, goal_pose):
+        """Move the goal T to `goal_pose` (x, y, theta). The reward follows from the next coverage computation."""
+        self.goal_pose = np.array(goal_pose, dtype=np.float64)
+        if self._tee_coverage is not None:
+            self._tee_coverage.set_goal(self.goal_pose)
+        # the goal is part of the static layer of the rasterizers
+        self._rasterizers = {}
+        self._coverage_fresh = False
+
+    def _remove_dynamic(self):
+        # Removing the dynamic shapes drops their cached contacts. Rewinding the shape ids then makes
+        # re-adding them reproduce the broadphase and solver order of a freshly built space. The timestamp is
+        # left alone: chipmunk only compares timestamps, and rewinding it keeps the contact buffers from being
+        # recycled.
+        self.space.remove(self.agent, *self.agent.shapes, self.block, *self._block_shapes)
+        cp.cpSpaceSetShapeIDCounter(self.space._space, self._n_static_shapes)
+        self._restore_timestamp = None
+
+    def _add_dynamic(self):
+        self.space.add(self.agent, *self.agent.shapes)
+        self.space.add(self.block, *self._block_shapes)
+        self._stop_resuming_contacts()
+
+    def _reset_space(self):
+        """Put the space back into the state `_setup` leaves it in, reusing its bodies and shapes."""
+        self._remove_dynamic()
+        cp.cpSpaceSetCurrentTimeStep(self.space._space, 0.0)
+        for body in (self.agent, self.block):
+            body.velocity = 0, 0
+            body.angular_velocity = 0
+            # a zero-length position update clears the solver's bias velocities
+            cp.cpBodyUpdatePosition(body._body, 0.0)
+        self.agent.position = 256, 400
+        self.block.angle = 0
+        self.block.position = 256, 300
+        self._add_dynamic()
+        self.teleop = False
         self.n_contact_points = 0
 
+    def get_sim_state(self):
+        """Return the full simulation state as a flat float64 array (see "Simulation States").
+
+        With the pymunk backend, restoring the state is deterministic but not bit-identical to continuing
+        without the restore: the broadphase hints of chipmunk are not part of it, so after contacts the solver may
+        order them differently and the trajectories differ by rounding. The state reads cpBody fields at fixed
+        offsets through pymunk's private cffi module, where `_body_layout_supported` finds them. Otherwise it
+        takes the bodies from pymunk's properties: the center of gravity then carries the rounding of the body
+        transform and the bias velocities are left out, which a restore clears.
+        """
+        last_action = (np.nan, np.nan) if self._last_action is None else self._last_action
+        counters = [*last_action, self._n_steps, self.n_contact_points, self._coverage, self._coverage_fresh]
+        if self._physics is not None:
+            return np.array(self._physics.get_state()[0].tolist() + counters, dtype=np.float64)
+
+        exact = _body_layout_supported()
+        state = []
+        for body in (self.agent, self.block):
+            if not exact:
+                state += [*body.local_to_world(body.center_of_gravity), body.angle]
+                state += [*body.velocity, body.angular_velocity, 0.0, 0.0, 0.0]
+                continue
+            raw = ffi.cast("double *", body._body)
+            state += [raw[_BODY_P], raw[_BODY_P + 1], raw[_BODY_A]]
+            state += [raw[_BODY_V], raw[_BODY_V + 1], raw[_BODY_W]]
+            state += [raw[_BODY_V_BIAS], raw[_BODY_V_BIAS + 1], raw[_BODY_W_BIAS]]
+        state += counters
+        state.append(cp.cpSpaceGetCurrentTimeStep(self.space._space))
+
+        timestamp = cp.cpSpaceGetTimestamp(self.space._space)
+        if self._restore_timestamp == timestamp:
+            # restored but not stepped since: the contacts only exist in the restored state
+            return np.array(state + self._restored_contacts, dtype=np.float64)
+
+        arbiters = self.space._get_arbiters()
+        state.append(len(arbiters))
+        for arb in arbiters:
+            state += [self._shape_index[int(ffi.cast("uintptr_t", arb.a))]]
+            state += [self._shape_index[int(ffi.cast("uintptr_t", arb.b))]]
+            state += [timestamp - arb.stamp, arb.state, arb.count]
+            for contact in arb.contacts[0 : arb.count]:
+                state += [contact.hash >> 32, contact.hash & 0xFFFFFFFF, contact.jnAcc, contact.jtAcc]
+        return np.array(state, dtype=np.float64)
+
+    def set_sim_state(self, state):
+        """Restore a state returned by `get_sim_state` (see "Simulation States")."""
+        state = np.asarray(state, dtype=np.float64).tolist()
+        if self._physics is not None:
+            i = self._physics.state_size
+            self._physics.set_state(state[:i])
+            self._sync_bodies()
+            self._restore_counters(state[i : i + 6])
+            return
+
+        exact = _body_layout_supported()
+        self._remove_dynamic()
+        for i, body in enumerate((self.agent, self.block)):
+            fields = state[i * _BODY_FIELDS : (i + 1) * _BODY_FIELDS]
+            if not exact:
+                body.angle = fields[2]
+                body.position = Vec2d(*fields[0:2]) - body.center_of_gravity.rotated(fields[2])
+                body.velocity = fields[3:5]
+                body.angular_velocity = fields[5]
+                # a zero-length position update clears the solver's bias velocities
+                cp.cpBodyUpdatePosition(body._body, 0.0)
+                continue
+            raw = ffi.cast("double *", body._body)
+            raw[_BODY_P], raw[_BODY_P + 1] = fields[0:2]
+            raw[_BODY_V], raw[_BODY_V + 1], raw[_BODY_W] = fields[3:6]
+            raw[_BODY_V_BIAS], raw[_BODY_V_BIAS + 1], raw[_BODY_W_BIAS] = fields[6:9]
+            # also recomputes the transform from p and the angle, exactly as a physics step does
+            cp.cpBodySetAngle(body._body, fields[2])
+        self._add_dynamic()
+
+        i = 2 * _BODY_FIELDS
+        self._restore_counters(state[i : i + 6])
+        cp.cpSpaceSetCurrentTimeStep(self.space._space, state[i + 6])
+        i += 7
+
+        # Chipmunk cannot take arbiters back without leaking them, so the cached contacts are handed to the
+        # arbiters it creates when the same shapes collide again (see `_resume_contact`).
+        self._restored_contacts = state[i:]
+        self._restore_timestamp = cp.cpSpaceGetTimestamp(self.space._space)
+        contacts = {}
+        for _ in range(int(state[i])):
+            fields = state[i + 1 : i + 1 + _ARBITER_FIELDS]
+            first, second, age, arbiter_state, count = (int(v) for v in fields)
+            i += _ARBITER_FIELDS
+            impulses = {}
+            for _ in range(count):
+                hash_high, hash_low, jn_acc, jt_acc = state[i + 1 : i + 1 + _CONTACT_FIELDS]
+                impulses[(int(hash_high) << 32) | int(hash_low)] = (jn_acc, jt_acc)
+                i += _CONTACT_FIELDS
+            contacts[frozenset((first, second))] = (age, arbiter_state, impulses)
+        if contacts:
+            self._resumed_contacts = contacts
+            self._get_collision_handler().pre_solve = self._resume_contact
+
+    def _restore_counters(self, fields):
+        last_action = fields[0:2]
+        self._last_action = None if np.isnan(last_action).any() else np.array(last_action)
+        self._n_steps, self.n_contact_points = int(fields[2]), int(fields[3])
+        self._coverage, self._coverage_fresh = fields[4], bool(fields[5])
+
+    def _resume_contact(self, arbiter, space, data):
+        # Replays what cpArbiterUpdate does when it finds a cached arbiter for a colliding pair: the
+        # impulses of contacts with the same hash carry over, and an arbiter that collided in the previous
+        # step stays in the normal state (its cached impulses are applied) while an older one counts as a
+        # first collision.
+        step = cp.cpSpaceGetTimestamp(space._space) - self._restore_timestamp
+        persistence = space.collision_persistence
+        contacts = self._resumed_contacts
+        arb = arbiter._arbiter
+        first = self._shape_index[int(ffi.cast("uintptr_t", arb.a))]
+        second = self._shape_index[int(ffi.cast("uintptr_t", arb.b))]
+        cached = contacts.pop(frozenset((first, second)), None)
+        if cached is not None and cached[0] + step - 1 < persistence:
+            age, arbiter_state, impulses = cached
+            for contact in arb.contacts[0 : arb.count]:
+                contact.jnAcc, contact.jtAcc = impulses.get(contact.hash, (contact.jnAcc, contact.jtAcc))
+            if step == 1 and age == 0 and arbiter_state != cp.CP_ARBITER_STATE_CACHED:
+                arb.state = cp.CP_ARBITER_STATE_NORMAL
+        if not contacts or step >= persistence:
+            self._stop_resuming_contacts()
+        return True
+
+    def _stop_resuming_contacts(self):
+        self._resumed_contacts = None
+        if self.collision_handeler is not None:
+            self.collision_handeler._pre_solve = None
+            self.collision_handeler._handler.preSolveFunc = self._default_pre_solve
+
+    def fork(self):
+        """Return an independent copy of this environment in its current state.
+
+        The copy is restored from the state of this environment, which is left untouched and continues exactly as
+        it would have without the fork. The copy starts from fresh broadphase hints (see "Simulation States"), so
+        after contacts its continuation may differ from that of this environment by rounding, but every copy of
+        the same state continues identically.
+        """
+        state = self.get_sim_state()
+        clone = PushTEnv(
+            obs_type=self.obs_type,
+            render_mode=self.render_mode,
+            block_cog=self.block_cog,
+            damping=self.damping,
+            observation_width=self.observation_width,
+            observation_height=self.observation_height,
+            visualization_width=self.visualization_width,
+            visualization_height=self.visualization_height,
+            coverage_interval=self.coverage_interval,
+            fast_reset=self.fast_reset,
+            fidelity=self.fidelity,
+            fast_forward=self.fast_forward,
+            contact_stats=self.contact_stats,
+            info_level=self.info_level,
+            reuse_obs=self.reuse_obs,
+            renderer=self.renderer,
+            backend=self.backend,
+            goal_pose=self.goal_pose,
+        )
+        clone.reset()
+        clone._np_random = copy.deepcopy(self._np_random)
+        clone.set_sim_state(state)
+        return clone
+
     def _set_state(self, state):
+        if self._physics is not None:
+            self._physics.reset(state)
+            self._sync_bodies()
+            return
+
         self.agent.position = list(state[:2])
         # Setting angle rotates with respect to center of mass, therefore will modify the geometric position if not
         # the same as CoM. Therefore should theoretically set the angle first. But for compatibility with legacy data,
@@ -464,11 +1168,22 @@ class PushTEnv(gym.Env):
         # Run physics to take effect
         self.space.step(self.dt)
 
+    def _sync_bodies(self):
+        """Copy the state of the numpy backend into the pymunk bodies, which observations and rendering read."""
+        physics = self._physics
+        self.agent.position = physics.agent_position[0].tolist()
+        self.agent.velocity = physics.agent_velocity[0].tolist()
+        # the angle first: `body.position` places the origin about the center of gravity with the current angle
+        self.block.angle = float(physics.block_angle[0])
+        self.block.position = physics.block_position()[0].tolist()
+        for shape in (*self.agent.shapes, *self._block_shapes):
+            shape.cache_bb()
+
     @staticmethod
     def add_segment(space, a, b, radius):
         # TODO(rcadene): rename add_segment to make_segment, since it is not added to the space
         shape = pymunk.Segment(space.static_body, a, b, radius)
-        shape.color = pygame.Color("LightGray")  # https://htmlcolorcodes.com/color-names
+        shape.color_name = "LightGray"  # https://htmlcolorcodes.com/color-names
         return shape
 
     @staticmethod
@@ -477,7 +1192,7 @@ class PushTEnv(gym.Env):
         body.position = position
         body.friction = 1
         shape = pymunk.Circle(body, radius)
-        shape.color = pygame.Color("RoyalBlue")
+        shape.color_name = "RoyalBlue"
         space.add(body, shape)
         return body
 
@@ -487,25 +1202,14 @@ class PushTEnv(gym.Env):
             mask = pymunk.ShapeFilter.ALL_MASKS()
         mass = 1
         length = 4
-        vertices1 = [
-            (-length * scale / 2, scale),
-            (length * scale / 2, scale),
-            (length * scale / 2, 0),
-            (-length * scale / 2, 0),
-        ]
+        vertices1, vertices2 = tee_rectangles(scale, length)
         inertia1 = pymunk.moment_for_poly(mass, vertices=vertices1)
-        vertices2 = [
-            (-scale / 2, scale),
-            (-scale / 2, length * scale),
-            (scale / 2, length * scale),
-            (scale / 2, scale),
-        ]
         inertia2 = pymunk.moment_for_poly(mass, vertices=vertices1)
         body = pymunk.Body(mass, inertia1 + inertia2)
         shape1 = pymunk.Poly(body, vertices1)
         shape2 = pymunk.Poly(body, vertices2)
-        shape1.color = pygame.Color(color)
-        shape2.color = pygame.Color(color)
+        shape1.color_name = color
+        shape2.color_name = color
         shape1.filter = pymunk.ShapeFilter(mask=mask)
         shape2.filter = pymunk.ShapeFilter(mask=mask)
         body.center_of_gravity = (shape1.center_of_gravity + shape2.center_of_gravity) / 2
@@ -530,10 +1234,6 @@ class PushTEnv(gym.Env):
             │   │
             7───6
         """
-        keypoints = []
-        for shape in block_shapes:
-            for v in shape.get_vertices():
-                v = v.rotated(shape.body.angle)
-                v = v + shape.body.position
-                keypoints.append(np.array(v))
-        return np.row_stack(keypoints)
+        body = block_shapes[0].body
+        local_vertices = [tuple(v) for shape in block_shapes for v in shape.get_vertices()]
+        return np.array(_transform_keypoints(local_vertices, body.angle, body.position)).reshape(-1, 2)
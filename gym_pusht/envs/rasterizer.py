@@ -0,0 +1,83 @@
+"""Direct cv2 rasterizer for PushT frames.
+
+`PushTEnv._draw` paints a 512x512 pygame surface through pymunk's debug drawing, which is then resized to the
+requested resolution. `Rasterizer` instead draws the scene with cv2 straight into a uint8 RGB buffer at the
+requested resolution, with the same colors and draw order: goal T, walls, agent, block T. Background, goal and
+walls do not move, so they are drawn once into a static layer that every frame starts from. Coordinates are kept
+with sub-pixel precision and edges are anti-aliased, which approximates the pygame frame after its resize.
+"""
+
+import cv2
+import numpy as np
+from pymunk.space_debug_draw_options import SpaceDebugColor
+
+from .pymunk_override import light_color
+
+# fractional bits of the fixed-point coordinates passed to cv2
+_SHIFT = 4
+_ONE = 1 << _SHIFT
+
+# half-width of the block outline and inset of the agent's light disc, in world pixels (see DrawOptions)
+_OUTLINE_RADIUS = 2
+_AGENT_INSET = 4
+
+
+def _rgb(shape_color):
+    return tuple(int(c) for c in shape_color[:3])
+
+
+def _light_rgb(shape_color):
+    return light_color(SpaceDebugColor(*shape_color)).as_int()[:3]
+
+
+class Rasterizer:
+    """Draws PushT frames of size (height, width, 3) into a preallocated buffer.
+
+    `walls` are (a, b, radius, color) world segments and `goal_polygons` lists of world vertices. Colors are
+    pygame colors, as set on the pymunk shapes.
+    """
+
+    def __init__(self, width, height, walls, goal_polygons, goal_color, agent_color, block_color):
+        self.width, self.height = width, height
+        self.scale = np.array([width / 512, height / 512])
+        self.agent_colors = (_rgb(agent_color), _light_rgb(agent_color))
+        self.block_colors = (_rgb(block_color), _light_rgb(block_color))
+        self.outline = max(1, round(2 * _OUTLINE_RADIUS * self.scale.mean()))
+
+        self.static = np.full((height, width, 3), 255, dtype=np.uint8)
+        for polygon in goal_polygons:
+            cv2.fillPoly(self.static, [self._points(polygon)], _rgb(goal_color), cv2.LINE_AA, _SHIFT)
+        for a, b, radius, color in walls:
+            thickness = max(1, round(2 * radius * self.scale.mean()))
+            points = [self._points([a, b])]
+            cv2.polylines(self.static, points, False, _rgb(color), thickness, cv2.LINE_AA, _SHIFT)
+        self.frame = np.empty_like(self.static)
+
+    def _points(self, vertices):
+        return np.round(np.asarray(vertices, dtype=np.float64) * self.scale * _ONE).astype(np.int32)
+
+    def draw(self, agent_position, agent_radius, block_polygons):
+        """Draw a frame into `self.frame` and return it.
+
+        `block_polygons` is a flat list [x0, y0, x1, y1, ...] of the world vertices of the block rectangles,
+        four per rectangle, as returned by `_transform_keypoints`.
+        """
+        frame = self.frame
+        np.copyto(frame, self.static)
+
+        center = tuple(int(v) for v in self._points(agent_position))
+        outer, inner = self.agent_colors
+        for radius, color in ((agent_radius, outer), (agent_radius - _AGENT_INSET, inner)):
+            axes = tuple(int(v) for v in np.round(radius * self.scale * _ONE))
+            if axes[0] == axes[1]:
+                cv2.circle(frame, center, axes[0], color, cv2.FILLED, cv2.LINE_AA, _SHIFT)
+            else:
+                cv2.ellipse(frame, center, axes, 0, 0, 360, color, cv2.FILLED, cv2.LINE_AA, _SHIFT)
+
+        # like DrawOptions.draw_polygon: a light fill, then the outline, one rectangle after the other
+        outline, fill = self.block_colors
+        points = self._points(np.reshape(block_polygons, (-1, 4, 2)))
+        for rectangle in points:
+            cv2.fillPoly(frame, [rectangle], fill, cv2.LINE_AA, _SHIFT)
+            cv2.polylines(frame, [rectangle], True, outline, self.outline, cv2.LINE_AA, _SHIFT)
+        return frame
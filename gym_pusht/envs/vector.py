@@ -0,0 +1,67 @@
+"""Vectorized PushT environments, the `vector_entry_point` of `gym_pusht/PushT-v0`.
+
+`gym.make_vec("gym_pusht/PushT-v0", num_envs, vectorization_mode="custom", vector_kwargs={...})` calls
+`make_vector_env` with `vector_kwargs` and the step limit of the registration. Note that in this mode
+gymnasium does not forward its own keyword arguments: environment arguments go into `vector_kwargs` as well.
+"""
+
+import functools
+
+import gymnasium as gym
+import numpy as np
+
+from .pusht import PushTEnv
+
+
+class _SelectResetState(gym.Wrapper):
+    """Passes sub-environment `index` its own row of a (num_envs, 5) array of `reset_to_state` states."""
+
+    def __init__(self, env, index):
+        super().__init__(env)
+        self.index = index
+
+    def reset(self, *, seed=None, options=None):
+        if options is not None and options.get("reset_to_state") is not None:
+            states = np.asarray(options["reset_to_state"])
+            if states.ndim == 2:
+                options = {**options, "reset_to_state": states[self.index]}
+        return self.env.reset(seed=seed, options=options)
+
+
+def _make_env(index, max_episode_steps, env_kwargs):
+    env = PushTEnv(**env_kwargs)
+    if max_episode_steps is not None:
+        env = gym.wrappers.TimeLimit(env, max_episode_steps)
+    return _SelectResetState(env, index)
+
+
+def make_vector_env(
+    num_envs,
+    asynchronous=True,
+    shared_memory=True,
+    max_episode_steps=None,
+    context=None,
+    render_mode=None,
+    **env_kwargs,
+):
+    """Build a `gym.vector.AsyncVectorEnv` (one worker process per environment) or, without `asynchronous`, a
+    `gym.vector.SyncVectorEnv` of `num_envs` PushT environments.
+
+    The remaining keyword arguments are those of `PushTEnv`; environments are headless unless `render_mode` is
+    given, which pixel observations do not need. With `shared_memory` the workers of an asynchronous environment
+    write their observations straight into shared memory instead of pickling them through pipes, which pays off
+    for the `pixels` and `pixels_agent_pos` observation types. `context` is the multiprocessing start method.
+
+    Both reset a sub-environment on their own once it terminates or is truncated, returning the last observation
+    and info of the episode in `info["final_observation"]` and `info["final_info"]` (the gymnasium 0.29 vector
+    API). `reset(options={"reset_to_state": states})` with an array `states` (num_envs, 5) resets every
+    sub-environment to its own row; a single state (5,) resets all of them to it. Leave `reuse_obs` off: the
+    final observation of an episode would be overwritten by the first one of the next.
+    """
+    env_fns = [
+        functools.partial(_make_env, index, max_episode_steps, {"render_mode": render_mode, **env_kwargs})
+        for index in range(num_envs)
+    ]
+    if asynchronous:
+        return gym.vector.AsyncVectorEnv(env_fns, shared_memory=shared_memory, context=context)
+    return gym.vector.SyncVectorEnv(env_fns)
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+# the options of Agent.AgentConfig that the Evaluator reads, unset like in a config file that leaves them out
+EVALUATOR_OPTIONS = {
+    "evaluator": "Evaluator",
+    "randomSeed": 0,
+    "nGenesCfg": 40,
+    "blockActionSize": 5,
+    **dict.fromkeys(
+        [
+            "rawEnv",
+            "prefixCacheMB",
+            "prefixCacheInterval",
+            "racingFidelity",
+            "fidelity",
+            "fastForward",
+            "goalPose",
+            "poseTrace",
+            "earlyExit",
+            "startStates",
+            "nStartStates",
+            "startAggregate",
+            "batchBackend",
+        ]
+    ),
+}
+
+
+def evaluator_config(**options):
+    return SimpleNamespace(**{**EVALUATOR_OPTIONS, **options})
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    """Set up the Evaluator class like Agent.initClassVars does, from the options given; returns the class."""
+    from Evaluator import Evaluator
+
+    def configure(**options):
+        cfg = evaluator_config(**options)
+        monkeypatch.setattr(Evaluator, "cfg", cfg)
+        monkeypatch.setattr(Evaluator, "startStates", Evaluator.makeStartStates(cfg))
+        monkeypatch.setattr(Evaluator, "prefixCache", None)
+        monkeypatch.setattr(Evaluator, "store", None)
+        return Evaluator
+
+    return configure
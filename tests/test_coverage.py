@@ -0,0 +1,71 @@
+import numpy as np
+
+from gym_pusht.envs.coverage import TeeCoverage
+from gym_pusht.envs.pusht import PushTEnv, pymunk_to_shapely
+
+# both coverage paths agree with shapely to within rounding; 1e-9 leaves ample margin
+TOLERANCE = 1e-9
+
+
+def test_coverage_matches_shapely():
+    env = PushTEnv()
+    env.reset(seed=0)
+    goal_body = env.get_goal_pose_body(env.goal_pose)
+    engine = TeeCoverage(env.goal_pose)
+
+    rng = np.random.default_rng(0)
+    n = 500
+    poses = np.column_stack(
+        [rng.uniform(150, 360, n), rng.uniform(150, 360, n), rng.uniform(-np.pi, np.pi, n)]
+    )
+    # near-goal poses (partial and almost full overlap), the goal itself and its 180 degree rotation
+    poses[:200] = env.goal_pose + rng.normal(0, [5, 5, 0.1], (200, 3))
+    poses[0] = env.goal_pose
+    poses[1] = env.goal_pose + [0, 0, np.pi]
+
+    expected = []
+    for x, y, angle in poses:
+        # set the angle first: it rotates the block about its center of gravity
+        env.block.angle = angle
+        env.block.position = (x, y)
+        goal_geom = pymunk_to_shapely(goal_body, env.block.shapes)
+        block_geom = pymunk_to_shapely(env.block, env.block.shapes)
+        expected.append(goal_geom.intersection(block_geom).area / goal_geom.area)
+    expected = np.array(expected)
+
+    scalar = np.array([engine.coverage(pose) for pose in poses])
+    np.testing.assert_allclose(scalar, expected, rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(engine.coverage_batch(poses), expected, rtol=0, atol=TOLERANCE)
+    assert (expected > env.success_threshold).any() and (expected == 0).any()
+
+
+def test_success_possible_is_conservative():
+    engine = TeeCoverage((256, 256, np.pi / 4))
+    rng = np.random.default_rng(1)
+    poses = np.array((256, 256, np.pi / 4)) + rng.normal(0, [10, 10, 0.2], (2000, 3))
+    coverage = engine.coverage_batch(poses)
+    possible = np.array([engine.success_possible(pose, 0.95) for pose in poses])
+    assert possible[coverage > 0.95].all()
+    assert not possible.all()
+
+
+def test_coverage_goals_matches_per_goal_engines():
+    rng = np.random.default_rng(2)
+    goals = np.column_stack([rng.uniform(150, 360, (4, 2)), rng.uniform(-np.pi, np.pi, 4)])
+    poses = np.concatenate([goals + rng.normal(0, [5, 5, 0.1], (4, 3)) for _ in range(50)])
+    poses[:4] = goals
+    coverage = TeeCoverage((256, 256, np.pi / 4)).coverage_goals(poses, goals)
+    assert coverage.shape == (len(poses), len(goals))
+    expected = np.column_stack([TeeCoverage(goal).coverage_batch(poses) for goal in goals])
+    np.testing.assert_allclose(coverage, expected, rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(np.diag(coverage[:4]), 1, rtol=0, atol=TOLERANCE)
+
+    # the environment scores the block against its own goal, also after moving it
+    env = PushTEnv(goal_pose=goals[0])
+    env.reset(options={"reset_to_state": [20, 20, *goals[1]]})
+    pose = (*env.block.position, env.block.angle)
+    coverage = TeeCoverage(goals[0]).coverage(pose)
+    assert 0 < coverage < 1
+    np.testing.assert_allclose(env.refresh_reward(), coverage / env.success_threshold, rtol=0, atol=TOLERANCE)
+    env.set_goal(pose)
+    np.testing.assert_allclose(env.refresh_reward(), 1, rtol=0, atol=TOLERANCE)
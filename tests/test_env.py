@@ -1,4 +1,8 @@
+import subprocess
+import sys
+
 import gymnasium as gym
+import numpy as np
 import pytest
 from gymnasium.utils.env_checker import check_env
 
@@ -17,3 +21,289 @@ import gym_pusht  # noqa: F401
 def test_env(env_task, obs_type):
     env = gym.make(f"gym_pusht/{env_task}", obs_type=obs_type)
     check_env(env.unwrapped)
+
+
+def test_lazy_coverage_keeps_termination():
+    from gym_pusht.envs import PushTEnv
+
+    rng = np.random.default_rng(0)
+    dense, lazy = PushTEnv(), PushTEnv(coverage_interval=None)
+    n_success = 0
+    for _ in range(100):
+        # place the block around the goal so that some episodes succeed
+        offset = rng.normal(0, 3, 2) * rng.uniform(0, 4)
+        angle = np.pi / 4 + rng.normal(0, 0.01)
+        for env in (dense, lazy):
+            env.reset(options={"reset_to_state": [20, 20, 100, 100, 0]})
+            env.block.angle = angle
+            env.block.position = (256 + offset[0], 256 + offset[1])
+        action = rng.uniform(0, 512, 2)
+        _, reward, terminated, _, _ = dense.step(action)
+        _, _, lazy_terminated, _, _ = lazy.step(action)
+        assert terminated == lazy_terminated
+        assert lazy.refresh_reward() == pytest.approx(reward, abs=1e-12)
+        n_success += terminated
+    assert 0 < n_success < 100
+
+
+@pytest.mark.parametrize("block_cog", [None, (5, 40)])
+def test_fast_reset_matches_rebuild(block_cog):
+    from gym_pusht.envs import PushTEnv
+
+    rng = np.random.default_rng(0)
+    # contact statistics must not change the simulation either
+    fast = PushTEnv(block_cog=block_cog, contact_stats=True)
+    rebuilt = PushTEnv(block_cog=block_cog, fast_reset=False)
+    n_contacts = 0
+    for _ in range(100):
+        # start the agent next to the block and push through it so that most episodes involve contacts
+        block = rng.uniform(150, 350, 2)
+        state = [*(block + rng.normal(0, 40, 2)), *block, rng.uniform(-np.pi, np.pi)]
+        obs_fast, _ = fast.reset(options={"reset_to_state": state})
+        obs_rebuilt, _ = rebuilt.reset(options={"reset_to_state": state})
+        np.testing.assert_array_equal(obs_fast, obs_rebuilt)
+        for _ in range(20):
+            action = block + rng.normal(0, 60, 2)
+            obs_fast, reward_fast, _, _, info = fast.step(action)
+            obs_rebuilt, reward_rebuilt, _, _, rebuilt_info = rebuilt.step(action)
+            np.testing.assert_array_equal(obs_fast, obs_rebuilt)
+            assert reward_fast == reward_rebuilt
+            n_contacts += info["n_contacts"] > 0
+            assert "n_contacts" not in rebuilt_info
+    assert n_contacts > 0
+    assert rebuilt.collision_handeler is None
+
+
+def test_sim_state_restores_deterministically():
+    from gym_pusht.envs import PushTEnv
+
+    rng = np.random.default_rng(0)
+    env, twin, other = PushTEnv(), PushTEnv(), PushTEnv()
+    other.reset()
+    n_with_contacts = 0
+    for _ in range(30):
+        block = rng.uniform(150, 350, 2)
+        state = [*(block + rng.normal(0, 40, 2)), *block, rng.uniform(-np.pi, np.pi)]
+        actions = [block + rng.normal(0, 60, 2) for _ in range(10)]
+        env.reset(options={"reset_to_state": state})
+        twin.reset(options={"reset_to_state": state})
+        for action in actions[:5]:
+            env.step(action)
+            twin.step(action)
+            # taking a snapshot has no side effects
+            snapshot = env.get_sim_state()
+            np.testing.assert_array_equal(env.get_obs(), twin.get_obs())
+
+        # every restore of a snapshot, in any environment, continues identically
+        continuations = []
+        for target in (env, other, env):
+            target.set_sim_state(snapshot)
+            np.testing.assert_array_equal(target.get_sim_state(), snapshot)
+            continuations.append([target.step(action)[:3] for action in actions[5:]])
+        for continuation in continuations[1:]:
+            for (obs, reward, terminated), expected in zip(continuation, continuations[0], strict=True):
+                np.testing.assert_array_equal(obs, expected[0])
+                assert (reward, terminated) == expected[1:]
+        # the arbiter count follows the two bodies and seven counters
+        n_with_contacts += snapshot[2 * 9 + 7] > 0
+    assert n_with_contacts > 0
+
+
+def test_fork_leaves_its_parent_alone():
+    from gym_pusht.envs import PushTEnv
+
+    # the agent pushes the block, which is in contact when it is forked
+    actions = np.random.default_rng(1).normal([256, 300], 40, (40, 2))
+    env, twin = PushTEnv(), PushTEnv()
+    for target in (env, twin):
+        target.reset(options={"reset_to_state": [256, 380, 256, 300, 0.3]})
+    for action in actions[:10]:
+        env.step(action)
+        twin.step(action)
+    clone, other = env.fork(), env.fork()
+    assert clone.space is not env.space and env.get_sim_state()[2 * 9 + 7] > 0
+    assert env._restore_timestamp is None and clone._restore_timestamp is not None
+    for action in actions[10:]:
+        # the parent goes on exactly like the environment that was never forked, and the copies like each other
+        for first, second in ((env, twin), (clone, other)):
+            obs, reward, terminated, truncated, _ = first.step(action)
+            other_obs, other_reward, other_terminated, other_truncated, _ = second.step(action)
+            np.testing.assert_array_equal(obs, other_obs)
+            assert (reward, terminated, truncated) == (other_reward, other_terminated, other_truncated)
+
+
+def test_sim_state_without_body_layout(monkeypatch):
+    from gym_pusht.envs import PushTEnv, pusht
+
+    actions = np.random.default_rng(1).normal([256, 300], 40, (40, 2))
+    env, other = PushTEnv(), PushTEnv()
+    env.reset(options={"reset_to_state": [256, 380, 256, 300, 0.3]})
+    other.reset()
+    for action in actions[:10]:
+        env.step(action)
+    exact = env.get_sim_state()
+    monkeypatch.setattr(pusht, "_body_layout_supported", lambda: False)
+    snapshot = env.get_sim_state()
+    # the public properties give the bodies up to rounding, without the bias velocities
+    bias = np.r_[6:9, 15:18]
+    np.testing.assert_allclose(np.delete(snapshot, bias), np.delete(exact, bias), rtol=1e-12)
+    assert exact[bias].any() and not snapshot[bias].any()
+
+    continuations = []
+    for target in (env, other):
+        target.set_sim_state(snapshot)
+        np.testing.assert_allclose(target.get_sim_state(), snapshot, rtol=1e-12)
+        continuations.append([target.step(action)[:3] for action in actions[10:]])
+    for (obs, reward, terminated), expected in zip(*continuations, strict=True):
+        np.testing.assert_array_equal(obs, expected[0])
+        assert (reward, terminated) == expected[1:]
+
+
+@pytest.mark.parametrize("coverage_interval", [1, None])
+def test_step_sequence_matches_step(coverage_interval):
+    from gym_pusht.envs import PushTEnv
+
+    rng = np.random.default_rng(2)
+    env, bulk = PushTEnv(coverage_interval=coverage_interval), PushTEnv(coverage_interval=coverage_interval)
+    for episode in range(20):
+        block = rng.uniform(150, 350, 2)
+        state = [*(block + rng.normal(0, 40, 2)), *block, rng.uniform(-np.pi, np.pi)]
+        actions = rng.uniform(150, 350, (30, 2))
+        env.reset(options={"reset_to_state": state})
+        bulk.reset(options={"reset_to_state": state})
+        if episode == 0:
+            # start on the goal, so that the first step succeeds
+            for target in (env, bulk):
+                target.block.angle = np.pi / 4
+                target.block.position = (256, 256)
+
+        poses = []
+        for action in actions[:25]:
+            obs, reward, terminated, _, _ = env.step(action.tolist())
+            poses.append(obs)
+            if terminated:
+                break
+        reward = env.refresh_reward()
+
+        result = bulk.step_sequence(actions, max_steps=25, return_poses=True)
+        bulk_reward, bulk_terminated, bulk_truncated, info = result
+        assert (bulk_reward, bulk_terminated, bulk_truncated) == (reward, terminated, len(poses) == 25)
+        assert info["n_steps"] == len(poses)
+        np.testing.assert_array_equal(info["poses"], poses)
+        assert terminated == (episode == 0)
+
+
+def test_fidelity_profiles_move_the_agent_like_reference():
+    from gym_pusht.envs.pusht import FIDELITY_PROFILES, PushTEnv
+
+    actions = np.random.default_rng(3).uniform(50, 450, (30, 2))
+    reference = PushTEnv()
+    reference.reset(seed=0)
+    expected = reference.step_sequence(actions, return_poses=True)[3]["poses"]
+    for fidelity in FIDELITY_PROFILES:
+        env = PushTEnv(fidelity=fidelity)
+        env.reset(seed=0)
+        poses = env.step_sequence(actions, return_poses=True)[3]["poses"]
+        # the agent is kinematic: its trajectory does not depend on how contacts are resolved
+        np.testing.assert_allclose(poses[:, :2], expected[:, :2], rtol=0, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        PushTEnv(fidelity="unknown")
+
+
+def test_fast_forward_moves_the_agent_like_physics():
+    from gym_pusht.envs import PushTEnv
+
+    env, fast = PushTEnv(), PushTEnv(fast_forward=True)
+    rng = np.random.default_rng(4)
+    # far from the block, no substep needs the physics engine
+    actions = rng.uniform(20, 120, (20, 2))
+    for target in (env, fast):
+        target.reset(options={"reset_to_state": [60, 60, 350, 350, 0]})
+    expected = env.step_sequence(actions, return_poses=True)
+    result = fast.step_sequence(actions, return_poses=True)
+    np.testing.assert_array_equal(result[3]["poses"], expected[3]["poses"])
+    assert result[0] == expected[0]
+    assert result[3]["skipped_substeps"] == 20 * fast.substeps and expected[3]["skipped_substeps"] == 0
+
+    # pushing the block: the kinematic agent still follows the same path, physics takes over near the block
+    actions = np.clip(256 + np.cumsum(rng.normal(0, 40, (100, 2)), axis=0), 0, 512)
+    for target in (env, fast):
+        target.reset(seed=0)
+    expected = env.step_sequence(actions, return_poses=True)[3]
+    result = fast.step_sequence(actions, return_poses=True)[3]
+    np.testing.assert_array_equal(result["poses"][:, :2], expected["poses"][:, :2])
+    assert 0 < result["skipped_substeps"] < 100 * fast.substeps
+    assert np.abs(result["poses"][:, 2:4] - result["poses"][0, 2:4]).max() > 10
+
+
+@pytest.mark.parametrize("obs_type", ["state", "environment_state_agent_pos"])
+def test_reused_obs_and_info_levels(obs_type):
+    from gym_pusht.envs import PushTEnv
+
+    env = PushTEnv(obs_type=obs_type)
+    lean = PushTEnv(obs_type=obs_type, info_level="none", reuse_obs=True)
+    minimal = PushTEnv(obs_type=obs_type, info_level="minimal")
+    obs, info = env.reset(seed=0)
+    lean_obs, lean_info = lean.reset(seed=0)
+    minimal.reset(seed=0)
+    assert lean_info == {} and "is_success" in info
+    for action in np.random.default_rng(5).uniform(100, 400, (20, 2)):
+        obs, reward, _, _, info = env.step(action)
+        previous = lean_obs
+        lean_obs, lean_reward, _, _, lean_info = lean.step(action)
+        _, _, _, _, minimal_info = minimal.step(action)
+        assert lean_obs is previous and lean_info == {} and lean_reward == reward
+        assert minimal_info == {key: info[key] for key in minimal_info} and "pos_agent" not in minimal_info
+        if obs_type == "state":
+            np.testing.assert_array_equal(lean_obs, obs)
+        else:
+            for key in obs:
+                np.testing.assert_array_equal(lean_obs[key], obs[key])
+            # the legacy keypoint computation
+            keypoints = [
+                np.array(v.rotated(env.block.angle) + env.block.position)
+                for shape in env._block_shapes
+                for v in shape.get_vertices()
+            ]
+            np.testing.assert_array_equal(obs["environment_state"], np.row_stack(keypoints).flatten())
+
+
+def test_cv2_renderer_matches_pygame():
+    from gym_pusht.envs import PushTEnv
+
+    env = PushTEnv(obs_type="pixels", reuse_obs=True, renderer="cv2")
+    legacy = PushTEnv(obs_type="pixels", renderer="pygame")
+    obs, _ = env.reset(seed=0)
+    legacy.reset(seed=0)
+    for action in np.random.default_rng(6).uniform(100, 400, (10, 2)):
+        previous = obs
+        obs, *_ = env.step(action)
+        legacy_obs, *_ = legacy.step(action)
+        assert obs is previous and obs.shape == legacy_obs.shape and obs.dtype == np.uint8
+        # the same scene, anti-aliased differently along edges
+        assert np.abs(obs.astype(int) - legacy_obs).mean() < 5
+    frame = env.render()
+    assert frame is not obs and frame.shape == (env.visualization_height, env.visualization_width, 3)
+    assert np.abs(frame.astype(int) - legacy.render()).mean() < 5
+
+
+def test_headless_env_imports_no_rendering_modules():
+    from gym_pusht.envs import PushTEnv
+
+    code = (
+        "import sys, numpy as np\n"
+        "from gym_pusht.envs import PushTEnv\n"
+        "env = PushTEnv(render_mode=None)\n"
+        "env.reset(seed=0)\n"
+        "env.step(np.array([200.0, 200.0]))\n"
+        "assert env.render() is None\n"
+        "print(sorted({'pygame', 'shapely'} & set(sys.modules)))\n"
+    )
+    # cv2 is left out: gymnasium's own wrappers import it whenever it is installed
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+    env = PushTEnv(obs_type="pixels", render_mode=None)
+    obs, _ = env.reset(seed=0)
+    assert obs.shape == (env.observation_height, env.observation_width, 3)
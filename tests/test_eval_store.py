@@ -0,0 +1,64 @@
+import multiprocessing
+import sqlite3
+
+from EvalStore import EvalStore, configKey
+
+CONFIG = configKey({"fidelity": "reference"})
+
+
+def result(state):
+    return [len(state), sum(state)], {"state": list(state)}
+
+
+def share_results(path, worker, n=40):
+    """Put genomes of its own and of both workers, and look up those of the other worker as it goes."""
+    store = EvalStore(path, 1000, CONFIG, compactInterval=16, timeout=30.0)
+    found = []
+    for i in range(n):
+        for state in ([worker, i], [0.5, i]):
+            store.put(state, result(state))
+        for j in range(i + 1):
+            other = [1 - worker, j]
+            found.append(store.get(other) in (None, result(other)))
+    return all(found)
+
+
+def test_get_does_not_write(tmp_path):
+    store = EvalStore(str(tmp_path / "store.sqlite"), 10, CONFIG)
+    store.put([1.0, 2.0], result([1.0, 2.0]))
+    changes = store.connect().total_changes
+    assert store.get([1.0, 2.0]) == result([1.0, 2.0])
+    assert store.get([2.0, 1.0]) is None
+    assert store.connect().total_changes == changes
+    assert store.stats()["hit_rate"] == 0.5
+
+
+def test_compact_keeps_max_entries(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    store = EvalStore(path, 3, CONFIG)
+    states = [[float(i)] for i in range(5)]
+    for state in states:
+        store.put(state, result(state))
+    assert store.get(states[0]) is not None  # now the most recently used
+    store.compact()
+    assert len(store) == 3 and store.evictions == 2
+    assert [store.get(state) is not None for state in states] == [True, False, False, True, True]
+
+    # results of other configurations count toward maxEntries as well
+    other = EvalStore(path, 3, configKey({"fidelity": "fast"}), compactInterval=2)
+    for state in states[:2]:
+        other.put(state, result(state))
+    assert len(other) == 3 and other.evictions == 2
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM results").fetchone()[0] == 3
+
+
+def test_processes_share_results(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        outcomes = pool.starmap(share_results, [(path, 0), (path, 1)])
+    assert outcomes == [True, True]
+
+    store = EvalStore(path, 1000, CONFIG)
+    assert len(store) == 3 * 40
+    for state in [[0, 39], [1, 0], [0.5, 20]]:
+        assert store.get(state) == result(state)
@@ -0,0 +1,200 @@
+from random import Random
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from Evaluator import EnvPool
+from gym_pusht.envs.coverage import TeeCoverage
+from gym_pusht.envs.pusht import DEFAULT_GOAL_POSE
+from Individual import AgentIndividual
+
+
+def random_genomes(n, max_actions, seed=0):
+    rng = Random(seed)
+    # actions around the block of fixedState, so that the rollouts push it
+    return [[rng.uniform(50, 300) for _ in range(2 * rng.randint(1, max_actions))] for _ in range(n)]
+
+
+def fresh_rollout(state, start, fidelity="reference", goal_pose=None):
+    """rewardEnd and final block pose of a genome on a new gym.make env, restarting after success or truncation."""
+    env = gym.make("gym_pusht/PushT-v0", fidelity=fidelity, goal_pose=goal_pose)
+    env.reset(options={"reset_to_state": start})
+    reward = 0.0
+    for i in range(len(state) // 2):
+        _, reward, terminated, truncated, _ = env.step(state[2 * i : 2 * i + 2])
+        if terminated or truncated:
+            env.reset(options={"reset_to_state": start})
+    block = env.unwrapped.block
+    return reward, (block.position.x, block.position.y, block.angle)
+
+
+@pytest.fixture
+def env_pool(monkeypatch):
+    monkeypatch.setattr(EnvPool, "envs", {})
+    monkeypatch.setattr(EnvPool, "batchEnvs", {})
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_pooled_env_is_reused(evaluator, env_pool, raw):
+    # up to blockActionSize actions, so that rollouts never restore a snapshot on the way
+    genomes = random_genomes(6, 5)
+    evaluator_class = evaluator(rawEnv=raw)
+    results = [evaluator_class.Evaluate(state) for state in genomes]
+    assert len(EnvPool.envs) == 1
+    env = EnvPool.get(raw=raw)
+    assert env is next(iter(EnvPool.envs.values())) and (env is env.unwrapped) == raw
+    for state, (objectives, record) in zip(genomes, results, strict=True):
+        reward, pose = fresh_rollout(state, evaluator_class.fixedState)
+        assert objectives == [len(state) / 40, reward] and record["finalPose"] == pose
+
+
+def test_fidelities_get_their_own_env(evaluator, env_pool):
+    state = random_genomes(1, 5, seed=1)[0]
+    evaluator_class = evaluator(racingFidelity="coarse")
+    reference = evaluator_class.Evaluate(state)[0]
+    coarse = evaluator_class.EvaluateLow(state)
+    assert set(EnvPool.envs) == {
+        (None, False, "reference", False, None),
+        (None, False, "coarse", False, None),
+    }
+    assert coarse[1] == fresh_rollout(state, evaluator_class.fixedState, "coarse")[0]
+    assert evaluator_class.Evaluate(state)[0] == reference
+    assert len(EnvPool.envs) == 2
+
+    evaluator_class = evaluator(fastForward=True, goalPose=[200, 300, 0.5])
+    evaluator_class.Evaluate(state)
+    assert (None, False, "reference", True, (200, 300, 0.5)) in EnvPool.envs
+
+
+@pytest.fixture
+def reachable_goal(evaluator):
+    """A genome of nGenesCfg genes, a goal its rollout from fixedState reaches at its 7th action, and the pose there.
+
+    The goal is the pose after the 8th action, which the 7th already covers enough.
+    """
+    rng = Random(0)
+    state = [rng.uniform(50, 300) for _ in range(40)]
+    env = gym.make("gym_pusht/PushT-v0")
+    env.reset(options={"reset_to_state": evaluator().fixedState})
+    poses = []
+    for i in range(8):
+        env.step(state[2 * i : 2 * i + 2])
+        block = env.unwrapped.block
+        poses.append((block.position.x, block.position.y, block.angle))
+    return state, list(poses[7]), poses[6]
+
+
+@pytest.mark.parametrize("interval", [None, 100])
+def test_early_exit_stops_at_success(evaluator, env_pool, reachable_goal, interval):
+    state, goal, pose = reachable_goal
+    evaluator_class = evaluator(earlyExit=True, goalPose=goal, poseTrace=True, prefixCacheInterval=interval)
+    objectives, record = evaluator_class.Evaluate(state)
+    # past the first snapshot depth, where rollouts restore their state
+    assert record["nSteps"] == 7 and record["unusedGenes"] == len(state) - 14
+    assert objectives == [2 * 7 / 40, 1.0] and len(record["poses"]) == 7
+    if interval is not None:
+        # without restores on the way, the rollout ends where a fresh env reaches the goal
+        assert record["finalPose"] == pose
+
+
+def test_without_early_exit_success_restarts(evaluator, env_pool, reachable_goal):
+    state, goal, _ = reachable_goal
+    # no restores on the way either, so that a fresh env takes exactly the same course
+    evaluator_class = evaluator(goalPose=goal, prefixCacheInterval=100)
+    objectives, record = evaluator_class.Evaluate(state)
+    reward, pose = fresh_rollout(state, evaluator_class.fixedState, goal_pose=goal)
+    assert objectives == [1.0, reward] and reward < 1.0 and record["finalPose"] == pose
+    assert (record["nSteps"], record["unusedGenes"]) == (20, 0)
+
+
+@pytest.mark.parametrize("trim", [False, True])
+def test_trim_genes_drops_unused_genes(evaluator, env_pool, reachable_goal, monkeypatch, trim):
+    state, goal, _ = reachable_goal
+    evaluator_class = evaluator(earlyExit=True, goalPose=goal)
+    monkeypatch.setattr(AgentIndividual, "uniprng", Random(0))
+    monkeypatch.setattr(AgentIndividual, "blockActionSize", 5)
+    monkeypatch.setattr(AgentIndividual, "geneRange", 512)
+    monkeypatch.setattr(AgentIndividual, "trimGenes", trim)
+    individual = AgentIndividual()
+    individual.state = list(state)
+    objectives, record = evaluator_class.Evaluate(individual.state)
+    individual.setObjectives(objectives, record)
+    assert individual.state == (state[: len(state) - record["unusedGenes"]] if trim else state)
+    # the genes that are gone never were executed
+    assert evaluator_class.Evaluate(individual.state)[0] == objectives
+
+
+@pytest.mark.parametrize("aggregate", [None, "min"])
+def test_start_states_stop_like_single_envs(evaluator, env_pool, reachable_goal, aggregate):
+    from gym_pusht.envs import PushTEnv
+
+    state, goal, _ = reachable_goal
+    evaluator_class = evaluator(
+        nStartStates=4, startAggregate=aggregate, goalPose=goal, poseTrace=True, earlyExit=True
+    )
+    objectives, record = evaluator_class.Evaluate(state)
+    actions = np.reshape(state, (-1, 2))
+    rewards, steps = [], []
+    for k, start in enumerate(evaluator_class.startStates):
+        # the world of start k runs like a PushTEnv from there, up to its first success
+        env = PushTEnv(goal_pose=goal)
+        env.reset(options={"reset_to_state": start})
+        poses = []
+        for action in actions:
+            reward, terminated, _, _ = env.step_sequence([action], max_steps=EnvPool.maxEpisodeSteps)
+            poses.append((*env.block.position, env.block.angle))
+            if terminated:
+                break
+        assert record["rewards"][k] == reward and tuple(record["finalPose"][k]) == poses[-1]
+        trace = record["poses"][:, k]
+        np.testing.assert_array_equal(trace[: len(poses)], np.array(poses, dtype=np.float32))
+        assert np.isnan(trace[len(poses) :]).all()
+        rewards.append(reward)
+        steps.append(len(poses))
+
+    # the world from fixedState stops at the goal, the others run through all actions
+    assert steps == [7, 20, 20, 20] and record["poses"].shape == (20, 4, 3)
+    aggregated = min(rewards) if aggregate == "min" else np.mean(rewards)
+    assert objectives == [2 * np.mean(steps) / 40, aggregated]
+    assert (record["nSteps"], record["unusedGenes"]) == (20, 0)
+
+
+def test_rescore_reproduces_rewards(evaluator, env_pool):
+    genomes = random_genomes(20, 20)
+    evaluator_class = evaluator()
+    results = [evaluator_class.Evaluate(state) for state in genomes]
+    final_poses = np.array([record["finalPose"] for _, record in results])
+    # a goal the block of fixedState partly covers, which none of the rollouts reaches either
+    shifted = [130.0, 210.0, 0.2]
+    rewards = evaluator_class.rescore(final_poses, np.array([DEFAULT_GOAL_POSE, shifted]))
+    assert rewards[:, 0] == pytest.approx([objectives[1] for objectives, _ in results], abs=1e-12)
+
+    coverage = TeeCoverage(shifted).coverage_batch(final_poses)
+    assert rewards[:, 1] == pytest.approx(np.clip(coverage / 0.95, 0.0, 1.0), abs=1e-12)
+    evaluator_class = evaluator(goalPose=shifted)
+    shifted_rewards = [evaluator_class.Evaluate(state)[0][1] for state in genomes]
+    assert rewards[:, 1] == pytest.approx(shifted_rewards, abs=1e-12) and max(shifted_rewards) > 0.1
+
+
+def test_pose_archive_round_trip(evaluator, env_pool, tmp_path):
+    save_pose_archive = pytest.importorskip("Agent", reason="Agent plots with matplotlib").savePoseArchive
+    genomes = random_genomes(6, 20, seed=2)
+    evaluator_class = evaluator(poseTrace=True)
+    archive = [(list(state), *evaluator_class.Evaluate(state)) for state in genomes]
+    path = tmp_path / "archive.npz"
+    save_pose_archive(path, archive, evaluator_class.cfg)
+
+    with np.load(path) as archive_file:
+        data = dict(archive_file)
+    assert data["genomes"].shape == (6, 40) and data["poses"].shape == (6, 20, 3)
+    np.testing.assert_array_equal(data["goalPose"], DEFAULT_GOAL_POSE)
+    for i, (state, objectives, record) in enumerate(archive):
+        np.testing.assert_array_equal(data["genomes"][i, : len(state)], state)
+        assert np.isnan(data["genomes"][i, len(state) :]).all()
+        np.testing.assert_array_equal(data["objectives"][i], objectives)
+        np.testing.assert_array_equal(data["finalPoses"][i], record["finalPose"])
+        np.testing.assert_array_equal(data["poses"][i, : len(state) // 2], record["poses"])
+        assert np.isnan(data["poses"][i, len(state) // 2 :]).all()
+    rewards = evaluator_class.rescore(data["finalPoses"], data["goalPose"][None])
+    assert rewards[:, 0] == pytest.approx(data["objectives"][:, 1], abs=1e-12)
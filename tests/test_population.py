@@ -0,0 +1,124 @@
+import multiprocessing
+from random import Random
+
+import pytest
+
+from FitnessMemo import FitnessMemo, genomeKey
+from Individual import AgentIndividual, Individual
+from Scheduler import LengthScheduler
+
+Population = pytest.importorskip("Population", reason="Population plots with matplotlib").Population
+
+
+calls = []
+
+
+def count_objectives(state):
+    calls.append(list(state))
+    return [len(state) / 8, sum(state)], {"length": len(state)}
+
+
+class CountingIndividual(AgentIndividual):
+    pass
+
+
+@pytest.fixture
+def population(monkeypatch):
+    for name, value in [("nGenes", 8), ("geneRange", 512), ("blockActionSize", 2), ("learningRate", 0.5)]:
+        monkeypatch.setattr(CountingIndividual, name, value)
+    monkeypatch.setattr(CountingIndividual, "ObjFunc", count_objectives)
+    monkeypatch.setattr(Individual, "uniprng", Random(0))
+    monkeypatch.setattr(Individual, "normprng", Random(1))
+    monkeypatch.setattr(Population, "individualType", CountingIndividual)
+    monkeypatch.setattr(Population, "memo", None)
+    monkeypatch.setattr(Population, "evalCounts", dict.fromkeys(Population.evalCounts, 0))
+    calls.clear()
+    return Population(0)
+
+
+def configure_worker(cfg):
+    from Evaluator import Evaluator
+
+    Evaluator.cfg = cfg
+    Evaluator.startStates = Evaluator.makeStartStates(cfg)
+
+
+def individual(state):
+    ind = CountingIndividual()
+    ind.state = list(state)
+    return ind
+
+
+def test_memo_evicts_least_recently_used():
+    memo = FitnessMemo(2)
+    keys = [genomeKey([float(i)]) for i in range(3)]
+    memo.put(keys[0], "a")
+    memo.put(keys[1], "b")
+    assert memo.get(keys[0]) == "a"  # keys[1] is the least recently used now
+    memo.put(keys[2], "c")
+    assert len(memo) == 2 and memo.evictions == 1
+    assert memo.get(keys[1]) is None
+    assert memo.get(keys[0]) == "a" and memo.get(keys[2]) == "c"
+    assert (memo.hits, memo.misses) == (3, 1)
+
+
+def test_genome_key_compares_values():
+    assert genomeKey([1, 2.5]) == genomeKey([1.0, 2.5])
+    assert genomeKey([1.0, 2.5]) != genomeKey([2.5, 1.0])
+
+
+def test_identical_genomes_are_evaluated_once(population, monkeypatch):
+    monkeypatch.setattr(Population, "memo", FitnessMemo(10))
+    population.population = [individual([1, 2]), individual([3, 4]), individual([1, 2])]
+    population.evaluateObjectives()
+    assert calls == [[1, 2], [3, 4]]
+    assert population[0].objectives == population[2].objectives == [0.25, 3]
+    assert population[0].objectives is not population[2].objectives
+    assert Population.takeEvalCounts() == {"requested": 3, "duplicates": 1, "memoHits": 0, "evaluated": 2}
+
+    # a later generation finds both genomes in the memo
+    population.population += [individual([3, 4]), individual([1, 2])]
+    population.evaluateObjectives()
+    assert len(calls) == 2
+    assert population[3].objectives == [0.25, 7]
+    assert Population.takeEvalCounts() == {"requested": 2, "duplicates": 0, "memoHits": 2, "evaluated": 0}
+
+
+@pytest.mark.parametrize(
+    "rate, state",
+    [
+        (1.0, [100.0, 200.0]),  # mutates existing genes, but the first action is never mutated
+        (0.0, [float(i) for i in range(8)]),  # would add genes, but the genome is full
+    ],
+)
+def test_unchanged_mutation_keeps_objectives(population, monkeypatch, rate, state):
+    monkeypatch.setattr(CountingIndividual, "minMutRate", rate)
+    monkeypatch.setattr(CountingIndividual, "maxMutRate", rate)
+    population.population = [individual(state)]
+    population.evaluateObjectives()
+    objectives = population[0].objectives
+
+    population.mutate()
+    assert population[0].state == state and population[0].objectives is objectives
+    population.evaluateObjectives()
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("scheduled", [False, True])
+def test_pool_matches_serial_evaluation(population, evaluator, monkeypatch, scheduled):
+    evaluator_class = evaluator(nGenesCfg=40)
+    monkeypatch.setattr(CountingIndividual, "ObjFunc", evaluator_class.Evaluate)
+    rng = Random(2)
+    # actions around the block, so that the rollouts push it
+    states = [[rng.uniform(50, 300) for _ in range(2 * rng.randint(1, 20))] for _ in range(8)]
+    population.population = [individual(state) for state in states]
+    population.evaluateObjectives()
+    serial = [ind.objectives for ind in population]
+    assert len({objectives[1] for objectives in serial}) > 1
+
+    population.population = [individual(state) for state in states]
+    with multiprocessing.Pool(2, initializer=configure_worker, initargs=(evaluator_class.cfg,)) as pool:
+        monkeypatch.setattr(Population, "pool", pool)
+        monkeypatch.setattr(Population, "scheduler", LengthScheduler(2) if scheduled else None)
+        population.evaluateObjectives()
+    assert [ind.objectives for ind in population] == serial
@@ -0,0 +1,84 @@
+from random import Random
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from Evaluator import EnvPool
+from PrefixCache import NODE_BYTES, SNAPSHOT_BYTES, PrefixCache, captureState, restoreState
+
+
+def shared_prefix_genomes(n, seed=0):
+    """n genomes of 7 to 30 actions, and n more that continue a prefix of one of them."""
+    rng = Random(seed)
+    genomes = [[rng.uniform(50, 300) for _ in range(2 * rng.randint(7, 30))] for _ in range(n)]
+    for genome in genomes[:n]:
+        prefix = genome[: 2 * rng.randint(3, len(genome) // 2)]
+        genomes.append(
+            prefix + [rng.uniform(50, 300) for _ in range(2 * rng.randint(0, 30 - len(prefix) // 2))]
+        )
+    return genomes
+
+
+def snapshot(name):
+    return (name, 0.0, None, None, False)
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_cached_evaluations_match_cold_ones(evaluator, monkeypatch, raw):
+    evaluator_class = evaluator(rawEnv=raw, poseTrace=True, prefixCacheInterval=3)
+    genomes = shared_prefix_genomes(30)
+    cold = [evaluator_class.Evaluate(state) for state in genomes]
+
+    cache = PrefixCache(2**24, evaluator_class.snapshotInterval())
+    monkeypatch.setattr(evaluator_class, "prefixCache", cache)
+    for _ in range(2):
+        for state, (objectives, record) in zip(genomes, cold, strict=True):
+            cached_objectives, cached_record = evaluator_class.Evaluate(state)
+            assert cached_objectives == objectives
+            assert cached_record["finalPose"] == record["finalPose"]
+            np.testing.assert_array_equal(cached_record["poses"], record["poses"])
+    assert cache.hits > len(genomes) and cache.stepsSaved > cache.stepsSimulated
+
+
+def test_eviction_drops_least_recently_used_and_prunes():
+    cache = PrefixCache(6 * NODE_BYTES + 3 * SNAPSHOT_BYTES, 2)
+    node = cache.insert(cache.root, (1, 2), snapshot("a2"))
+    cache.insert(node, (3, 4), snapshot("a4"))
+    cache.insert(node, (5, 6), snapshot("b4"))
+    assert cache.nbytes() == cache.maxBytes and cache.evictions == 0
+    assert cache.lookup((1, 2, 5, 6))[1].snapshot == snapshot("b4")
+
+    # a fourth snapshot goes beyond the budget: a2 and a4 are the least recently used
+    cache.insert(cache.root, (7, 8), snapshot("c2"))
+    assert cache.evictions == 2 and len(cache.lru) == 2
+    # the a4 branch is pruned up to the node of a2, which still leads to b4
+    assert set(cache.root.children) == {1, 7} and set(cache.root.children[1].children[2].children) == {5}
+    assert cache.nNodes == 6 and cache.nbytes() == 6 * NODE_BYTES + 2 * SNAPSHOT_BYTES
+    assert cache.lookup((1, 2, 3, 4)) == (0, cache.root)
+
+
+def test_lookup_returns_snapshot_depths_only():
+    cache = PrefixCache(2**20, 3)
+    actions = tuple(range(7))
+    # what a rollout of the first five actions stores: every 3 actions, and at its end
+    node = cache.insert(cache.root, actions[:3], snapshot("3"))
+    cache.insert(node, actions[3:5], snapshot("5"))
+    for length, depth in [(2, 0), (3, 3), (4, 3), (5, 5), (6, 3), (7, 3)]:
+        found, node = cache.lookup(actions[:length])
+        assert found == depth and (depth == 0 or node.snapshot == snapshot(str(depth)))
+    assert (cache.hits, cache.misses, cache.stepsSaved) == (5, 1, 17)
+
+
+def test_restore_syncs_time_limit():
+    env = gym.make("gym_pusht/PushT-v0")
+    env.reset(options={"reset_to_state": [20.0, 250, 100.0, 200.0, 0.0]})
+    for _ in range(EnvPool.maxEpisodeSteps - 2):
+        env.step([20.0, 250.0])
+    state = captureState(env)
+    env.reset()
+    assert env._elapsed_steps == 0
+    restoreState(env, state)
+    assert env._elapsed_steps == env.unwrapped._n_steps == EnvPool.maxEpisodeSteps - 2
+    assert not env.step([20.0, 250.0])[3]
+    assert env.step([20.0, 250.0])[3]
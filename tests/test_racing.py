@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from EvalStore import EvalStore, configKey
+from FitnessMemo import FitnessMemo, genomeKey
+from Racing import Racer
+
+Population = pytest.importorskip("Population", reason="Population plots with matplotlib").Population
+
+
+def calibrated_racer(noise, n=400, seed=0):
+    """A racer fitted to pairs with full = 2 * low + 0.1 plus normal noise of the given spread."""
+    racer = Racer(confidence=2.0, forgetting=1.0)
+    rng = np.random.default_rng(seed)
+    for low in rng.uniform(0, 0.4, n):
+        racer.add(low, 2 * low + 0.1 + rng.normal(0, noise))
+    return racer
+
+
+def test_fit_recovers_line():
+    intercept, slope, residual, corr = calibrated_racer(0.01).fit()
+    assert intercept == pytest.approx(0.1, abs=0.005) and slope == pytest.approx(2.0, abs=0.02)
+    assert residual == pytest.approx(0.01, rel=0.1) and corr > 0.99
+
+    intercept, slope, residual, corr = calibrated_racer(0.0).fit()
+    assert (intercept, slope, residual, corr) == pytest.approx((0.1, 2.0, 0.0, 1.0), abs=1e-6)
+
+
+def test_margin_narrows_with_correlation():
+    assert Racer(minPairs=10).optimistic([0.1]) is None
+    stats = []
+    for noise in (0.2, 0.05, 0.01):
+        racer = calibrated_racer(noise)
+        estimate = racer.optimistic([0.0, 0.2])
+        np.testing.assert_allclose(np.diff(estimate), 0.4, rtol=0.1)
+        stats.append(racer.takeStats())
+    corrs = [s["corr"] for s in stats]
+    margins = [s["margin"] for s in stats]
+    assert corrs == sorted(corrs) and margins == sorted(margins, reverse=True)
+    assert margins[-1] == pytest.approx(2 * 0.01, rel=0.1)
+
+
+def test_race_skips_known_genomes(tmp_path, monkeypatch):
+    memo = FitnessMemo(10)
+    memo.put(genomeKey([1.0, 1.0]), ([0.25, 0.5], {}))
+    store = EvalStore(str(tmp_path / "store.sqlite"), 10, configKey({}))
+    store.put([2.0, 2.0], ([0.25, 0.6], {}))
+    raced = []
+
+    def low_objectives(state):
+        raced.append(state)
+        return [0.25, 0.1]
+
+    monkeypatch.setattr(Population, "individualType", SimpleNamespace(LowObjFunc=low_objectives))
+    monkeypatch.setattr(Population, "racer", Racer())
+    monkeypatch.setattr(Population, "memo", memo)
+    monkeypatch.setattr(Population, "store", store)
+    offspring = Population(0)
+    offspring.population = [
+        SimpleNamespace(state=state, objectives=None, lowObjectives=None)
+        for state in ([1.0, 1.0], [2.0, 2.0], [3.0, 3.0])
+    ]
+    offspring.race([])
+    assert raced == [[3.0, 3.0]] and len(offspring) == 3
+    assert [ind.lowObjectives for ind in offspring] == [None, None, [0.25, 0.1]]
+    # peeking neither counts as a lookup nor as a use
+    assert (memo.hits, memo.misses, store.hits, store.misses) == (0, 0, 0, 0)
+    assert Population.racer.takeStats()["raced"] == 1
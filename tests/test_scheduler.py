@@ -0,0 +1,46 @@
+import pytest
+
+from Scheduler import LengthScheduler
+
+
+class InOrderPool:
+    """Runs the jobs one after the other in this process, in the order they are handed out."""
+
+    def __init__(self):
+        self.dispatched = []
+
+    def imap_unordered(self, func, jobs):
+        for job in jobs:
+            self.dispatched.append(job[2])
+            yield func(job)
+
+
+def test_dispatches_longest_first():
+    scheduler = LengthScheduler(2)
+    pool = InOrderPool()
+    states = [[0.0] * 2, [1.0] * 6, [2.0] * 4, [3.0] * 6]
+    assert scheduler.map(pool, sum, states) == [0.0, 6.0, 8.0, 18.0]
+    assert pool.dispatched == [states[1], states[3], states[2], states[0]]
+
+
+def test_estimate_follows_timings():
+    scheduler = LengthScheduler(2, forgetting=1.0)
+    assert list(scheduler.estimate([4, 2])) == [4, 2]
+    scheduler.observe(10, 1.5)
+    scheduler.observe(20, 2.5)
+    assert list(scheduler.estimate([30, 0])) == pytest.approx([3.5, 0.5])
+    # a falling trend is noise: cost per gene on average
+    scheduler.observe(40, 0.0)
+    assert list(scheduler.estimate([14])) == pytest.approx([14 * 4 / 70])
+
+
+def test_stats_of_maps():
+    scheduler = LengthScheduler(3)
+    for _ in range(2):
+        scheduler.map(InOrderPool(), sum, [[1.0] * n for n in (2, 8, 4)])
+    stats = scheduler.takeStats()
+    # a single (in-process) worker did all the work
+    busy, *idle = stats["utilization"]
+    assert idle == [0.0, 0.0] and 0 < busy <= 1
+    assert 0 < stats["bound"] <= stats["makespan"]
+    assert scheduler.takeStats() == {"makespan": 0.0, "bound": 0.0, "utilization": [0.0, 0.0, 0.0]}
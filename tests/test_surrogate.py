@@ -0,0 +1,57 @@
+from random import Random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from Surrogate import Surrogate
+
+Population = pytest.importorskip("Population", reason="Population plots with matplotlib").Population
+
+
+def trained_surrogate(n=60):
+    """A surrogate of nGenes=8 genes in [0, 1] that learned reward = first gene."""
+    surrogate = Surrogate(8, 1.0, ridge=1e-6, minSamples=n)
+    rng = np.random.default_rng(0)
+    for _ in range(n):
+        state = rng.uniform(0, 1, 2 * rng.integers(1, 5)).tolist()
+        assert surrogate.predict([state]) is None
+        surrogate.add(state, state[0])
+    return surrogate
+
+
+def test_surrogate_learns_rewards():
+    surrogate = trained_surrogate()
+    states = [[0.1, 0.7], [0.4] * 8, [0.9, 0.2, 0.3, 0.5]]
+    np.testing.assert_allclose(surrogate.predict(states), [0.1, 0.4, 0.9], atol=1e-3)
+
+    for state, predicted in zip(states, surrogate.predict(states), strict=True):
+        surrogate.add(state, state[0] + 0.1, predicted)
+    stats = surrogate.takeStats()
+    assert stats["mae"] == pytest.approx(0.1, abs=1e-3) and stats["rank_corr"] == pytest.approx(1.0)
+    assert np.isnan(surrogate.takeStats()["mae"])
+
+
+@pytest.fixture
+def offspring(monkeypatch):
+    monkeypatch.setattr(Population, "individualType", SimpleNamespace(nGenes=8))
+    monkeypatch.setattr(Population, "uniprng", Random(0))
+    monkeypatch.setattr(Population, "surrogate", trained_surrogate())
+    population = Population(0)
+    population.population = [
+        SimpleNamespace(state=state, objectives=None, predicted=None)
+        for state in ([0.9] * 8, [0.5, 0.5], [0.2, 0.2], [0.8] * 8)
+    ]
+    population.population.append(SimpleNamespace(state=[0.1] * 8, objectives=[1.0, 0.1], predicted=None))
+    return population
+
+
+@pytest.mark.parametrize("reward_only, kept", [(False, [0.5, 0.2]), (True, [0.9, 0.8])])
+def test_prescreen_keeps_the_budget(offspring, reward_only, kept):
+    # the parent dominates the long genomes, so they go first unless the steps objective is left out
+    parents = [SimpleNamespace(objectives=[0.5, 0.95])]
+    offspring.prescreen(parents, 0.5, 0.0, rewardOnly=reward_only)
+    assert [ind.state[0] for ind in offspring] == [*kept, 0.1]
+    assert all(ind.predicted == pytest.approx(ind.state[0], abs=1e-3) for ind in offspring[:2])
+    stats = Population.surrogate.takeStats()
+    assert (stats["screened"], stats["skipped"]) == (4, 2)
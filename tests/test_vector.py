@@ -0,0 +1,28 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+import gym_pusht  # noqa: F401
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_make_vec_resets_per_env_states_and_autoresets(asynchronous):
+    env = gym.make_vec(
+        "gym_pusht/PushT-v0",
+        3,
+        vectorization_mode="custom",
+        vector_kwargs={"obs_type": "pixels_agent_pos", "asynchronous": asynchronous},
+    )
+    assert env.observation_space["pixels"].shape == (3, 96, 96, 3)
+    states = np.array([[100, 100, 200, 200, 0.0], [300, 300, 200, 250, 1.0], [150, 400, 250, 250, 0.5]])
+    obs, _ = env.reset(options={"reset_to_state": states})
+    np.testing.assert_array_equal(obs["agent_pos"], states[:, :2])
+
+    # the registered step limit truncates every episode, after which the sub-environments reset themselves
+    for _ in range(gym.spec("gym_pusht/PushT-v0").max_episode_steps):
+        obs, _, terminated, truncated, info = env.step(np.full((3, 2), 256.0))
+    assert (terminated | truncated).all()
+    assert all(final["agent_pos"].shape == (2,) for final in info["final_observation"])
+    obs, *_ = env.step(np.full((3, 2), 256.0))
+    assert obs["pixels"].dtype == np.uint8
+    env.close()